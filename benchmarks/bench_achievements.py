@@ -0,0 +1,96 @@
+"""Замер проверки достижений: опрос всех условий против трекера порогов.
+
+Запуск: python benchmarks/bench_achievements.py
+"""
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from systems import Achievement, AchievementTracker, ACHIEVEMENT_STATS
+
+ACHIEVEMENT_COUNTS = (50, 200, 1000, 5000)
+CHECKS = 200
+REPEATS = 5
+STATS = ["kills", "time_survived", "wave", "level", "score"]
+
+
+def make_achievements(n, seed=1):
+    rng = random.Random(seed)
+    achievements = {}
+    for i in range(n):
+        stat = STATS[i % len(STATS)]
+        achievements[f"a{i}"] = Achievement(f"a{i}", "", "", reward=1, stat=stat,
+                                            threshold=rng.randint(1, 20000))
+    return achievements
+
+
+def make_engine():
+    player = SimpleNamespace(level=1, upgrades={}, max_hp=100, max_shield=0,
+                             multishot=1, lifesteal=0, crit_chance=0)
+    data = {"currency": 0, "modules": {}, "stats": {"games_played": 0}}
+    return SimpleNamespace(kills=0, time_survived=0, score=0, player=player,
+                           wave_system=SimpleNamespace(current_wave=1),
+                           save_system=SimpleNamespace(data=data))
+
+
+def poll_all(achievements, engine, unlocked):
+    """Старый проход: каждое условие через try/except"""
+    newly = []
+    for ach_id, achievement in achievements.items():
+        if not unlocked.get(ach_id, False):
+            try:
+                if achievement.check(engine):
+                    newly.append(achievement)
+            except:
+                pass
+    return newly
+
+
+def run(check):
+    """CHECKS проверок одного забега подряд, счётчики растут между ними"""
+    engine = make_engine()
+    unlocked = {}
+    for _ in range(CHECKS):
+        engine.kills += 7
+        engine.score += 70
+        engine.time_survived += 3
+        for achievement in check(engine, unlocked):
+            unlocked[achievement.id] = True
+    return unlocked
+
+
+def best_of(fn, *args):
+    best = float("inf")
+    result = None
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def main():
+    print(f"{CHECKS} проверок, лучший из {REPEATS} замеров, мкс на проверку")
+    print(f"{'достижений':>10} {'опрос':>10} {'трекер':>10} {'ускорение':>10}")
+    for n in ACHIEVEMENT_COUNTS:
+        achievements = make_achievements(n)
+        t_old, found_old = best_of(run, lambda e, u: poll_all(achievements, e, u))
+        tracker = AchievementTracker(achievements)
+
+        def tracked_run():
+            tracker.reset()  # как reset_game: новый забег — указатели с нуля
+            return run(tracker.poll)
+        t_new, found_new = best_of(tracked_run)
+        assert found_old == found_new, (len(found_old), len(found_new))
+        t_old, t_new = t_old * 1000 / CHECKS, t_new * 1000 / CHECKS
+        print(f"{n:>10} {t_old:>10.1f} {t_new:>10.1f} {t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Замер широкой фазы пуль против врагов: полный перебор против сетки.
+
+Враги живут в EnemyStore, как в игре; сеточный проход повторяет
+update_combat — reindex() хранилища и grid.query на каждую пулю.
+
+Запуск: python benchmarks/bench_collision.py
+"""
+import math
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame
+from entities import Enemy, EnemyStore, Bullet
+
+ENEMY_COUNTS = (100, 1000, 5000)
+BULLETS = 200
+REPEATS = 5
+TYPES = ["basic", "fast", "tank", "swarm", "sniper", "ghost", "bruiser", "boss"]
+
+
+def make_scene(n_enemies, seed=1):
+    rng = random.Random(seed)
+    enemies = EnemyStore()
+    for _ in range(n_enemies):
+        a = rng.uniform(0, math.tau)
+        d = rng.uniform(0, 1200)
+        pos = pygame.Vector2(math.cos(a) * d, math.sin(a) * d)
+        enemies.append(Enemy(pos, rng.choice(TYPES), 2.0))
+    bullets = []
+    for _ in range(BULLETS):
+        a = rng.uniform(0, math.tau)
+        d = rng.uniform(0, 900)
+        pos = pygame.Vector2(math.cos(a) * d, math.sin(a) * d)
+        bullets.append(Bullet(pos, rng.uniform(0, 360), 12, 10, 0, 4, 2000))
+    return enemies, bullets
+
+
+def brute_force(enemies, bullets):
+    """Старый проход: каждая пуля против каждого врага"""
+    hits = 0
+    for bullet in bullets:
+        bx, by = bullet.pos.x, bullet.pos.y
+        for enemy in enemies[:]:
+            dx = bx - enemy.pos.x
+            dy = by - enemy.pos.y
+            if dx * dx + dy * dy < (enemy.size + bullet.size * 4) ** 2:
+                hits += 1
+    return hits
+
+
+def grid_pass(enemies, bullets):
+    """Новый проход: перестройка индекса хранилища + запросы по соседним ячейкам"""
+    hits = 0
+    grid = enemies.reindex()
+    for bullet in bullets:
+        bx, by = bullet.pos.x, bullet.pos.y
+        for enemy in grid.query(bx, by, bullet.size * 4):
+            dx = bx - enemy.pos.x
+            dy = by - enemy.pos.y
+            if dx * dx + dy * dy < (enemy.size + bullet.size * 4) ** 2:
+                hits += 1
+    return hits
+
+
+def best_of(fn, *args):
+    best = float("inf")
+    result = None
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def main():
+    print(f"{BULLETS} пуль, лучший из {REPEATS} замеров, мс на тик")
+    print(f"{'врагов':>8} {'перебор':>10} {'сетка':>10} {'ускорение':>10}")
+    for n in ENEMY_COUNTS:
+        enemies, bullets = make_scene(n)
+        t_old, hits_old = best_of(brute_force, enemies, bullets)
+        t_new, hits_new = best_of(grid_pass, enemies, bullets)
+        assert hits_old == hits_new, (hits_old, hits_new)
+        print(f"{n:>8} {t_old:>10.2f} {t_new:>10.2f} {t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
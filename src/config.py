@@ -1,16 +1,73 @@
+import os
 import pygame
 from enum import Enum
 
 FPS = 60
+
+# Логика идёт фиксированным шагом, отрисовка — с интерполяцией между шагами.
+# Скорости заданы в пикселях за тик BASE_HZ и масштабируются на dt, но
+# поштучные эффекты (пробитие, урон от касания) настроены под тик 60 Гц,
+# поэтому SIM_HZ совпадает с BASE_HZ.
+BASE_HZ = 60
+SIM_HZ = 60
+SIM_DT = 1.0 / SIM_HZ
+MAX_FRAME_TIME = 0.25  # Больше не догоняем: иначе тяжёлый кадр раскручивает очередь тиков
+
+# Отрисовка: враги за пределами экрана отсекаются, а когда на экране больше
+# LOD_ENEMY_THRESHOLD врагов, дальние (дальше LOD_DISTANCE от игрока)
+# рисуются упрощённо — одноцветной фигурой без эффектов и полоски HP
+LOD_ENEMY_THRESHOLD = 150
+LOD_DISTANCE = 450
+
+# Кристаллы опыта: сверх GEM_CAP лежащие в одной клетке GEM_MERGE_CELL
+# сливаются в один; слитые рисуются крупнее (до GEM_MAX_TIER ступени)
+GEM_CAP = 300
+GEM_MERGE_CELL = 48
+GEM_MAX_TIER = 4
+GEM_DRAW_REACH = 15 + GEM_MAX_TIER * 3
+
+# Ячейка общего пространственного индекса врагов (пули, ауры, поиск союзника)
+ENEMY_GRID_CELL = 128
+
+# LOD логики: особые враги дальше UPDATE_LOD_MARGIN за краем экрана (от
+# игрока) получают Enemy.update раз в UPDATE_LOD_TICKS тиков с накопленным dt
+UPDATE_LOD_MARGIN = 200
+UPDATE_LOD_TICKS = 4
+
+# Преследование: поле направлений на сетке FLOW_CELL вокруг игрока (FLOW_RADIUS
+# ячеек); ближе FLOW_NEAR ячеек и за краем поля направление точное
+FLOW_CELL = 64
+FLOW_RADIUS = 24
+FLOW_NEAR = 2
+
+# Расталкивание: пересекающиеся преследователи расходятся на SEPARATION_RELAX
+# долю перекрытия за тик, но не дальше собственного шага погони (поиск пар —
+# по сетке SEPARATION_CELL, не меньше диаметра самого крупного)
+SEPARATION_CELL = 64
+SEPARATION_RELAX = 0.5
+
+# Headless: без окна, звука и ввода (CI, прогоны баланса, замеры)
+HEADLESS = os.environ.get("CYBER_SURVIVOR_HEADLESS", "0") not in ("", "0")
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Папка для записей ввода забегов (пусто — не записывать); см. replay.py
+RECORD_DIR = os.environ.get("CYBER_SURVIVOR_RECORD", "")
+
 pygame.init()
 
-try:
-    info = pygame.display.Info()
-    WIDTH, HEIGHT = info.current_w, info.current_h 
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-except:
+if HEADLESS:
     WIDTH, HEIGHT = 1280, 720
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    screen = pygame.Surface((WIDTH, HEIGHT))
+else:
+    try:
+        info = pygame.display.Info()
+        WIDTH, HEIGHT = info.current_w, info.current_h 
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    except:
+        WIDTH, HEIGHT = 1280, 720
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
 
 COLORS = {
     "bg": (8, 10, 20),
@@ -0,0 +1,72 @@
+import pygame
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+@dataclass
+class InputState:
+    """Снимок управления на один тик симуляции"""
+    move: pygame.Vector2 = field(default_factory=pygame.Vector2)  # -1..1 по осям
+    aim: pygame.Vector2 = field(default_factory=pygame.Vector2)   # направление от игрока
+    fire: bool = False
+    dash: bool = False
+    ability: bool = False
+
+
+class PygameInput:
+    """Клавиатура и мышь (обычная игра)"""
+
+    def poll(self, engine) -> InputState:
+        keys = pygame.key.get_pressed()
+        controls = engine.save_system.data["controls"]
+        move = pygame.Vector2(0, 0)
+        if keys[controls["left"]]:
+            move.x -= 1
+        if keys[controls["right"]]:
+            move.x += 1
+        if keys[controls["up"]]:
+            move.y -= 1
+        if keys[controls["down"]]:
+            move.y += 1
+        aim = pygame.Vector2(pygame.mouse.get_pos()) - (engine.player.pos + engine.cam)
+        # При автострельбе стреляем всегда, иначе — пока зажата ЛКМ
+        fire = engine.save_system.data["settings"]["auto_fire"] or pygame.mouse.get_pressed()[0]
+        # Способность ставится в очередь по KEYDOWN в Engine.run, а не по опросу
+        return InputState(move, aim, bool(fire), bool(keys[controls["dash"]]))
+
+    def pick_perk(self, perks: list, engine) -> Optional[int]:
+        return None  # Выбор делает игрок в меню повышения уровня
+
+
+def aim_at_nearest(tick: int, engine) -> InputState:
+    """Сценарий по умолчанию: стоять на месте и стрелять в ближайшего врага"""
+    state = InputState(fire=True)
+    enemies = engine.enemies
+    n = len(enemies)
+    if n:
+        d = enemies.pos[:n] - (engine.player.pos.x, engine.player.pos.y)
+        i = int((d * d).sum(axis=1).argmin())
+        state.aim = pygame.Vector2(d[i, 0], d[i, 1])
+    return state
+
+
+class ScriptedInput:
+    """Ввод по сценарию для headless-режима.
+
+    script(tick, engine) -> InputState вызывается раз за тик; perk_choice
+    выбирает индекс перка при повышении уровня (по умолчанию первый).
+    """
+
+    def __init__(self, script: Callable[[int, object], InputState] = aim_at_nearest,
+                 perk_choice: Callable[[list, object], int] = lambda perks, engine: 0):
+        self.script = script
+        self.perk_choice = perk_choice
+        self.tick = 0
+
+    def poll(self, engine) -> InputState:
+        state = self.script(self.tick, engine)
+        self.tick += 1
+        return state
+
+    def pick_perk(self, perks: list, engine) -> Optional[int]:
+        return self.perk_choice(perks, engine)
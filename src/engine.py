@@ -1,44 +1,66 @@
 import pygame
 from systems import *
+from controls import InputState, PygameInput, ScriptedInput
+from profiler import FrameProfiler
+from replay import InputRecorder
+from render_cache import render_glow_text, render_text
+import hashlib
 import os
 import sys
 
 class Engine:
-    def __init__(self):
-        pygame.display.set_caption("CYBER SURVIVOR")
+    def __init__(self, headless: bool = HEADLESS, input_provider=None):
+        # headless: без экрана загрузки, иконок, шрифтов, звука и записи сейва;
+        # симуляция шагает через step() с вводом от input_provider
+        self.headless = headless
         self.clock = pygame.time.Clock()
         self.dt = 0
         
-        # --- ЭКРАН ЗАГРУЗКИ ---
-        self._draw_loading_screen()
+        if not headless:
+            pygame.display.set_caption("CYBER SURVIVOR")
+            # --- ЭКРАН ЗАГРУЗКИ ---
+            self._draw_loading_screen()
         
-        self.save_system = SaveSystem()
+        self.save_system = SaveSystem(persist=not headless)
         
         # Звуки и музыка
-        self.sound_manager = SoundManager()
+        self.sound_manager = SoundManager(enabled=not headless)
+        
+        # Источник управления: клавиатура/мышь или сценарий
+        if input_provider is None:
+            input_provider = ScriptedInput() if headless else PygameInput()
+        self.input = input_provider
+        
+        # Замеры времени по фазам кадра (оверлей — F3)
+        self.profiler = FrameProfiler()
+        self._profiler_font = None
+        # Сколько сущностей последний кадр отсёк или упростил (draw_world)
+        self.render_stats = {}
         
         # Курсор управляется через настройки
         self.cursor_size = 20
         cursor_mode = "game"  # will be updated from settings
-        if cursor_mode == "system":
-            pygame.mouse.set_visible(True)
-        else:
-            pygame.mouse.set_visible(False)
+        if not headless:
+            pygame.mouse.set_visible(cursor_mode == "system")
         
         # Загрузка иконок
         self.icons = {}
-        self.load_icons()
-        
-        # Кэш градиентного фона для подменю (рендерится 1 раз)
-        self._menu_bg_cache = None
-        self._menu_bg_size = (0, 0)
-        
-        # Шрифты
-        self.font_huge = pygame.font.Font(None, 88)
-        self.font_large = pygame.font.Font(None, 60)
-        self.font_medium = pygame.font.Font(None, 40)
-        self.font_small = pygame.font.Font(None, 28)
-        self.font_tiny = pygame.font.Font(None, 22)
+        if not headless:
+            self.load_icons()
+        
+        # Кэш градиентов: фоны меню и полосы HUD (рендерятся 1 раз)
+        self._gradient_cache = {}
+        # Плитка игрового фона: сетка и точки, сдвигается за камерой
+        self._bg_tile = None
+        self._bg_tile_size = (0, 0)
+        
+        # Шрифты (в headless ничего не рисуется)
+        if not headless:
+            self.font_huge = pygame.font.Font(None, 88)
+            self.font_large = pygame.font.Font(None, 60)
+            self.font_medium = pygame.font.Font(None, 40)
+            self.font_small = pygame.font.Font(None, 28)
+            self.font_tiny = pygame.font.Font(None, 22)
         
         self.state = GameState.MENU
         self.menu_page = "main"
@@ -248,19 +270,32 @@ class Engine:
         pygame.draw.line(screen, COLORS["player"], (x, y - line_length), (x, y - self.cursor_size - 2), 2)
         pygame.draw.line(screen, COLORS["player"], (x, y + self.cursor_size + 2), (x, y + line_length), 2)
     
+    def _gradient(self, w: int, h: int, c0: tuple, c1: tuple,
+                  horizontal: bool = False, dots: bool = False) -> pygame.Surface:
+        """Градиент c0 -> c1 сверху вниз (или слева направо), построенный один раз.
+
+        Ключ включает размер, поэтому при смене разрешения строится новый.
+        dots — сетка точек подменю поверх градиента.
+        """
+        key = (w, h, c0, c1, horizontal, dots)
+        surf = self._gradient_cache.get(key)
+        if surf is None:
+            surf = pygame.Surface((w, h))
+            steps = w if horizontal else h
+            for i in range(steps):
+                p = i / steps
+                color = tuple(int(a + (b - a) * p) for a, b in zip(c0, c1))
+                surf.fill(color, (i, 0, 1, h) if horizontal else (0, i, w, 1))
+            if dots:
+                for _dx in range(0, w + 50, 50):
+                    for _dy in range(0, h + 50, 50):
+                        pygame.draw.circle(surf, (20, 26, 44), (_dx, _dy), 2)
+            self._gradient_cache[key] = surf
+        return surf
+    
     def _draw_submenu_bg(self):
-        """Рисует кэшированный градиентный фон для подменю (оптимизация)"""
-        if self._menu_bg_cache is None or self._menu_bg_size != (WIDTH, HEIGHT):
-            self._menu_bg_size = (WIDTH, HEIGHT)
-            self._menu_bg_cache = pygame.Surface((WIDTH, HEIGHT))
-            for _i in range(HEIGHT):
-                _p = _i / HEIGHT
-                self._menu_bg_cache.fill((int(7+14*_p), int(9+18*_p), int(18+30*_p)), (0, _i, WIDTH, 1))
-        screen.blit(self._menu_bg_cache, (0, 0))
-        # Dot overlay
-        for _dx in range(0, WIDTH + 50, 50):
-            for _dy in range(0, HEIGHT + 50, 50):
-                pygame.draw.circle(screen, (20, 26, 44), (_dx, _dy), 2)
+        """Рисует кэшированный градиентный фон с точками для подменю"""
+        screen.blit(self._gradient(WIDTH, HEIGHT, (7, 9, 18), (21, 27, 48), dots=True), (0, 0))
 
     # ===== UI HELPERS =====
     CONTAINER_W = 1100
@@ -269,13 +304,9 @@ class Engine:
     
     def ui_draw_title(self, text: str, y: int = 60):
         """Стандартный заголовок подменю с свечением"""
-        title = self.font_large.render(text, True, COLORS["player"])
+        title = render_text(self.font_large, text, True, COLORS["player"])
         title_rect = title.get_rect(center=(WIDTH // 2, y))
-        glow_surf = pygame.Surface((title_rect.width + 40, title_rect.height + 40), pygame.SRCALPHA)
-        for i in range(3):
-            alpha = 35 - i * 10
-            glow_t = self.font_large.render(text, True, (*COLORS["player_glow"], alpha))
-            glow_surf.blit(glow_t, (20 + i * 2, 20 + i * 2))
+        glow_surf = render_glow_text(self.font_large, text, COLORS["player_glow"], 3, 35, 10, 2, 20)
         screen.blit(glow_surf, (title_rect.x - 20, title_rect.y - 20))
         screen.blit(title, title_rect)
         return title_rect
@@ -301,7 +332,7 @@ class Engine:
         bg = (40, 50, 68) if is_hover else (28, 34, 50)
         pygame.draw.rect(screen, bg, rect, border_radius=10)
         pygame.draw.rect(screen, bc, rect, border_w, border_radius=10)
-        t = font.render(text, True, bc)
+        t = render_text(font, text, True, bc)
         screen.blit(t, t.get_rect(center=rect.center))
     
     def ui_scrollbar(self, cont_x: int, cont_y: int, cont_w: int, cont_h: int,
@@ -315,22 +346,39 @@ class Engine:
             pygame.draw.rect(screen, COLORS["player"], 
                            (cont_x + cont_w - 12, sb_y, 8, sb_h), border_radius=4)
 
-    def reset_game(self):
+    def reset_game(self, seed: Optional[int] = None):
+        """Новый забег. seed задаёт ГСЧ симуляции (None — случайный)"""
+        if getattr(self, 'recorder', None) is not None and len(self.recorder):
+            self.finish_recording()
+        # Всё, что влияет на исход боя, берёт случайность только из self.rng;
+        # частицы и звуки пользуются своей (косметической) случайностью
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
         modules = self.save_system.data["modules"]
         skin = self.save_system.data["current_skin"]
         self.player = Player(modules, skin)
-        self.enemies: List[Enemy] = []
-        self.bullets: List[Bullet] = []
-        self.enemy_bullets: List[dict] = []   # Снаряды врагов
-        self.exp_gems: List[pygame.Vector2] = []
+        self.enemies = EnemyStore()
+        # Пулы: объекты переиспользуются между выстрелами, удаление O(1)
+        self.bullets = Pool(Bullet, Bullet.reset)
+        self.enemy_bullets = EnemyProjectiles()   # Снаряды врагов
+        self.exp_gems = GemStore()
         self.particle_system = ParticleSystem()
         
         self.cam = pygame.Vector2(0, 0)
+        self.prev_cam = pygame.Vector2(0, 0)
+        self.sim_accumulator = 0.0  # Несыгранное время кадра (с), меньше SIM_DT
         self.score = 0
         self.kills = 0
         self.time_survived = 0
-        
-        self.last_enemy_spawn = 0
+        self.sim_time = 0.0  # Часы симуляции (мс), идут только во время игры
+        self.sim_tick = 0
+        self.ability_queued = False  # Нажатие способности до ближайшего тика
+        self._orbital_hit_times = {}  # метка врага -> время последнего удара орбитали
+        self._kill_buffer = []  # (враг, добивающий урон, частицы, цвет) до flush_kills
+        self._tick_sounds = set()
+        self.achievement_tracker = AchievementTracker(AchievementSystem.ACHIEVEMENTS)
+        
+        self.last_enemy_spawn = float("-inf")
         self.spawn_rate = 1000
         self.dash_count = 0  # Счётчик рывков для достижения
         self._miniboss_spawned_this_wave = False
@@ -342,57 +390,43 @@ class Engine:
         endless_mode = (self.game_mode == GameMode.ENDLESS)
         self.wave_system = WaveSystem(wave_break, endless_mode)
         self.wave_system.start_wave()
+        # Модули и скин могли уже выполнить условия — дальше только события
+        AchievementSystem.check_achievements(self, self.save_system)
         
         # Перки для level up
         if hasattr(self, 'current_perks'):
             delattr(self, 'current_perks')
-    
-    def update_player_input(self):
-        keys = pygame.key.get_pressed()
-        controls = self.save_system.data["controls"]
-        
-        move = pygame.Vector2(0, 0)
-        if keys[controls["left"]]:
-            move.x -= 1
-        if keys[controls["right"]]:
-            move.x += 1
-        if keys[controls["up"]]:
-            move.y -= 1
-        if keys[controls["down"]]:
-            move.y += 1
         
+        # Запись ввода забега (CYBER_SURVIVOR_RECORD=<папка>)
+        self.recorder = None
+        if RECORD_DIR and not self.headless:
+            self.start_recording()
+    
+    def update_player_input(self, inp: InputState):
+        k = self.dt * BASE_HZ
+        move = inp.move
         if move.length() > 0:
-            self.player.pos += move.normalize() * self.player.speed
+            self.player.pos += move.normalize() * self.player.speed * k
         
-        self.player.pos += self.player.velocity
+        self.player.pos += self.player.velocity * k
         
         # Dash
-        if keys[controls["dash"]]:
+        if inp.dash:
             if self.player.dash(move):
                 self.dash_count += 1
+                self.stat_changed("dashes")
                 self.particle_system.emit(self.player.pos, 20, self.player.color, (5, 12))
                 # Звук дэша
                 self.sound_manager.play_sound("dash")
     
-    def update_shooting(self):
-        auto_fire = self.save_system.data["settings"]["auto_fire"]
-        
-        # Автострельба или зажатие ЛКМ
-        should_shoot = False
-        if auto_fire:
-            # При автострельбе стреляем всегда
-            should_shoot = True
-        else:
-            # При ручной стрельбе только при зажатой ЛКМ
-            should_shoot = pygame.mouse.get_pressed()[0]
-        
-        if should_shoot:
-            now = pygame.time.get_ticks()
+    def update_shooting(self, inp: InputState):
+        # Автострельбу или зажатие ЛКМ учитывает провайдер ввода (inp.fire)
+        if inp.fire:
+            now = self.sim_time
             if now - self.player.last_shot > self.player.fire_rate:
                 self.player.last_shot = now
                 
-                m_pos = pygame.mouse.get_pos()
-                rel = pygame.Vector2(m_pos) - (self.player.pos + self.cam)
+                rel = inp.aim
                 if rel.length() > 0:
                     base_angle = math.degrees(math.atan2(rel.y, rel.x))
                     
@@ -400,120 +434,156 @@ class Engine:
                     total_bullets = self.player.multishot + twin
                     
                     # Параллельные выстрелы: все летят в одном направлении, но с боковым смещением
-                    if total_bullets > 1:
-                        # Перпендикулярное направление для смещения
-                        perp_angle = math.radians(base_angle + 90)
-                        perp = pygame.Vector2(math.cos(perp_angle), math.sin(perp_angle))
-                        spacing = 14  # пикселей между пулями
-                        offsets = []
-                        for i in range(total_bullets):
-                            offset_dist = (i - (total_bullets - 1) / 2) * spacing
-                            offsets.append(perp * offset_dist)
-                    else:
-                        offsets = [pygame.Vector2(0, 0)]
-                    
-                    for offset in offsets:
-                        is_crit = random.random() < self.player.crit_chance
+                    # (перпендикулярно направлению, spacing пикселей между пулями)
+                    perp_angle = math.radians(base_angle + 90)
+                    perp_x = math.cos(perp_angle)
+                    perp_y = math.sin(perp_angle)
+                    spacing = 14
+                    px, py = self.player.pos
+                    for i in range(total_bullets):
+                        offset_dist = (i - (total_bullets - 1) / 2) * spacing
+                        is_crit = self.rng.random() < self.player.crit_chance
                         dmg = int(self.player.dmg * (self.player.crit_multiplier if is_crit else 1))
-                        self.bullets.append(Bullet(
-                            self.player.pos + offset, base_angle, self.player.bullet_speed,
+                        self.bullets.spawn(
+                            (px + perp_x * offset_dist, py + perp_y * offset_dist),
+                            base_angle, self.player.bullet_speed,
                             dmg, self.player.piercing, self.player.bullet_size,
                             self.player.bullet_lifetime, is_crit
-                        ))
+                        )
                     
                     # Звук выстрела
                     self.sound_manager.play_sound("shoot")
     
     def spawn_enemies(self):
-        if not self.wave_system.should_spawn_enemy():
+        wave_system = self.wave_system
+        if not wave_system.should_spawn_enemy():
             return
         
-        now = pygame.time.get_ticks()
-        difficulty = self.wave_system.get_difficulty()
-        
-        if now - self.last_enemy_spawn > self.spawn_rate / difficulty:
-            self.last_enemy_spawn = now
-            
-            angle = random.uniform(0, math.tau)
-            distance = random.uniform(800, 1200)
-            spawn_pos = self.player.pos + pygame.Vector2(
-                math.cos(angle) * distance,
-                math.sin(angle) * distance
-            )
+        now = self.sim_time
+        difficulty = wave_system.get_difficulty()
+        interval = self.spawn_rate / difficulty
+        
+        tick_ms = self.dt * 1000
+        if now - self.last_enemy_spawn > interval + tick_ms:
+            # Первый спавн или возврат после паузы: отсчёт с этого тика,
+            # без залпа за всё время простоя
+            self.last_enemy_spawn = now - interval
+        elapsed = now - self.last_enemy_spawn
+        if elapsed >= interval:
+            # Все враги, приходящиеся на прошедшее время, — одной пачкой;
+            # остаток интервала переходит на следующий тик
+            count = int(elapsed // interval)
+            self.last_enemy_spawn += count * interval
             
             # Типы врагов зависят от волны или времени (endless)
-            rand = random.random()
-            
             if self.game_mode == GameMode.ENDLESS:
-                # В бесконечном режиме используем время
-                time_elapsed = self.time_survived
-                
-                if time_elapsed < 60:  # Первая минута
-                    enemy_type = "basic"
-                elif time_elapsed < 120:  # 1-2 минуты
-                    enemy_type = random.choices(["basic", "fast", "swarm"], weights=[55, 30, 15])[0]
-                elif time_elapsed < 180:  # 2-3 минуты
-                    enemy_type = random.choices(["basic", "fast", "tank", "swarm", "sniper", "ranger", "lancer"], weights=[25, 25, 15, 15, 8, 7, 5])[0]
-                elif time_elapsed < 300:  # 3-5 минут
-                    enemy_type = random.choices(["basic", "fast", "tank", "swarm", "sniper", "ghost", "ranger", "healer"], weights=[20, 22, 18, 12, 10, 8, 6, 4])[0]
-                elif time_elapsed < 480:  # 5-8 минут
-                    enemy_type = random.choices(["basic", "fast", "tank", "swarm", "sniper", "ghost", "bruiser", "lancer", "buffer"], weights=[12, 18, 18, 12, 10, 10, 10, 6, 4])[0]
-                else:  # После 8 минут
-                    enemy_type = random.choices(["basic", "fast", "tank", "sniper", "ghost", "bruiser", "leech", "bomber", "sentinel", "boss", "ranger", "mortar", "shielder", "lancer", "healer", "buffer"], weights=[6, 9, 10, 7, 7, 9, 5, 5, 5, 6, 5, 4, 6, 5, 4, 7])[0]
+                table = ENDLESS_SPAWN_SCHEDULE.table(self.time_survived)
             else:
-                # Режим волн
-                wave_num = self.wave_system.current_wave
-                
-                if wave_num <= 2:
-                    enemy_type = random.choices(["basic", "swarm"], weights=[80, 20])[0]
-                elif wave_num <= 4:
-                    enemy_type = random.choices(["basic", "fast", "swarm"], weights=[55, 30, 15])[0]
-                elif wave_num <= 7:
-                    enemy_type = random.choices(["basic", "fast", "tank", "swarm", "sniper", "ranger", "lancer"], weights=[25, 25, 15, 15, 8, 7, 5])[0]
-                elif wave_num <= 12:
-                    enemy_type = random.choices(["basic", "fast", "tank", "sniper", "ghost", "swarm", "ranger", "mortar", "lancer", "healer"], weights=[15, 20, 15, 10, 10, 8, 8, 5, 5, 4])[0]
-                else:
-                    enemy_type = random.choices(["basic", "fast", "tank", "sniper", "ghost", "bruiser", "leech", "bomber", "sentinel", "boss", "ranger", "mortar", "shielder", "lancer", "healer", "buffer"], weights=[6, 9, 10, 7, 7, 9, 5, 5, 5, 7, 5, 4, 7, 5, 4, 5])[0]
-            
-            new_enemy = Enemy(spawn_pos, enemy_type, difficulty)
-            # Мини-босс каждые 5 волн (1 на волну, не быстрые типы)
-            wave_num = self.wave_system.current_wave
-            if (self.game_mode == GameMode.WAVES and 
-                    wave_num % 5 == 0 and wave_num > 0 and
-                    enemy_type not in ("fast", "swarm") and
-                    not getattr(self, '_miniboss_spawned_this_wave', False) and
-                    self.wave_system.wave_active and
-                    self.wave_system.enemies_spawned == 1):
-                # Превращаем в мини-босса (усиленного)
-                new_enemy.is_miniboss = True
-                new_enemy.max_hp = int(new_enemy.max_hp * 5.0)   # было 3.5
-                new_enemy.hp = new_enemy.max_hp
-                new_enemy.dmg = int(new_enemy.dmg * 2.5)          # было 2
-                new_enemy.speed = max(1.5, new_enemy.speed * 0.8)
-                new_enemy.size = int(new_enemy.size * 1.8)        # было 1.6
-                new_enemy.exp_value = int(new_enemy.exp_value * 5)
-                # Золотой оттенок
-                base = new_enemy.color
-                new_enemy.color = (
-                    min(255, int(base[0] * 0.5 + 255 * 0.5)),
-                    min(255, int(base[1] * 0.5 + 215 * 0.5)),
-                    min(255, int(base[2] * 0.2)),
-                )
-                # Броня мини-босса
-                new_enemy.damage_reduction = getattr(new_enemy, 'damage_reduction', 0) + 0.15
-                self._miniboss_spawned_this_wave = True
-            self.enemies.append(new_enemy)
-            self.wave_system.enemy_spawned()
+                table = WAVE_SPAWN_SCHEDULE.table(wave_system.current_wave)
+                count = min(count, wave_system.enemies_in_wave - wave_system.enemies_spawned)
+            
+            rng = self.rng
+            player_pos = self.player.pos
+            spawn_points = []
+            for _ in range(count):
+                angle = rng.uniform(0, math.tau)
+                distance = rng.uniform(800, 1200)
+                spawn_points.append(player_pos + pygame.Vector2(
+                    math.cos(angle) * distance,
+                    math.sin(angle) * distance
+                ))
+            
+            for spawn_pos, enemy_type in zip(spawn_points, table.sample_many(rng, count)):
+                self.spawn_enemy(spawn_pos, enemy_type, difficulty)
     
+    def spawn_enemy(self, spawn_pos: pygame.Vector2, enemy_type: str, difficulty: float):
+        new_enemy = Enemy(spawn_pos, enemy_type, difficulty)
+        # Мини-босс каждые 5 волн (1 на волну, не быстрые типы)
+        wave_num = self.wave_system.current_wave
+        if (self.game_mode == GameMode.WAVES and 
+                wave_num % 5 == 0 and wave_num > 0 and
+                enemy_type not in ("fast", "swarm") and
+                not getattr(self, '_miniboss_spawned_this_wave', False) and
+                self.wave_system.wave_active and
+                self.wave_system.enemies_spawned == 1):
+            # Превращаем в мини-босса (усиленного)
+            new_enemy.is_miniboss = True
+            new_enemy.max_hp = int(new_enemy.max_hp * 5.0)   # было 3.5
+            new_enemy.hp = new_enemy.max_hp
+            new_enemy.dmg = int(new_enemy.dmg * 2.5)          # было 2
+            new_enemy.speed = max(1.5, new_enemy.speed * 0.8)
+            new_enemy.size = int(new_enemy.size * 1.8)        # было 1.6
+            new_enemy.exp_value = int(new_enemy.exp_value * 5)
+            # Золотой оттенок
+            base = new_enemy.color
+            new_enemy.color = (
+                min(255, int(base[0] * 0.5 + 255 * 0.5)),
+                min(255, int(base[1] * 0.5 + 215 * 0.5)),
+                min(255, int(base[2] * 0.2)),
+            )
+            # Броня мини-босса
+            new_enemy.damage_reduction += 0.15
+            self._miniboss_spawned_this_wave = True
+        self.enemies.append(new_enemy)
+        self.wave_system.enemy_spawned()
+
+    def stat_changed(self, *stats: str):
+        """Характеристика достижений изменилась: проверяются только её пороги"""
+        AchievementSystem.stat_changed(self, self.save_system, *stats)
+
+    def kill_enemy(self, enemy: Enemy, dmg: int, particles: int = 15, color=None):
+        """Убийство врага уроном dmg: он сразу пропадает из запросов, а снятие
+        и награда — пачкой в flush_kills. Повторное убийство ничего не даёт"""
+        if self.enemies.kill(enemy):
+            self._kill_buffer.append((enemy, dmg, particles, color))
+
+    def tick_sound(self, name: str):
+        """Звук, который за тик прозвучит не больше одного раза"""
+        self._tick_sounds.add(name)
+
+    def flush_kills(self):
+        """Раз за тик: снимает убитых, выдаёт награды и играет звуки тика"""
+        kills = self._kill_buffer
+        if kills:
+            self._kill_buffer = []
+            self.enemies.flush()
+            self.on_enemies_killed(kills)
+        for name in self._tick_sounds:
+            self.sound_manager.play_sound(name)
+        self._tick_sounds.clear()
+
+    def on_enemies_killed(self, kills: list):
+        """Единая обработка смертей за тик: кристаллы и частицы пачкой,
+        счёт, вампиризм от суммарного добивающего урона"""
+        positions = np.array([(enemy.pos.x, enemy.pos.y) for enemy, _, _, _ in kills])
+        self.exp_gems.spawn_many(positions)
+        self.particle_system.emit_many(
+            positions, [particles for _, _, particles, _ in kills],
+            [enemy.color if color is None else color for enemy, _, _, color in kills])
+        self.kills += len(kills)
+        self.score += sum(enemy.exp_value for enemy, _, _, _ in kills)
+        self.stat_changed("kills", "score")
+        if self.player.lifesteal > 0:
+            self.player.heal(int(sum(dmg for _, dmg, _, _ in kills) * self.player.lifesteal))
+        orbital_hits = self._orbital_hit_times
+        for enemy, _, _, _ in kills:
+            orbital_hits.pop(enemy.handle, None)
+        self.tick_sound("enemy_death")
+
     def update_combat(self):
-        # Пули попадают во врагов (оптимизация: проверяем квадрат расстояния)
-        for bullet in self.bullets[:]:
+        # Пули попадают во врагов: общий индекс врагов перестраивается раз
+        # за тик, каждая пуля проверяет только врагов из соседних ячеек
+        grid = self.enemies.reindex()
+        bullets = self.bullets
+        for bi in range(len(bullets) - 1, -1, -1):
+            bullet = bullets[bi]
             hit_count = 0
             bullet_pos = bullet.pos
-            collision_dist_sq = (bullet.size * 4) ** 2  # Квадрат расстояния
             
-            for enemy in self.enemies[:]:
-                # Оптимизация: сначала проверяем квадрат расстояния (без sqrt)
+            for enemy in grid.query(bullet_pos.x, bullet_pos.y, bullet.size * 4):
+                if enemy.hp <= 0:
+                    continue  # Уже убит в этом тике (пробитие, взрыв, цепь)
+                # Узкая фаза: квадрат расстояния (без sqrt)
                 dx = bullet_pos.x - enemy.pos.x
                 dy = bullet_pos.y - enemy.pos.y
                 dist_sq = dx * dx + dy * dy
@@ -521,25 +591,9 @@ class Engine:
                 
                 if dist_sq < required_dist_sq:
                     if enemy.take_damage(bullet.dmg):
-                        self.particle_system.emit(enemy.pos, 15, enemy.color)
-                        self.exp_gems.append(pygame.Vector2(enemy.pos))
-                        if enemy in self.enemies:
-                            self.enemies.remove(enemy)
-                        self.kills += 1
-                        self.score += enemy.exp_value
-                        
-                        # Звук смерти врага (не каждый раз для оптимизации)
-                        if random.random() < 0.3:  # 30% шанс звука
-                            self.sound_manager.play_sound("enemy_death")
-                        
-                        # Вампиризм
-                        if self.player.lifesteal > 0:
-                            heal = int(bullet.dmg * self.player.lifesteal)
-                            self.player.heal(heal)
+                        self.kill_enemy(enemy, bullet.dmg)
                     else:
-                        # Звук попадания (не каждый раз)
-                        if random.random() < 0.2:  # 20% шанс звука
-                            self.sound_manager.play_sound("enemy_hit")
+                        self.tick_sound("enemy_hit")
                         
                         # ====== ПРИМЕНЕНИЕ ЭФФЕКТОВ ======
                         # Замедляющие пули
@@ -558,43 +612,28 @@ class Engine:
                         
                         # Цепная молния
                         if hasattr(self.player, 'chain_lightning') and self.player.chain_lightning > 0:
-                            chain_targets = []
-                            for other in self.enemies:
-                                if other != enemy and (other.pos - enemy.pos).length() < 300:
-                                    chain_targets.append(other)
-                            
-                            chain_targets.sort(key=lambda e: (e.pos - enemy.pos).length())
-                            for i, target in enumerate(chain_targets[:self.player.chain_lightning]):
+                            chain_targets = self.enemies.k_nearest(
+                                enemy.pos, self.player.chain_lightning, 300, exclude=enemy)
+                            for target in chain_targets:
                                 chain_dmg = int(bullet.dmg * 0.6)
                                 target.chain_lightning_target = True
                                 target.chain_lightning_timer = 500
                                 if target.take_damage(chain_dmg):
-                                    if target in self.enemies:
-                                        self.particle_system.emit(target.pos, 12, (255, 255, 100))
-                                        self.exp_gems.append(pygame.Vector2(target.pos))
-                                        self.enemies.remove(target)
-                                        self.kills += 1
-                                        self.score += target.exp_value
+                                    self.kill_enemy(target, chain_dmg, 12, (255, 255, 100))
                         
                         # Взрыв - немедленно при попадании, AOE урон
                         if hasattr(self.player, 'explosive_bullets') and self.player.explosive_bullets:
                             exp_dmg = max(6, int(bullet.dmg * 0.6))
                             exp_radius = 90
                             self.particle_system.emit(enemy.pos, 25, (255, 160, 40), (3, 12))
-                            for other in self.enemies[:]:
-                                if other != enemy and (other.pos - enemy.pos).length() < exp_radius:
-                                    if other.take_damage(exp_dmg) and other in self.enemies:
-                                        self.particle_system.emit(other.pos, 8, (255, 100, 20))
-                                        self.exp_gems.append(pygame.Vector2(other.pos))
-                                        self.enemies.remove(other)
-                                        self.kills += 1
-                                        self.score += other.exp_value
-                            self.sound_manager.play_sound("explosion")
+                            for other in self.enemies.enemies_within(enemy.pos, exp_radius, exclude=enemy):
+                                if other.take_damage(exp_dmg):
+                                    self.kill_enemy(other, exp_dmg, 8, (255, 100, 20))
+                            self.tick_sound("explosion")
                     
                     hit_count += 1
                     if hit_count > bullet.piercing:
-                        if bullet in self.bullets:
-                            self.bullets.remove(bullet)
+                        bullets.release_at(bi)
                         break
         
         # Враги атакуют игрока (оптимизация)
@@ -603,242 +642,152 @@ class Engine:
         
         # Орбитальные пули наносят урон врагам
         if hasattr(self.player, 'orbital_bullets') and self.player.orbital_bullets > 0:
-            time_ms = pygame.time.get_ticks()
+            time_ms = self.sim_time
             orbit_radius = 55
-            if not hasattr(self, '_orbital_hit_times'):
-                self._orbital_hit_times = {}
             for i in range(self.player.orbital_bullets):
-                angle = (time_ms / 1000 + i * (6.28 / self.player.orbital_bullets)) % 6.28
+                angle = (self.player.orbit_phase + i * (6.28 / self.player.orbital_bullets)) % 6.28
                 orb_pos = pygame.Vector2(
                     player_pos.x + math.cos(angle) * orbit_radius,
                     player_pos.y + math.sin(angle) * orbit_radius
                 )
-                for enemy in self.enemies[:]:
-                    if (enemy.pos - orb_pos).length() < enemy.size + 10:
-                        eid = id(enemy)
-                        last_hit = self._orbital_hit_times.get(eid, 0)
+                for enemy in grid.query(orb_pos.x, orb_pos.y, 10):
+                    if not enemy.dying and (enemy.pos - orb_pos).length() < enemy.size + 10:
+                        # По метке, а не по объекту: запись чистится в on_enemies_killed
+                        eid = enemy.handle
+                        last_hit = self._orbital_hit_times.get(eid, float("-inf"))
                         if time_ms - last_hit > 400:  # Каждые 400мс
                             self._orbital_hit_times[eid] = time_ms
                             orb_dmg = max(5, int(self.player.dmg * 0.5))
                             if enemy.take_damage(orb_dmg):
-                                self.particle_system.emit(enemy.pos, 10, enemy.color)
-                                self.exp_gems.append(pygame.Vector2(enemy.pos))
-                                if enemy in self.enemies:
-                                    self.enemies.remove(enemy)
-                                self.kills += 1
-                                self.score += enemy.exp_value
-                                self._orbital_hit_times.pop(eid, None)
-        
-        for enemy in self.enemies[:]:
-            dx = enemy.pos.x - player_pos.x
-            dy = enemy.pos.y - player_pos.y
-            dist_sq = dx * dx + dy * dy
-            required_dist_sq = (enemy.size + player_size) ** 2
-            
-            if dist_sq < required_dist_sq:
-                if self.player.take_damage(enemy.dmg):
-                    self.state = GameState.GAME_OVER
-                    # Статистика учитывается только в режиме волн
-                    count_stats = (self.game_mode == GameMode.WAVES)
-                    earned = self.save_system.update_stats(
-                        self.kills,
-                        int(self.time_survived),
-                        self.score,
-                        self.player.level,
-                        self.wave_system.current_wave,
-                        count_stats
-                    )
-                    # Проверка достижений
-                    AchievementSystem.check_achievements(self, self.save_system)
-                else:
-                    # Звук получения урона
-                    self.sound_manager.play_sound("player_hit")
-                    # Пиявка лечится при атаке игрока
-                    if getattr(enemy, 'leech_heal', 0) > 0:
-                        enemy.hp = min(enemy.max_hp, enemy.hp + enemy.leech_heal)
-                    
-                    # Шипы - урон врагу при касании
-                    thorns_dmg = getattr(self.player, 'thorns_damage', 0) + self.player.thorns
-                    if thorns_dmg > 0:
-                        if enemy.take_damage(int(thorns_dmg)):
-                            self.particle_system.emit(enemy.pos, 15, enemy.color)
-                            self.exp_gems.append(pygame.Vector2(enemy.pos))
-                            if enemy in self.enemies:
-                                self.enemies.remove(enemy)
-                            self.kills += 1
-                            self.score += enemy.exp_value
-                    
-                    # Отражение урона
-                    if hasattr(self.player, 'reflect_damage') and self.player.reflect_damage > 0:
-                        reflected = int(enemy.dmg * self.player.reflect_damage)
-                        if enemy.take_damage(reflected):
-                            self.particle_system.emit(enemy.pos, 15, enemy.color)
-                            self.exp_gems.append(pygame.Vector2(enemy.pos))
-                            if enemy in self.enemies:
-                                self.enemies.remove(enemy)
-                            self.kills += 1
-                            self.score += enemy.exp_value
+                                self.kill_enemy(enemy, orb_dmg, 10)
+        
+        # Касание: отбор пересечений одной векторной проверкой по колонкам
+        for enemy in self.enemies.touching(player_pos, player_size):
+            if self.player.take_damage(enemy.dmg):
+                self.state = GameState.GAME_OVER
+                self.flush_kills()  # Убитые в этом тике тоже идут в статистику
+                # Статистика учитывается только в режиме волн
+                count_stats = (self.game_mode == GameMode.WAVES)
+                earned = self.save_system.update_stats(
+                    self.kills,
+                    int(self.time_survived),
+                    self.score,
+                    self.player.level,
+                    self.wave_system.current_wave,
+                    count_stats
+                )
+                # Проверка достижений
+                AchievementSystem.check_achievements(self, self.save_system)
+            else:
+                # Звук получения урона
+                self.sound_manager.play_sound("player_hit")
+                # Пиявка лечится при атаке игрока
+                if enemy.leech_heal > 0:
+                    enemy.hp = min(enemy.max_hp, enemy.hp + enemy.leech_heal)
                 
-                self.particle_system.emit(self.player.pos, 10, COLORS["health"])
+                # Шипы - урон врагу при касании
+                thorns_dmg = getattr(self.player, 'thorns_damage', 0) + self.player.thorns
+                if thorns_dmg > 0:
+                    if enemy.take_damage(int(thorns_dmg)):
+                        self.kill_enemy(enemy, int(thorns_dmg))
+                
+                # Отражение урона
+                if hasattr(self.player, 'reflect_damage') and self.player.reflect_damage > 0:
+                    reflected = int(enemy.dmg * self.player.reflect_damage)
+                    if enemy.take_damage(reflected):
+                        self.kill_enemy(enemy, reflected)
+            
+            self.particle_system.emit(self.player.pos, 10, COLORS["health"])
         
         # ---- Обновление снарядов врагов ----
-        if not hasattr(self, 'enemy_bullets'):
-            self.enemy_bullets = []
-        now_ms = pygame.time.get_ticks()
-        
-        # Стрельба дальнобойных врагов
-        for enemy in self.enemies:
-            if enemy.type == "ranger":
-                if getattr(enemy, 'shoot_cooldown', 0) <= 0:
-                    d = self.player.pos - enemy.pos
-                    if d.length() < 600:
-                        shots = 3 if getattr(enemy, 'triple_shot', False) else 1
-                        # Slight lead on player
-                        bullet_spd = 5
-                        travel_time = d.length() / (bullet_spd * 60)
-                        predicted = self.player.pos + self.player.velocity * travel_time * 60 * 0.35
-                        aim_dir = predicted - enemy.pos
-                        if aim_dir.length() == 0:
+        now_ms = self.sim_time
+        
+        # Стрельба дальнобойных и ауры поддержки — по флагам архетипа
+        player_pos = self.player.pos
+        for enemy in self.enemies.with_behaviour(Behaviour.RANGED | Behaviour.SUPPORT):
+            arch = enemy.arch
+            flags = arch.flags
+            if flags & Behaviour.RANGED:
+                if enemy.shoot_cooldown <= 0:
+                    shot = arch.shot
+                    d = player_pos - enemy.pos
+                    if d.length() < shot.range:
+                        if shot.lead:
+                            # Упреждение: предсказываем позицию игрока
+                            travel_time = d.length() / (shot.speed * 60)
+                            aim_dir = player_pos + self.player.velocity * travel_time * 60 * shot.lead - enemy.pos
+                            if aim_dir.length() == 0:
+                                aim_dir = d
+                        else:
                             aim_dir = d
+                        shots = shot.empowered_volley if enemy.empowered else 1
                         for si in range(shots):
                             angle_off = (si - shots // 2) * 12
-                            spd_vec = pygame.Vector2(aim_dir).normalize().rotate(angle_off) * bullet_spd
-                            self.enemy_bullets.append({
-                                'pos': pygame.Vector2(enemy.pos), 'vel': spd_vec,
-                                'dmg': enemy.dmg, 'birth': now_ms, 'lifetime': 2500,
-                                'color': enemy.color, 'size': 7, 'type': 'ranger'
-                            })
-                    enemy.shoot_cooldown = enemy.shoot_interval
-            elif enemy.type == "sniper":
-                if getattr(enemy, 'shoot_cooldown', 0) <= 0:
-                    d = self.player.pos - enemy.pos
-                    if d.length() < 700:
-                        # Упреждение: предсказываем позицию игрока
-                        bullet_speed_val = 8
-                        travel_time = d.length() / (bullet_speed_val * 60)
-                        predicted_pos = self.player.pos + self.player.velocity * travel_time * 60 * 0.6
-                        aim_dir = predicted_pos - enemy.pos
-                        if aim_dir.length() > 0:
-                            spd_vec = aim_dir.normalize() * bullet_speed_val
-                        else:
-                            spd_vec = pygame.Vector2(d).normalize() * bullet_speed_val
-                        self.enemy_bullets.append({
-                            'pos': pygame.Vector2(enemy.pos), 'vel': spd_vec,
-                            'dmg': enemy.dmg, 'birth': now_ms, 'lifetime': 2000,
-                            'color': enemy.color, 'size': 8, 'type': 'sniper',
-                            'armor_pierce': getattr(enemy, 'armor_pierce', False)
-                        })
-                    enemy.shoot_cooldown = enemy.shoot_interval
-            elif enemy.type == "lancer":
-                if getattr(enemy, 'shoot_cooldown', 0) <= 0:
-                    d = self.player.pos - enemy.pos
-                    if d.length() < 600:
-                        spd_vec = pygame.Vector2(d).normalize() * 6
-                        self.enemy_bullets.append({
-                            'pos': pygame.Vector2(enemy.pos), 'vel': spd_vec,
-                            'dmg': enemy.dmg, 'birth': now_ms, 'lifetime': 2000,
-                            'color': enemy.color, 'size': 6, 'type': 'lancer',
-                            'piercing': True
-                        })
-                    enemy.shoot_cooldown = enemy.shoot_interval
-            elif enemy.type == "mortar":
-                if getattr(enemy, 'shoot_cooldown', 0) <= 0:
-                    d = self.player.pos - enemy.pos
-                    if d.length() < 700:
-                        # Мортира стреляет слегка заупреждённо
-                        spd = pygame.Vector2(d).normalize() * 3.5
-                        self.enemy_bullets.append({
-                            'pos': pygame.Vector2(enemy.pos), 'vel': spd,
-                            'dmg': enemy.dmg, 'birth': now_ms, 'lifetime': 2000,
-                            'color': (255, 140, 0), 'size': 12, 'type': 'mortar',
-                            'target': pygame.Vector2(self.player.pos)
-                        })
-                    enemy.shoot_cooldown = enemy.shoot_interval
-            elif enemy.type == "shielder":
-                # Наделяет временным щитом ближних врагов
-                if getattr(enemy, 'aura_timer', 0) <= 0:
-                    enemy.aura_timer = 1500  # каждые 1.5 сек
-                    aura_r = getattr(enemy, 'aura_radius', 200)
-                    for ally in self.enemies:
-                        if ally is not enemy and ally.type != "shielder":
-                            if (ally.pos - enemy.pos).length() < aura_r:
-                                # Мини-щит: уменьшает следующий урон
-                                ally.shield_buff = min(getattr(ally, 'shield_buff', 0) + 25, 100)
-            elif enemy.type == "healer":
-                # Лечит союзников вокруг
-                if getattr(enemy, 'heal_timer', 0) <= 0:
-                    enemy.heal_timer = enemy.heal_interval
-                    heal_r = getattr(enemy, 'heal_radius', 200)
-                    for ally in self.enemies:
-                        if ally is not enemy:
-                            if (ally.pos - enemy.pos).length() < heal_r:
-                                ally.hp = min(ally.max_hp, ally.hp + enemy.heal_amount)
-            elif enemy.type == "buffer":
-                # Даёт союзникам ускорение и бонус урона
-                if getattr(enemy, 'buff_timer', 0) <= 0:
-                    enemy.buff_timer = enemy.buff_interval
-                    buff_r = getattr(enemy, 'buff_radius', 180)
-                    for ally in self.enemies:
-                        if ally is not enemy:
-                            if (ally.pos - enemy.pos).length() < buff_r:
-                                ally.speed_buff_timer = 2000
-                                # Временно увеличиваем скорость
-                                if not hasattr(ally, '_base_speed_saved'):
-                                    ally._base_speed_saved = ally.speed
-                                ally.speed = ally._base_speed_saved * 1.4
-        
-        # Обновление и проверка попаданий снарядов врагов
-        for eb in self.enemy_bullets[:]:
-            eb['pos'] += eb['vel']
-            age = now_ms - eb['birth']
-            if age > eb['lifetime']:
-                self.enemy_bullets.remove(eb)
-                # Мортира: взрыв при истечении времени в целевой точке
-                if eb['type'] == 'mortar':
-                    target = eb.get('target', eb['pos'])
-                    exp_r = 120
-                    self.particle_system.emit(target, 30, (255, 140, 0), (3, 10))
-                    if (self.player.pos - target).length() < exp_r:
-                        if self.player.take_damage(eb['dmg']):
-                            self.state = GameState.GAME_OVER
-                continue
-            # Обычное попадание в игрока
-            dp = self.player.pos - eb['pos']
-            if dp.length() < self.player.size + eb['size']:
-                if eb['type'] != 'mortar':  # Мортира взрывается по таймеру
-                    # Снайпер пробивает неуязвимость
-                    if eb.get('armor_pierce') and self.player.invulnerable > 0:
-                        self.player.hp -= eb['dmg']
-                        self.player.hit_flash = 200
-                        if self.player.hp <= 0:
-                            self.state = GameState.GAME_OVER
-                    elif self.player.take_damage(eb['dmg']):
-                        self.state = GameState.GAME_OVER
-                    else:
-                        self.particle_system.emit(self.player.pos, 6, eb['color'])
-                    self.enemy_bullets.remove(eb)
+                            spd_vec = pygame.Vector2(aim_dir).normalize().rotate(angle_off) * shot.speed
+                            self.enemy_bullets.spawn(
+                                enemy.pos, spd_vec, enemy.dmg, now_ms, shot.lifetime,
+                                shot.color or enemy.color, shot.size,
+                                target=player_pos if shot.lobbed else None,
+                                armor_pierce=enemy.empowered and shot.empowered_armor_pierce
+                            )
+                    enemy.shoot_cooldown = arch.shoot_interval
+            elif flags & Behaviour.SUPPORT:
+                if enemy.aura_timer <= 0:
+                    enemy.aura_timer = arch.aura_interval
+                    for ally in self.enemies.allies_within(enemy, arch.aura_radius):
+                        if flags & Behaviour.SHIELDER:
+                            # Мини-щит: уменьшает следующий урон (щитоносцам не даётся)
+                            if not ally.arch.flags & Behaviour.SHIELDER:
+                                ally.shield_buff = min(ally.shield_buff + 25, 100)
+                        elif flags & Behaviour.HEALER:
+                            ally.hp = min(ally.max_hp, ally.hp + enemy.heal_amount)
+                        elif flags & Behaviour.BUFFER:
+                            ally.speed_buff_timer = 2000
+                            # Временно увеличиваем скорость
+                            if ally._base_speed_saved is None:
+                                ally._base_speed_saved = ally.speed
+                            ally.speed = ally._base_speed_saved * 1.4
+        
+        # Снаряды врагов: сдвиг, истечение и попадания — векторно
+        detonations, hits = self.enemy_bullets.update(self.dt, now_ms, self.player.pos, self.player.size)
+        # Мортира: взрыв при истечении времени в целевой точке
+        for tx, ty, dmg in detonations:
+            target = pygame.Vector2(tx, ty)
+            exp_r = 120
+            self.particle_system.emit(target, 30, (255, 140, 0), (3, 10))
+            if (self.player.pos - target).length() < exp_r:
+                if self.player.take_damage(dmg):
+                    self.state = GameState.GAME_OVER
+        # Обычное попадание в игрока
+        for dmg, armor_pierce, color in hits:
+            # Снайпер пробивает неуязвимость
+            if armor_pierce and self.player.invulnerable > 0:
+                self.player.hp -= dmg
+                self.player.hit_flash = 200
+                if self.player.hp <= 0:
+                    self.state = GameState.GAME_OVER
+            elif self.player.take_damage(dmg):
+                self.state = GameState.GAME_OVER
+            else:
+                self.particle_system.emit(self.player.pos, 6, color)
     
     def update_exp_gems(self):
         """Обновление и притяжение кристаллов опыта"""
         magnet_radius = getattr(self.player, 'exp_magnet_radius', 100)
-        for gem in self.exp_gems[:]:
-            to_player = self.player.pos - gem
-            if to_player.length() < magnet_radius:
-                pull_speed = 8 + (1 - to_player.length() / magnet_radius) * 12
-                gem += to_player.normalize() * pull_speed
-            if to_player.length() < 20:
-                self.exp_gems.remove(gem)
-                exp_gain = 10
-                if hasattr(self.player, 'exp_multiplier'):
-                    exp_gain = int(exp_gain * self.player.exp_multiplier)
-                self.player.exp += exp_gain
-                if self.player.exp >= self.player.exp_to_next:
-                    self.player.level += 1
-                    self.player.exp = 0
-                    self.player.exp_to_next = int(self.player.exp_to_next * 1.2)
-                    self.state = GameState.LEVEL_UP
-                    self.level_up_click_handled = True
-                    self.sound_manager.play_sound("level_up")
+        collected = self.exp_gems.update(self.player.pos, magnet_radius, self.dt)
+        exp_gain = 10
+        if hasattr(self.player, 'exp_multiplier'):
+            exp_gain = int(exp_gain * self.player.exp_multiplier)
+        for _ in range(collected):
+            self.player.exp += exp_gain
+            if self.player.exp >= self.player.exp_to_next:
+                self.player.level += 1
+                self.stat_changed("level")
+                self.player.exp = 0
+                self.player.exp_to_next = int(self.player.exp_to_next * 1.2)
+                self.state = GameState.LEVEL_UP
+                self.level_up_click_handled = True
+                self.sound_manager.play_sound("level_up")
 
     def update_wave_system(self):
         # Проверяем окончание волны
@@ -853,37 +802,51 @@ class Engine:
             if self.wave_system.update_break(self.dt):
                 self._miniboss_spawned_this_wave = False
                 self.wave_system.start_wave()
+                self.stat_changed("wave")
     
-    def draw_background(self):
-        # Dark base fill
-        screen.fill((8, 10, 20))
+    BG_GRID = 80  # Шаг сетки фона в мировых единицах
+    
+    def _background_tile(self) -> pygame.Surface:
+        """Заливка, линии и точки сетки, отрисованные один раз.
+
+        Плитка больше экрана на клетку с запасом и периодична с шагом
+        BG_GRID, поэтому её достаточно сдвинуть на смещение камеры по
+        модулю шага.
+        """
+        if self._bg_tile is None or self._bg_tile_size != (WIDTH, HEIGHT):
+            GRID = self.BG_GRID
+            self._bg_tile_size = (WIDTH, HEIGHT)
+            tile_w = (WIDTH // GRID + 2) * GRID
+            tile_h = (HEIGHT // GRID + 2) * GRID
+            tile = pygame.Surface((tile_w, tile_h))
+            tile.fill((8, 10, 20))
+            line_col = (18, 22, 38)
+            for x in range(0, tile_w, GRID):
+                pygame.draw.line(tile, line_col, (x, 0), (x, tile_h), 1)
+            for y in range(0, tile_h, GRID):
+                pygame.draw.line(tile, line_col, (0, y), (tile_w, y), 1)
+            # Dots at every grid intersection
+            dot_col = (32, 40, 65)
+            for x in range(0, tile_w, GRID):
+                for y in range(0, tile_h, GRID):
+                    pygame.draw.circle(tile, dot_col, (x, y), 2)
+            self._bg_tile = tile
+        return self._bg_tile
+    
+    def draw_background(self, cam: pygame.Vector2 = None):
+        if cam is None:
+            cam = self.cam
+        GRID = self.BG_GRID
+        # Camera offset (how much world has scrolled)
+        off_x = int(cam.x) % GRID
+        off_y = int(cam.y) % GRID
+        screen.blit(self._background_tile(), (off_x - GRID, off_y - GRID))
         
+        # Every 4th intersection: glowing accent dot (пульсирует — рисуется поверх плитки)
         time_ms = pygame.time.get_ticks()
-        
-        # Grid spacing in world units
-        GRID = 80
-        # Camera offset (how much world has scrolled)
-        off_x = int(self.cam.x) % GRID
-        off_y = int(self.cam.y) % GRID
-        
-        line_col = (18, 22, 38)
-        # Vertical lines
-        for x in range(-GRID + off_x, WIDTH + GRID, GRID):
-            pygame.draw.line(screen, line_col, (x, 0), (x, HEIGHT), 1)
-        # Horizontal lines
-        for y in range(-GRID + off_y, HEIGHT + GRID, GRID):
-            pygame.draw.line(screen, line_col, (0, y), (WIDTH, y), 1)
-        
-        # Dots at every grid intersection
-        dot_col = (32, 40, 65)
-        for x in range(-GRID + off_x, WIDTH + GRID, GRID):
-            for y in range(-GRID + off_y, HEIGHT + GRID, GRID):
-                pygame.draw.circle(screen, dot_col, (x, y), 2)
-        
-        # Every 4th intersection: glowing accent dot
         GRID4 = GRID * 4
-        off4_x = int(self.cam.x) % GRID4
-        off4_y = int(self.cam.y) % GRID4
+        off4_x = int(cam.x) % GRID4
+        off4_y = int(cam.y) % GRID4
         pulse = abs(math.sin(time_ms / 1800)) * 0.5 + 0.5
         accent = (int(20 + 30 * pulse), int(35 + 50 * pulse), int(70 + 80 * pulse))
         for x in range(-GRID4 + off4_x, WIDTH + GRID4, GRID4):
@@ -908,23 +871,17 @@ class Engine:
         # HP заполнение с градиентом
         hp_w = int((self.player.hp / self.player.max_hp) * bar_w)
         if hp_w > 0:
-            hp_rect = pygame.Rect(bar_x, bar_y, hp_w, bar_h)
-            # Градиент от темно-красного к яркому
-            for i in range(hp_w):
-                progress = i / bar_w
-                r = int(200 + (255 - 200) * progress)
-                g = int(60 + (80 - 60) * progress)
-                b = int(60 + (80 - 60) * progress)
-                pygame.draw.line(screen, (r, g, b), 
-                               (bar_x + i, bar_y + 2), 
-                               (bar_x + i, bar_y + bar_h - 2))
+            # Градиент от темно-красного к яркому: полоса на всю ширину,
+            # видна только заполненная часть
+            grad = self._gradient(bar_w, bar_h - 3, (200, 60, 60), (255, 80, 80), horizontal=True)
+            screen.blit(grad, (bar_x, bar_y + 2), (0, 0, hp_w, bar_h - 3))
             pygame.draw.rect(screen, COLORS["health"], (bar_x, bar_y, hp_w, bar_h), 3, border_radius=8)
         
         # Обводка
         pygame.draw.rect(screen, COLORS["card_border"], (bar_x, bar_y, bar_w, bar_h), 2, border_radius=8)
         
         # Текст HP
-        hp_text = self.font_small.render(f"HP: {int(self.player.hp)} / {self.player.max_hp}", 
+        hp_text = render_text(self.font_small, f"HP: {int(self.player.hp)} / {self.player.max_hp}", 
                                          True, COLORS["ui"])
         screen.blit(hp_text, (bar_x + bar_w // 2 - hp_text.get_width() // 2, bar_y + 7))
         
@@ -946,25 +903,19 @@ class Engine:
         exp_w = int((self.player.exp / self.player.exp_to_next) * bar_w)
         if exp_w > 0:
             # Градиент для опыта
-            for i in range(exp_w):
-                progress = i / bar_w
-                r = int(0 + (0 - 0) * progress)
-                g = int(180 + (220 - 180) * progress)
-                b = int(230 + (255 - 230) * progress)
-                pygame.draw.line(screen, (r, g, b), 
-                               (bar_x + i, current_y + 2), 
-                               (bar_x + i, current_y + exp_h - 2))
+            grad = self._gradient(bar_w, exp_h - 3, (0, 180, 230), (0, 220, 255), horizontal=True)
+            screen.blit(grad, (bar_x, current_y + 2), (0, 0, exp_w, exp_h - 3))
             pygame.draw.rect(screen, COLORS["exp"], (bar_x, current_y, exp_w, exp_h), 3, border_radius=7)
         
         pygame.draw.rect(screen, COLORS["card_border"], (bar_x, current_y, bar_w, exp_h), 2, border_radius=7)
         
         # Процентный индикатор опыта
         exp_percent = int((self.player.exp / self.player.exp_to_next) * 100)
-        exp_text = self.font_small.render(f"EXP: {exp_percent}%", True, COLORS["ui"])
+        exp_text = render_text(self.font_small, f"EXP: {exp_percent}%", True, COLORS["ui"])
         screen.blit(exp_text, (bar_x + bar_w // 2 - exp_text.get_width() // 2, current_y + 5))
         
         # Уровень справа от бара
-        lvl_text = self.font_medium.render(f"LVL {self.player.level}", True, COLORS["player"])
+        lvl_text = render_text(self.font_medium, f"LVL {self.player.level}", True, COLORS["player"])
         screen.blit(lvl_text, (bar_x + bar_w + 20, current_y - 5))
         
         current_y += exp_h + 12
@@ -983,8 +934,8 @@ class Engine:
         stat_bg = pygame.Rect(bar_x, current_y, bar_w, stat_h)
         pygame.draw.rect(screen, (25, 30, 45), stat_bg, border_radius=6)
         pygame.draw.rect(screen, COLORS["card_border"], stat_bg, 1, border_radius=6)
-        stats_text1 = self.font_tiny.render(line1, True, (180, 180, 200))
-        stats_text2 = self.font_tiny.render(line2, True, (180, 180, 200))
+        stats_text1 = render_text(self.font_tiny, line1, True, (180, 180, 200))
+        stats_text2 = render_text(self.font_tiny, line2, True, (180, 180, 200))
         screen.blit(stats_text1, (bar_x + bar_w//2 - stats_text1.get_width()//2, current_y + 6))
         screen.blit(stats_text2, (bar_x + bar_w//2 - stats_text2.get_width()//2, current_y + 27))
         
@@ -997,18 +948,18 @@ class Engine:
         if self.game_mode == GameMode.WAVES:
             if not self.wave_system.wave_active:
                 pygame.draw.rect(screen, COLORS["warning"], wave_bg, 2, border_radius=10)
-                wt = self.font_small.render(
+                wt = render_text(self.font_small, 
                     f"Волна {self.wave_system.current_wave} | Перерыв: {int(self.wave_system.wave_break_time)}с",
                     True, COLORS["warning"])
             else:
                 remaining = max(0, (self.wave_system.enemies_in_wave - self.wave_system.enemies_spawned) + len(self.enemies))
                 pygame.draw.rect(screen, COLORS["player"], wave_bg, 2, border_radius=10)
-                wt = self.font_small.render(
+                wt = render_text(self.font_small, 
                     f"Волна {self.wave_system.current_wave}  |  Врагов: {remaining}",
                     True, COLORS["ui"])
         else:
             pygame.draw.rect(screen, COLORS["exp"], wave_bg, 2, border_radius=10)
-            wt = self.font_small.render(f"БЕСКОНЕЧНЫЙ  |  Врагов: {len(self.enemies)}", True, COLORS["exp"])
+            wt = render_text(self.font_small, f"БЕСКОНЕЧНЫЙ  |  Врагов: {len(self.enemies)}", True, COLORS["exp"])
         
         screen.blit(wt, wt.get_rect(center=wave_bg.center))
         
@@ -1023,12 +974,12 @@ class Engine:
         if self.player.dash_ready:
             pygame.draw.rect(screen, (40, 50, 65), dash_bg, border_radius=10)
             pygame.draw.rect(screen, COLORS["player"], dash_bg, 3, border_radius=10)
-            dash_text = self.font_small.render("DASH ГОТОВ", True, COLORS["player"])
+            dash_text = render_text(self.font_small, "DASH ГОТОВ", True, COLORS["player"])
         else:
             pygame.draw.rect(screen, (30, 35, 45), dash_bg, border_radius=10)
             pygame.draw.rect(screen, (80, 80, 90), dash_bg, 2, border_radius=10)
             cooldown = max(0, self.player.dash_cooldown / 1000)
-            dash_text = self.font_small.render(f"DASH: {cooldown:.1f}s", True, (120, 120, 130))
+            dash_text = render_text(self.font_small, f"DASH: {cooldown:.1f}s", True, (120, 120, 130))
         
         dash_rect = dash_text.get_rect(center=dash_bg.center)
         screen.blit(dash_text, dash_rect)
@@ -1049,12 +1000,12 @@ class Engine:
             if self.ability_cooldown <= 0:
                 pygame.draw.rect(screen, (35, 45, 60), ab_bg, border_radius=10)
                 pygame.draw.rect(screen, ab_col, ab_bg, 2, border_radius=10)
-                at = self.font_tiny.render(AB_NAMES[active_ab], True, ab_col)
+                at = render_text(self.font_tiny, AB_NAMES[active_ab], True, ab_col)
             else:
                 pygame.draw.rect(screen, (25, 30, 42), ab_bg, border_radius=10)
                 pygame.draw.rect(screen, (70, 70, 85), ab_bg, 2, border_radius=10)
                 cd_sec = self.ability_cooldown / 1000
-                at = self.font_tiny.render(f"КД: {cd_sec:.1f}s", True, (130,130,145))
+                at = render_text(self.font_tiny, f"КД: {cd_sec:.1f}s", True, (130,130,145))
                 # Cooldown fill bar
                 ab_kd_map = {"dash_boost":0,"shield_pulse":6000,"time_slow":12000,"overdrive":15000,"nuke":20000,
                              "heal_pulse":18000,"bullet_storm":10000}
@@ -1086,13 +1037,7 @@ class Engine:
     
     def draw_main_menu(self):
         # Улучшенный градиентный фон с более плавными переходами
-        for i in range(HEIGHT):
-            progress = i / HEIGHT
-            # Более темный и атмосферный градиент
-            r = int(5 + (15 - 5) * progress)
-            g = int(8 + (20 - 8) * progress)
-            b = int(18 + (35 - 18) * progress)
-            pygame.draw.line(screen, (r, g, b), (0, i), (WIDTH, i))
+        screen.blit(self._gradient(WIDTH, HEIGHT, (5, 8, 18), (15, 20, 35)), (0, 0))
         
         # Анимированные декоративные линии
         time_offset = pygame.time.get_ticks() // 50
@@ -1128,22 +1073,17 @@ class Engine:
             screen.blit(surf, (int(particle['x']), int(particle['y'])))
         
         # Заголовок с усиленным эффектом свечения
-        title = self.font_huge.render("CYBER SURVIVOR", True, COLORS["player"])
+        title = render_text(self.font_huge, "CYBER SURVIVOR", True, COLORS["player"])
         title_rect = title.get_rect(center=(WIDTH // 2, HEIGHT // 6))
         
         # Многослойное свечение заголовка
-        glow_surf = pygame.Surface((title_rect.width + 60, title_rect.height + 60), pygame.SRCALPHA)
-        for i in range(5):
-            alpha = 40 - i * 8
-            offset = i * 3
-            glow_title = self.font_huge.render("CYBER SURVIVOR", True, (*COLORS["player_glow"], alpha))
-            glow_surf.blit(glow_title, (30 + offset, 30 + offset))
+        glow_surf = render_glow_text(self.font_huge, "CYBER SURVIVOR", COLORS["player_glow"], 5, 40, 8, 3, 30)
         screen.blit(glow_surf, (title_rect.x - 30, title_rect.y - 30))
         screen.blit(title, title_rect)
         
         # Анимированный подзаголовок
         pulse = abs(math.sin(self.menu_time * 2)) * 30 + 200
-        subtitle = self.font_small.render("v4.3 - Обновление интерфейса. Новые враги и способности", True, (int(pulse), int(pulse), 255))
+        subtitle = render_text(self.font_small, "v4.3 - Обновление интерфейса. Новые враги и способности", True, (int(pulse), int(pulse), 255))
         subtitle_rect = subtitle.get_rect(center=(WIDTH // 2, HEIGHT // 6 + 70))
         screen.blit(subtitle, subtitle_rect)
         
@@ -1220,7 +1160,7 @@ class Engine:
             
             if not self.draw_icon(btn_data["action"], icon_cx, icon_cy, 36):
                 # Fallback на символ
-                icon_text = self.font_medium.render(btn_data.get("icon", ">"), True, title_color)
+                icon_text = render_text(self.font_medium, btn_data.get("icon", ">"), True, title_color)
                 icon_rect = icon_text.get_rect(center=(icon_cx, icon_cy))
                 screen.blit(icon_text, icon_rect)
             
@@ -1232,10 +1172,10 @@ class Engine:
             
             # Текст названия и описания справа от иконки
             text_x = sep_x + 18
-            button_text = self.font_medium.render(btn_data["text"], True, title_color)
+            button_text = render_text(self.font_medium, btn_data["text"], True, title_color)
             screen.blit(button_text, (text_x, card_rect.centery - button_text.get_height() - 2))
             
-            desc_text = self.font_tiny.render(btn_data["desc"], True, (150, 155, 175))
+            desc_text = render_text(self.font_tiny, btn_data["desc"], True, (150, 155, 175))
             screen.blit(desc_text, (text_x, card_rect.centery + 4))
             
             if is_hover and mouse_clicked:
@@ -1258,6 +1198,9 @@ class Engine:
                 elif btn_data["action"] == "knowledge":
                     self.menu_page = "knowledge"
                 elif btn_data["action"] == "quit":
+                    if self.recorder is not None:
+                        self.finish_recording()
+                    self.save_system.flush()
                     pygame.quit()
                     sys.exit()
                 pygame.time.delay(200)
@@ -1267,24 +1210,14 @@ class Engine:
     def draw_mode_select(self):
         """Экран выбора режима игры"""
         # Тот же красивый фон что и в главном меню
-        for i in range(HEIGHT):
-            progress = i / HEIGHT
-            r = int(5 + (15 - 5) * progress)
-            g = int(8 + (20 - 8) * progress)
-            b = int(18 + (35 - 18) * progress)
-            pygame.draw.line(screen, (r, g, b), (0, i), (WIDTH, i))
+        screen.blit(self._gradient(WIDTH, HEIGHT, (5, 8, 18), (15, 20, 35)), (0, 0))
         
         # Заголовок
-        title = self.font_huge.render("ВЫБОР РЕЖИМА", True, COLORS["player"])
+        title = render_text(self.font_huge, "ВЫБОР РЕЖИМА", True, COLORS["player"])
         title_rect = title.get_rect(center=(WIDTH // 2, HEIGHT // 4))
         
         # Свечение заголовка
-        glow_surf = pygame.Surface((title_rect.width + 60, title_rect.height + 60), pygame.SRCALPHA)
-        for i in range(5):
-            alpha = 40 - i * 8
-            offset = i * 3
-            glow_title = self.font_huge.render("ВЫБОР РЕЖИМА", True, (*COLORS["player_glow"], alpha))
-            glow_surf.blit(glow_title, (30 + offset, 30 + offset))
+        glow_surf = render_glow_text(self.font_huge, "ВЫБОР РЕЖИМА", COLORS["player_glow"], 5, 40, 8, 3, 30)
         screen.blit(glow_surf, (title_rect.x - 30, title_rect.y - 30))
         screen.blit(title, title_rect)
         
@@ -1355,24 +1288,24 @@ class Engine:
             pygame.draw.rect(screen, border_color, card_rect, border_width, border_radius=20)
             
             # Иконка режима
-            icon_text = self.font_huge.render(mode_data["icon"], True, COLORS["player"])
+            icon_text = render_text(self.font_huge, mode_data["icon"], True, COLORS["player"])
             icon_rect = icon_text.get_rect(center=(card_rect.centerx, card_rect.y + 80))
             screen.blit(icon_text, icon_rect)
             
             # Название режима
-            title_text = self.font_large.render(mode_data["title"], True, COLORS["player"] if is_hover else COLORS["ui"])
+            title_text = render_text(self.font_large, mode_data["title"], True, COLORS["player"] if is_hover else COLORS["ui"])
             title_rect = title_text.get_rect(center=(card_rect.centerx, card_rect.y + 160))
             screen.blit(title_text, title_rect)
             
             # Описание
-            desc_text = self.font_small.render(mode_data["desc"], True, (180, 180, 200))
+            desc_text = render_text(self.font_small, mode_data["desc"], True, (180, 180, 200))
             desc_rect = desc_text.get_rect(center=(card_rect.centerx, card_rect.y + 200))
             screen.blit(desc_text, desc_rect)
             
             # Особенности режима
             feature_y = card_rect.y + 240
             for feature in mode_data["features"]:
-                feature_text = self.font_tiny.render(f"- {feature}", True, (150, 150, 170))
+                feature_text = render_text(self.font_tiny, f"- {feature}", True, (150, 150, 170))
                 screen.blit(feature_text, (card_rect.x + 30, feature_y))
                 feature_y += 25
             
@@ -1390,7 +1323,7 @@ class Engine:
         color = COLORS["player"] if is_hover_back else COLORS["card_border"]
         pygame.draw.rect(screen, color, back_rect, 3, border_radius=8)
         
-        text = self.font_small.render("НАЗАД", True, COLORS["player"])
+        text = render_text(self.font_small, "НАЗАД", True, COLORS["player"])
         text_rect = text.get_rect(center=back_rect.center)
         screen.blit(text, text_rect)
         
@@ -1439,7 +1372,7 @@ class Engine:
             pygame.draw.rect(screen, (40, 50, 70), card_rect, border_radius=12)
             pygame.draw.rect(screen, color, card_rect, 2, border_radius=12)
             
-            label_text = self.font_medium.render(label, True, COLORS["ui"])
+            label_text = render_text(self.font_medium, label, True, COLORS["ui"])
             screen.blit(label_text, (card_rect.x + 30, card_rect.centery - label_text.get_height() // 2))
             
             value_card_w = 200
@@ -1450,7 +1383,7 @@ class Engine:
             pygame.draw.rect(screen, (55, 65, 85), value_card_rect, border_radius=10)
             pygame.draw.rect(screen, color, value_card_rect, 2, border_radius=10)
             
-            value_text = self.font_medium.render(value, True, color)
+            value_text = render_text(self.font_medium, value, True, color)
             screen.blit(value_text, value_text.get_rect(center=value_card_rect.center))
             
             y += card_h + gap
@@ -1468,10 +1401,10 @@ class Engine:
         icon_x = reset_button_rect.x + 28
         icon_y_c = reset_button_rect.centery
         if not self.draw_icon("reset", icon_x, icon_y_c, 28):
-            sym = self.font_small.render("X", True, COLORS["enemy"])
+            sym = render_text(self.font_small, "X", True, COLORS["enemy"])
             screen.blit(sym, (icon_x - sym.get_width()//2, icon_y_c - sym.get_height()//2))
         
-        reset_text = self.font_small.render("СБРОСИТЬ", True, COLORS["enemy"])
+        reset_text = render_text(self.font_small, "СБРОСИТЬ", True, COLORS["enemy"])
         screen.blit(reset_text, (reset_button_rect.x + 52, icon_y_c - reset_text.get_height()//2))
         
         if reset_hover and pygame.mouse.get_pressed()[0] and not self.show_stats_reset_confirmation:
@@ -1492,7 +1425,7 @@ class Engine:
             pygame.draw.rect(screen, (35, 20, 20), dialog_rect, border_radius=15)
             pygame.draw.rect(screen, COLORS["enemy"], dialog_rect, 3, border_radius=15)
             
-            warn_title = self.font_large.render("ПОЛНЫЙ СБРОС ПРОГРЕССА", True, COLORS["enemy"])
+            warn_title = render_text(self.font_large, "ПОЛНЫЙ СБРОС ПРОГРЕССА", True, COLORS["enemy"])
             screen.blit(warn_title, warn_title.get_rect(center=(WIDTH // 2, dialog_y + 58)))
             
             for li, line in enumerate([
@@ -1504,7 +1437,7 @@ class Engine:
                 "Это действие НЕЛЬЗЯ отменить!"
             ]):
                 col = COLORS["enemy"] if li in (0, 5) else (210, 210, 230)
-                t = self.font_small.render(line, True, col)
+                t = render_text(self.font_small, line, True, col)
                 screen.blit(t, t.get_rect(center=(WIDTH // 2, dialog_y + 115 + li * 32)))
             
             btn_y = dialog_y + dialog_h - 80
@@ -1514,14 +1447,14 @@ class Engine:
             yes_hover = yes_rect.collidepoint(mouse_pos)
             pygame.draw.rect(screen, (180, 40, 40) if yes_hover else (130, 30, 30), yes_rect, border_radius=10)
             pygame.draw.rect(screen, COLORS["enemy"], yes_rect, 3, border_radius=10)
-            yt = self.font_medium.render("СБРОСИТЬ", True, (255, 255, 255))
+            yt = render_text(self.font_medium, "СБРОСИТЬ", True, (255, 255, 255))
             screen.blit(yt, yt.get_rect(center=yes_rect.center))
             
             no_rect = pygame.Rect(dialog_x + dialog_w - 80 - btn_w, btn_y, btn_w, btn_h)
             no_hover = no_rect.collidepoint(mouse_pos)
             pygame.draw.rect(screen, (45, 55, 75) if no_hover else (35, 42, 60), no_rect, border_radius=10)
             pygame.draw.rect(screen, COLORS["player"], no_rect, 3, border_radius=10)
-            nt = self.font_medium.render("ОТМЕНА", True, COLORS["ui"])
+            nt = render_text(self.font_medium, "ОТМЕНА", True, COLORS["ui"])
             screen.blit(nt, nt.get_rect(center=no_rect.center))
             
             if yes_hover and pygame.mouse.get_pressed()[0]:
@@ -1604,7 +1537,7 @@ class Engine:
         # === СЕКЦИЯ УПРАВЛЕНИЯ ===
         sec_bg = pygame.Rect(10, y, inner_w, 40)
         pygame.draw.rect(scroll_surface, (35, 45, 60), sec_bg, border_radius=8)
-        sec_t = self.font_medium.render("УПРАВЛЕНИЕ", True, COLORS["player"])
+        sec_t = render_text(self.font_medium, "УПРАВЛЕНИЕ", True, COLORS["player"])
         scroll_surface.blit(sec_t, (20, y + 8))
         y += 50
         
@@ -1624,7 +1557,7 @@ class Engine:
             pygame.draw.rect(scroll_surface, (40, 50, 70), card_rect, border_radius=10)
             pygame.draw.rect(scroll_surface, COLORS["card_border"], card_rect, 2, border_radius=10)
             
-            label_t = self.font_small.render(label, True, color)
+            label_t = render_text(self.font_small, label, True, color)
             scroll_surface.blit(label_t, (20, y + 15))
             
             btn_w, btn_h = 155, 40
@@ -1650,9 +1583,9 @@ class Engine:
                 pygame.draw.rect(scroll_surface, color, btn_rect, 2, border_radius=8)
             
             if self.rebinding_key == key_name:
-                val_t = self.font_tiny.render(">> Нажмите клавишу <<", True, COLORS["warning"])
+                val_t = render_text(self.font_tiny, ">> Нажмите клавишу <<", True, COLORS["warning"])
             else:
-                val_t = self.font_small.render(pygame.key.name(key_val).upper(), True, COLORS["player"])
+                val_t = render_text(self.font_small, pygame.key.name(key_val).upper(), True, COLORS["player"])
             scroll_surface.blit(val_t, val_t.get_rect(center=(btn_rect.centerx, btn_rect.centery)))
             
             y += 62
@@ -1662,7 +1595,7 @@ class Engine:
         # === СЕКЦИЯ ГЕЙМПЛЕЯ ===
         sec_bg2 = pygame.Rect(10, y, inner_w, 40)
         pygame.draw.rect(scroll_surface, (35, 45, 60), sec_bg2, border_radius=8)
-        sec_t2 = self.font_medium.render("ГЕЙМПЛЕЙ", True, COLORS["player"])
+        sec_t2 = render_text(self.font_medium, "ГЕЙМПЛЕЙ", True, COLORS["player"])
         scroll_surface.blit(sec_t2, (20, y + 8))
         y += 50
         
@@ -1670,7 +1603,7 @@ class Engine:
         interval_card = pygame.Rect(10, y, inner_w, 65)
         pygame.draw.rect(scroll_surface, (40, 50, 70), interval_card, border_radius=10)
         pygame.draw.rect(scroll_surface, COLORS["card_border"], interval_card, 2, border_radius=10)
-        il = self.font_small.render("ИНТЕРВАЛ ВОЛН:", True, COLORS["ui"])
+        il = render_text(self.font_small, "ИНТЕРВАЛ ВОЛН:", True, COLORS["ui"])
         scroll_surface.blit(il, (20, y + 10))
         slider_w = min(350, inner_w - 240)
         slider_x = 20
@@ -1691,7 +1624,7 @@ class Engine:
             new_pos = rel_x / slider_w
             settings["wave_break_duration"] = int(3 + new_pos * 27)
             self.save_system.save()
-        val_t = self.font_medium.render(f"{current_duration}с", True, COLORS["player"])
+        val_t = render_text(self.font_medium, f"{current_duration}с", True, COLORS["player"])
         scroll_surface.blit(val_t, (inner_w - 70, y + 30))
         y += 75
         
@@ -1699,7 +1632,7 @@ class Engine:
         cursor_card = pygame.Rect(10, y, inner_w, 55)
         pygame.draw.rect(scroll_surface, (40, 50, 70), cursor_card, border_radius=10)
         pygame.draw.rect(scroll_surface, COLORS["card_border"], cursor_card, 2, border_radius=10)
-        cl = self.font_small.render("УКАЗАТЕЛЬ МЫШИ:", True, COLORS["ui"])
+        cl = render_text(self.font_small, "УКАЗАТЕЛЬ МЫШИ:", True, COLORS["ui"])
         scroll_surface.blit(cl, (20, y + 15))
         cursor_mode = settings.get("cursor_mode", "game")
         cur_opts = [("Игровой", "game"), ("Системный", "system")]
@@ -1709,7 +1642,7 @@ class Engine:
             cbg = COLORS["player"] if is_active_cur else (45, 55, 72)
             pygame.draw.rect(scroll_surface, cbg, cbr, border_radius=8)
             pygame.draw.rect(scroll_surface, COLORS["player"] if is_active_cur else COLORS["card_border"], cbr, 2, border_radius=8)
-            ct = self.font_tiny.render(clabel, True, COLORS["bg"] if is_active_cur else COLORS["ui"])
+            ct = render_text(self.font_tiny, clabel, True, COLORS["bg"] if is_active_cur else COLORS["ui"])
             scroll_surface.blit(ct, ct.get_rect(center=cbr.center))
             # Click
             cbr_screen = pygame.Rect(container_x + 2 + inner_w - 285 + ci * 140, container_y + 2 + y + 8 - self.settings_scroll, 128, 38)
@@ -1724,7 +1657,7 @@ class Engine:
         reset_card = pygame.Rect(10, y, inner_w, 55)
         pygame.draw.rect(scroll_surface, (45, 25, 25), reset_card, border_radius=10)
         pygame.draw.rect(scroll_surface, COLORS["enemy"], reset_card, 2, border_radius=10)
-        reset_t = self.font_small.render("СБРОСИТЬ ПРОГРЕСС", True, COLORS["enemy"])
+        reset_t = render_text(self.font_small, "СБРОСИТЬ ПРОГРЕСС", True, COLORS["enemy"])
         scroll_surface.blit(reset_t, reset_t.get_rect(center=(inner_w // 2, y + 27)))
         reset_screen = pygame.Rect(container_x + 2 + 10, container_y + 2 + y - self.settings_scroll, inner_w, 55)
         if reset_screen.collidepoint(mouse_pos) and container_rect.collidepoint(mouse_pos) and mouse_clicked:
@@ -1756,9 +1689,9 @@ class Engine:
             dialog_rect = pygame.Rect(dialog_x, dialog_y, dialog_w, dialog_h)
             pygame.draw.rect(screen, (30, 20, 20), dialog_rect, border_radius=16)
             pygame.draw.rect(screen, COLORS["enemy"], dialog_rect, 3, border_radius=16)
-            conf_t = self.font_medium.render("Сбросить весь прогресс?", True, COLORS["enemy"])
+            conf_t = render_text(self.font_medium, "Сбросить весь прогресс?", True, COLORS["enemy"])
             screen.blit(conf_t, conf_t.get_rect(center=(WIDTH//2, dialog_y + 55)))
-            sub_t = self.font_tiny.render("Статистика, скины и достижения будут удалены!", True, (200,180,180))
+            sub_t = render_text(self.font_tiny, "Статистика, скины и достижения будут удалены!", True, (200,180,180))
             screen.blit(sub_t, sub_t.get_rect(center=(WIDTH//2, dialog_y + 90)))
             btn_y = dialog_y + 130
             btn_w, btn_h = 190, 50
@@ -1766,12 +1699,12 @@ class Engine:
             yes_h = yes_rect.collidepoint(mouse_pos)
             pygame.draw.rect(screen, (180,40,40) if yes_h else (130,30,30), yes_rect, border_radius=10)
             pygame.draw.rect(screen, COLORS["enemy"], yes_rect, 3, border_radius=10)
-            screen.blit(self.font_medium.render("СБРОСИТЬ", True, (255,255,255)), self.font_medium.render("СБРОСИТЬ", True, (255,255,255)).get_rect(center=yes_rect.center))
+            screen.blit(render_text(self.font_medium, "СБРОСИТЬ", True, (255,255,255)), render_text(self.font_medium, "СБРОСИТЬ", True, (255,255,255)).get_rect(center=yes_rect.center))
             no_rect = pygame.Rect(dialog_x + dialog_w - 50 - btn_w, btn_y, btn_w, btn_h)
             no_h = no_rect.collidepoint(mouse_pos)
             pygame.draw.rect(screen, (45,55,75) if no_h else (35,42,60), no_rect, border_radius=10)
             pygame.draw.rect(screen, COLORS["player"], no_rect, 3, border_radius=10)
-            screen.blit(self.font_medium.render("ОТМЕНА", True, COLORS["ui"]), self.font_medium.render("ОТМЕНА", True, COLORS["ui"]).get_rect(center=no_rect.center))
+            screen.blit(render_text(self.font_medium, "ОТМЕНА", True, COLORS["ui"]), render_text(self.font_medium, "ОТМЕНА", True, COLORS["ui"]).get_rect(center=no_rect.center))
             if yes_h and mouse_clicked:
                 self.save_system.data["stats"] = {"games_played":0,"total_kills":0,"total_playtime":0,"best_score":0,"best_time":0,"max_level":0,"max_wave":0}
                 self.save_system.data["unlocked_skins"] = ["default"]
@@ -1802,15 +1735,10 @@ class Engine:
             self.shop_tab = "modules"
         
         # Фон с градиентом + точки
-        for _i in range(HEIGHT):
-            _p = _i / HEIGHT
-            pygame.draw.line(screen, (int(7+14*_p), int(9+18*_p), int(18+30*_p)), (0,_i),(WIDTH,_i))
-        for _dx in range(0, WIDTH + 50, 50):
-            for _dy in range(0, HEIGHT + 50, 50):
-                pygame.draw.circle(screen, (20, 26, 44), (_dx, _dy), 2)
+        self._draw_submenu_bg()
         
         # Заголовок
-        title = self.font_large.render("МАГАЗИН", True, COLORS["player"])
+        title = render_text(self.font_large, "МАГАЗИН", True, COLORS["player"])
         screen.blit(title, title.get_rect(center=(WIDTH // 2, 50)))
         
         # Валюта
@@ -1818,7 +1746,7 @@ class Engine:
         curr_card = pygame.Rect(WIDTH - 280, 20, 260, 50)
         pygame.draw.rect(screen, (35, 42, 60), curr_card, border_radius=10)
         pygame.draw.rect(screen, COLORS["warning"], curr_card, 2, border_radius=10)
-        curr_t = self.font_medium.render(f"$ {currency}", True, COLORS["warning"])
+        curr_t = render_text(self.font_medium, f"$ {currency}", True, COLORS["warning"])
         screen.blit(curr_t, curr_t.get_rect(center=curr_card.center))
         
         # Вкладки
@@ -1833,7 +1761,7 @@ class Engine:
             is_active = self.shop_tab == tid
             pygame.draw.rect(screen, (50, 65, 90) if is_active else (28, 35, 52), tr, border_radius=10)
             pygame.draw.rect(screen, COLORS["player"] if is_active else COLORS["card_border"], tr, 2 if not is_active else 3, border_radius=10)
-            _tab_surf = self.font_small.render(tname, True, COLORS["player"] if is_active else COLORS["ui"])
+            _tab_surf = render_text(self.font_small, tname, True, COLORS["player"] if is_active else COLORS["ui"])
             screen.blit(_tab_surf, _tab_surf.get_rect(center=tr.center))
             if tr.collidepoint(mouse_pos) and mouse_clicked and not is_active:
                 self.shop_tab = tid
@@ -1859,7 +1787,7 @@ class Engine:
         sw = sum_w // len(ss)
         for si, (st, sc) in enumerate(ss):
             tx = sum_x + si * sw + sw // 2
-            _sst = self.font_tiny.render(st, True, sc)
+            _sst = render_text(self.font_tiny, st, True, sc)
             screen.blit(_sst, _sst.get_rect(center=(tx, sum_rect.centery)))
         
         cont_x = WIDTH // 2 - self.CONTAINER_W // 2
@@ -1894,7 +1822,7 @@ class Engine:
                 pygame.draw.rect(screen, border, brect, bw, border_radius=12)
                 
                 # Icon
-                ict = self.font_small.render(info["icon"], True, info["color"])
+                ict = render_text(self.font_small, info["icon"], True, info["color"])
                 screen.blit(ict, (brect.x + 15, brect.centery - ict.get_height() // 2))
                 
                 # 10-pip progress bar
@@ -1911,9 +1839,9 @@ class Engine:
                     pygame.draw.rect(screen, pip_border, (px, pip_y, pip_w, pip_h), 1, border_radius=3)
                 
                 # Name + level
-                nt = self.font_small.render(f"{info['name']}  Ур.{level}/{MAX_MODULE_LEVEL}", True, COLORS["ui"] if can_afford or level >= MAX_MODULE_LEVEL else (110,110,125))
+                nt = render_text(self.font_small, f"{info['name']}  Ур.{level}/{MAX_MODULE_LEVEL}", True, COLORS["ui"] if can_afford or level >= MAX_MODULE_LEVEL else (110,110,125))
                 screen.blit(nt, (pip_start_x, brect.y + 30))
-                dt = self.font_tiny.render(info["desc"], True, (160,165,185))
+                dt = render_text(self.font_tiny, info["desc"], True, (160,165,185))
                 screen.blit(dt, (pip_start_x, brect.y + 55))
                 
                 # Cost badge
@@ -1923,13 +1851,13 @@ class Engine:
                 if level >= MAX_MODULE_LEVEL:
                     pygame.draw.rect(screen, (45,42,18), cbrect, border_radius=8)
                     pygame.draw.rect(screen, COLORS["warning"], cbrect, 2, border_radius=8)
-                    _mt = self.font_tiny.render("МАКС", True, COLORS["warning"]); screen.blit(_mt, _mt.get_rect(center=cbrect.center))
+                    _mt = render_text(self.font_tiny, "МАКС", True, COLORS["warning"]); screen.blit(_mt, _mt.get_rect(center=cbrect.center))
                 else:
                     cbc = (45,55,72) if can_afford else (32,36,50)
                     ccc = COLORS["player"] if can_afford else (100,100,110)
                     pygame.draw.rect(screen, cbc, cbrect, border_radius=8)
                     pygame.draw.rect(screen, ccc, cbrect, 2, border_radius=8)
-                    _ct = self.font_small.render(f"$ {cost}", True, ccc); screen.blit(_ct, _ct.get_rect(center=cbrect.center))
+                    _ct = render_text(self.font_small, f"$ {cost}", True, ccc); screen.blit(_ct, _ct.get_rect(center=cbrect.center))
                 
                 if is_hover and mouse_clicked and can_afford and not getattr(self, '_mod_click', False):
                     self._mod_click = True
@@ -1970,7 +1898,7 @@ class Engine:
             # Подсказка
             ability_key_val = self.save_system.data["controls"].get("ability", pygame.K_q)
             ability_key_name = pygame.key.name(ability_key_val).upper()
-            hint_ab = self.font_tiny.render(f"Активная способность: [{ability_key_name}] — только одна может быть активна одновременно. Кнопку можно изменить в Настройках.", True, (150, 160, 180))
+            hint_ab = render_text(self.font_tiny, f"Активная способность: [{ability_key_name}] — только одна может быть активна одновременно. Кнопку можно изменить в Настройках.", True, (150, 160, 180))
             screen.blit(hint_ab, hint_ab.get_rect(center=(WIDTH // 2, cont_y - 12)))
             
             owned = self.save_system.data.get("owned_abilities", [])
@@ -1992,7 +1920,7 @@ class Engine:
                 pygame.draw.rect(screen, border, brect, 3 if is_active else 2, border_radius=12)
                 
                 # Icon
-                ict = self.font_medium.render(ab["icon"], True, ab["color"] if is_owned else (80,80,95))
+                ict = render_text(self.font_medium, ab["icon"], True, ab["color"] if is_owned else (80,80,95))
                 screen.blit(ict, (brect.x + 15, brect.centery - ict.get_height() // 2))
                 
                 # [Q] badge (только у активной)
@@ -2000,18 +1928,18 @@ class Engine:
                     kb = pygame.Rect(brect.x + 75, brect.y + 27, 38, 38)
                     pygame.draw.rect(screen, (35, 45, 60), kb, border_radius=8)
                     pygame.draw.rect(screen, ab["color"], kb, 2, border_radius=8)
-                    _kbt = self.font_small.render("Q", True, ab["color"])
+                    _kbt = render_text(self.font_small, "Q", True, ab["color"])
                     screen.blit(_kbt, _kbt.get_rect(center=kb.center))
                 
                 # Name + desc
                 nc = ab["color"] if is_owned else (130,130,145)
                 tx0 = brect.x + 120 if is_active else brect.x + 75
-                screen.blit(self.font_small.render(ab["name"], True, nc), (tx0, brect.y + 12))
-                screen.blit(self.font_tiny.render(ab["desc"], True, (160,165,185) if is_owned else (100,105,120)), (tx0, brect.y + 44))
+                screen.blit(render_text(self.font_small, ab["name"], True, nc), (tx0, brect.y + 12))
+                screen.blit(render_text(self.font_tiny, ab["desc"], True, (160,165,185) if is_owned else (100,105,120)), (tx0, brect.y + 44))
                 
                 # Active badge
                 if is_active:
-                    act_t = self.font_tiny.render("[АКТИВНА — нажмите Q в бою]", True, ab["color"])
+                    act_t = render_text(self.font_tiny, "[АКТИВНА — нажмите Q в бою]", True, ab["color"])
                     screen.blit(act_t, (tx0, brect.y + 68))
                 
                 # Right button
@@ -2021,7 +1949,7 @@ class Engine:
                         sbg = (50, 65, 82) if brect.collidepoint(mouse_pos) else (38,48,64)
                         pygame.draw.rect(screen, sbg, sb, border_radius=8)
                         pygame.draw.rect(screen, ab["color"], sb, 2, border_radius=8)
-                        _sbt = self.font_tiny.render("ВЫБРАТЬ", True, ab["color"]); screen.blit(_sbt, _sbt.get_rect(center=sb.center))
+                        _sbt = render_text(self.font_tiny, "ВЫБРАТЬ", True, ab["color"]); screen.blit(_sbt, _sbt.get_rect(center=sb.center))
                         if sb.collidepoint(mouse_pos) and mouse_clicked and not getattr(self, '_ab_click', False):
                             self._ab_click = True
                             self.save_system.data["active_ability"] = ab_id
@@ -2034,7 +1962,7 @@ class Engine:
                     sbc = ab["color"] if can_buy else (60,60,72)
                     pygame.draw.rect(screen, sbg, sb, border_radius=8)
                     pygame.draw.rect(screen, sbc, sb, 2, border_radius=8)
-                    _cbt = self.font_small.render(f"$ {ab['cost']}", True, sbc); screen.blit(_cbt, _cbt.get_rect(center=sb.center))
+                    _cbt = render_text(self.font_small, f"$ {ab['cost']}", True, sbc); screen.blit(_cbt, _cbt.get_rect(center=sb.center))
                     if sb.collidepoint(mouse_pos) and mouse_clicked and can_buy and not getattr(self, '_ab_click', False):
                         self._ab_click = True
                         owned.append(ab_id)
@@ -2052,20 +1980,11 @@ class Engine:
     def draw_skins_menu(self):
         """Скины - контейнер со скроллом как у достижений"""
         # Единый фон подменю
-        for _i in range(HEIGHT):
-            _p = _i / HEIGHT
-            pygame.draw.line(screen, (int(7+14*_p), int(9+18*_p), int(18+30*_p)), (0,_i),(WIDTH,_i))
-        for _dx in range(0, WIDTH + 50, 50):
-            for _dy in range(0, HEIGHT + 50, 50):
-                pygame.draw.circle(screen, (20, 26, 44), (_dx, _dy), 2)
-        title = self.font_large.render("СКИНЫ ПЕРСОНАЖА", True, COLORS["player"])
+        self._draw_submenu_bg()
+        title = render_text(self.font_large, "СКИНЫ ПЕРСОНАЖА", True, COLORS["player"])
         title_rect = title.get_rect(center=(WIDTH // 2, 60))
         # Свечение заголовка
-        glow_surf = pygame.Surface((title_rect.width + 40, title_rect.height + 40), pygame.SRCALPHA)
-        for gi in range(3):
-            alpha = 35 - gi * 10
-            glow_t = self.font_large.render("СКИНЫ ПЕРСОНАЖА", True, (*COLORS["player_glow"], alpha))
-            glow_surf.blit(glow_t, (20 + gi * 2, 20 + gi * 2))
+        glow_surf = render_glow_text(self.font_large, "СКИНЫ ПЕРСОНАЖА", COLORS["player_glow"], 3, 35, 10, 2, 20)
         screen.blit(glow_surf, (title_rect.x - 20, title_rect.y - 20))
         screen.blit(title, title_rect)
 
@@ -2205,16 +2124,16 @@ class Engine:
 
             # Название
             name_col = skin_data["color"] if is_unlocked else (110, 110, 120)
-            name_text = self.font_small.render(skin_data["name"], True, name_col)
+            name_text = render_text(self.font_small, skin_data["name"], True, name_col)
             screen.blit(name_text, (card_rect.x + card_h + 10, card_rect.y + 10))
 
             # Условие
-            cond_text = self.font_tiny.render(skin_data["condition"], True, (160, 165, 185))
+            cond_text = render_text(self.font_tiny, skin_data["condition"], True, (160, 165, 185))
             screen.blit(cond_text, (card_rect.x + card_h + 10, card_rect.y + 38))
 
             # Эффект (только открытые)
             if is_unlocked:
-                eff_text = self.font_tiny.render(f"Эффект: {skin_data['effect']}", True, COLORS["warning"])
+                eff_text = render_text(self.font_tiny, f"Эффект: {skin_data['effect']}", True, COLORS["warning"])
                 screen.blit(eff_text, (card_rect.x + card_h + 10, card_rect.y + 62))
 
             # Кнопка / замок
@@ -2224,13 +2143,13 @@ class Engine:
 
                 if is_current:
                     pygame.draw.rect(screen, COLORS["player"], btn_rect, border_radius=8)
-                    bt = self.font_tiny.render("АКТИВЕН", True, COLORS["bg"])
+                    bt = render_text(self.font_tiny, "АКТИВЕН", True, COLORS["bg"])
                 else:
                     bc = (55, 65, 85) if is_hover_btn else (38, 45, 62)
                     pygame.draw.rect(screen, bc, btn_rect, border_radius=8)
                     pygame.draw.rect(screen, COLORS["player"] if is_hover_btn else COLORS["card_border"],
                                      btn_rect, 2, border_radius=8)
-                    bt = self.font_tiny.render("ВЫБРАТЬ", True, COLORS["player"])
+                    bt = render_text(self.font_tiny, "ВЫБРАТЬ", True, COLORS["player"])
                 screen.blit(bt, bt.get_rect(center=btn_rect.center))
 
                 if is_hover_btn and mouse_clicked and not is_current:
@@ -2240,7 +2159,7 @@ class Engine:
                         self.save_system.save()
                         pygame.time.delay(150)
             else:
-                lock_t = self.font_tiny.render("[ЗАКРЫТ]", True, (90, 90, 100))
+                lock_t = render_text(self.font_tiny, "[ЗАКРЫТ]", True, (90, 90, 100))
                 screen.blit(lock_t, (card_rect.right - 110, card_rect.centery - 8))
 
             y_screen += card_h + card_spacing
@@ -2257,7 +2176,7 @@ class Engine:
             pygame.draw.rect(screen, COLORS["player"], sb_rect, border_radius=4)
 
         # Подсказка
-        hint = self.font_tiny.render("Используйте стрелки или колесо мыши для прокрутки", True, (110, 115, 135))
+        hint = render_text(self.font_tiny, "Используйте стрелки или колесо мыши для прокрутки", True, (110, 115, 135))
         screen.blit(hint, (WIDTH // 2 - hint.get_width() // 2, HEIGHT - 120))
 
         self.draw_back_button()
@@ -2308,20 +2227,15 @@ class Engine:
     
     def draw_achievements_menu(self):
         """Меню достижений с прокруткой"""
-        for _i in range(HEIGHT):
-            _p = _i / HEIGHT
-            pygame.draw.line(screen, (int(7+14*_p), int(9+18*_p), int(18+30*_p)), (0,_i),(WIDTH,_i))
-        for _dx in range(0, WIDTH + 50, 50):
-            for _dy in range(0, HEIGHT + 50, 50):
-                pygame.draw.circle(screen, (20, 26, 44), (_dx, _dy), 2)
-        title = self.font_large.render("ДОСТИЖЕНИЯ", True, COLORS["player"])
+        self._draw_submenu_bg()
+        title = render_text(self.font_large, "ДОСТИЖЕНИЯ", True, COLORS["player"])
         title_rect = title.get_rect(center=(WIDTH // 2, 60))
         screen.blit(title, title_rect)
         
         # Прогресс выполнения
         completed = sum(1 for v in self.save_system.data["achievements"].values() if v)
         total = len(AchievementSystem.ACHIEVEMENTS)
-        progress_text = self.font_small.render(f"Выполнено: {completed}/{total}", True, COLORS["warning"])
+        progress_text = render_text(self.font_small, f"Выполнено: {completed}/{total}", True, COLORS["warning"])
         screen.blit(progress_text, (WIDTH // 2 - progress_text.get_width() // 2, 120))
         
         # Контейнер со скроллом
@@ -2383,14 +2297,14 @@ class Engine:
             pygame.draw.rect(screen, border_color, card_rect, 2, border_radius=10)
             
             # Название и описание
-            name_text = self.font_small.render(achievement.name, True, COLORS["player"] if is_unlocked else (150, 150, 170))
+            name_text = render_text(self.font_small, achievement.name, True, COLORS["player"] if is_unlocked else (150, 150, 170))
             screen.blit(name_text, (card_rect.x + 20, card_rect.y + 15))
             
-            desc_text = self.font_tiny.render(achievement.description, True, (180, 180, 200))
+            desc_text = render_text(self.font_tiny, achievement.description, True, (180, 180, 200))
             screen.blit(desc_text, (card_rect.x + 20, card_rect.y + 48))
             
             # Награда
-            reward_text = self.font_tiny.render(f"+{achievement.reward} валюты", True, COLORS["warning"])
+            reward_text = render_text(self.font_tiny, f"+{achievement.reward} валюты", True, COLORS["warning"])
             screen.blit(reward_text, (card_rect.right - 160, card_rect.y + 15))
             
             # Кнопка получения награды
@@ -2408,7 +2322,7 @@ class Engine:
                     pygame.draw.rect(screen, button_color, button_rect, border_radius=8)
                     pygame.draw.rect(screen, COLORS["warning"], button_rect, 2, border_radius=8)
                     
-                    btn_text = self.font_tiny.render("ПОЛУЧИТЬ", True, COLORS["warning"])
+                    btn_text = render_text(self.font_tiny, "ПОЛУЧИТЬ", True, COLORS["warning"])
                     screen.blit(btn_text, btn_text.get_rect(center=button_rect.center))
                     
                     if button_hover and pygame.mouse.get_pressed()[0]:
@@ -2423,7 +2337,7 @@ class Engine:
                             self.sound_manager.play_sound("powerup")
                             pygame.time.delay(150)
                 else:
-                    claimed_text = self.font_tiny.render("[✓] ПОЛУЧЕНО", True, (100, 180, 100))
+                    claimed_text = render_text(self.font_tiny, "[✓] ПОЛУЧЕНО", True, (100, 180, 100))
                     screen.blit(claimed_text, (card_rect.right - 150, card_rect.bottom - 28))
             
             # Прогресс-бар если не выполнено
@@ -2437,7 +2351,7 @@ class Engine:
                     progress_w = int(bar_w * progress)
                     if progress_w > 0:
                         pygame.draw.rect(screen, COLORS["exp"], (bar_x, bar_y, progress_w, 18), border_radius=9)
-                    percent_text = self.font_tiny.render(f"{int(progress*100)}%", True, COLORS["ui"])
+                    percent_text = render_text(self.font_tiny, f"{int(progress*100)}%", True, COLORS["ui"])
                     screen.blit(percent_text, (bar_x + bar_w + 10, bar_y))
                 except:
                     pass
@@ -2456,7 +2370,7 @@ class Engine:
             pygame.draw.rect(screen, COLORS["player"], scrollbar_rect, border_radius=5)
         
         # Подсказка о прокрутке
-        hint_text = self.font_tiny.render("Колесо мыши или стрелки для прокрутки", True, (120, 120, 140))
+        hint_text = render_text(self.font_tiny, "Колесо мыши или стрелки для прокрутки", True, (120, 120, 140))
         screen.blit(hint_text, (WIDTH // 2 - hint_text.get_width() // 2, HEIGHT - 130))
         
         self.draw_back_button()
@@ -2471,12 +2385,10 @@ class Engine:
             self.knowledge_scroll = 0
         
         # Фон
-        for i in range(HEIGHT):
-            p = i / HEIGHT
-            pygame.draw.line(screen, (int(5+15*p), int(8+20*p), int(18+35*p)), (0,i),(WIDTH,i))
+        screen.blit(self._gradient(WIDTH, HEIGHT, (5, 8, 18), (20, 28, 53)), (0, 0))
         
         # Заголовок
-        title = self.font_large.render("БАЗА ЗНАНИЙ", True, COLORS["player"])
+        title = render_text(self.font_large, "БАЗА ЗНАНИЙ", True, COLORS["player"])
         screen.blit(title, title.get_rect(center=(WIDTH//2, 55)))
         
         # Вкладки (добавлена вкладка СПОСОБНОСТИ)
@@ -2497,7 +2409,7 @@ class Engine:
             bw = 3 if is_active else 1
             pygame.draw.rect(screen, bg, trect, border_radius=10)
             pygame.draw.rect(screen, border, trect, bw, border_radius=10)
-            tab_txt = self.font_small.render(tlabel, True, COLORS["player"] if is_active else (150,155,175))
+            tab_txt = render_text(self.font_small, tlabel, True, COLORS["player"] if is_active else (150,155,175))
             screen.blit(tab_txt, tab_txt.get_rect(center=trect.center))
             mouse_pos = pygame.mouse.get_pos()
             if trect.collidepoint(mouse_pos) and pygame.mouse.get_pressed()[0]:
@@ -2609,7 +2521,7 @@ class Engine:
                         pygame.draw.polygon(screen, c, pts2)
                     
                     # Text
-                    name_t = self.font_small.render(ed["name"], True, ed["color"])
+                    name_t = render_text(self.font_small, ed["name"], True, ed["color"])
                     screen.blit(name_t, (cr.x + 110, cr.y + 10))
                     # Description - split into lines of ~85 chars
                     desc_full = ed["desc"]
@@ -2626,9 +2538,9 @@ class Engine:
                     if line:
                         desc_lines.append(line)
                     for li, dl in enumerate(desc_lines[:3]):
-                        desc_t = self.font_tiny.render(dl, True, (180,180,200))
+                        desc_t = render_text(self.font_tiny, dl, True, (180,180,200))
                         screen.blit(desc_t, (cr.x + 110, cr.y + 42 + li * 20))
-                    stats_t = self.font_tiny.render(ed["stats"], True, COLORS["warning"])
+                    stats_t = render_text(self.font_tiny, ed["stats"], True, COLORS["warning"])
                     screen.blit(stats_t, (cr.x + 110, cr.y + 100))
                 y += card_h + spacing
             screen.set_clip(None)
@@ -2691,27 +2603,27 @@ class Engine:
                     pygame.draw.rect(screen, cb, cr, border_radius=10)
                     pygame.draw.rect(screen, ab["color"] if is_owned else (55, 60, 75), cr, 3 if is_act else 2, border_radius=10)
                     # Icon
-                    ic = self.font_medium.render(ab["icon"], True, ab["color"] if is_owned else (80,80,95))
+                    ic = render_text(self.font_medium, ab["icon"], True, ab["color"] if is_owned else (80,80,95))
                     screen.blit(ic, (cr.x + 15, cr.y + card_h//2 - ic.get_height()//2))
                     # Key badge
                     if is_owned:
                         kb_r = pygame.Rect(cr.x + 70, cr.y + card_h//2 - 20, 36, 40)
                         pygame.draw.rect(screen, (35,45,60), kb_r, border_radius=8)
                         pygame.draw.rect(screen, ab["color"], kb_r, 2, border_radius=8)
-                        kt = self.font_small.render("Q", True, ab["color"])
+                        kt = render_text(self.font_small, "Q", True, ab["color"])
                         screen.blit(kt, kt.get_rect(center=kb_r.center))
                     # Name + status
                     nc = ab["color"] if is_owned else (120,125,140)
                     tx = cr.x + 120 if is_owned else cr.x + 80
-                    screen.blit(self.font_small.render(ab["name"], True, nc), (tx, cr.y + 12))
-                    screen.blit(self.font_tiny.render(f"КД: {ab['cd']}", True, (150,160,180) if is_owned else (80,85,95)), (tx, cr.y + 42))
-                    screen.blit(self.font_tiny.render(ab["desc"], True, (170,175,195) if is_owned else (90,95,110)), (tx, cr.y + 65))
+                    screen.blit(render_text(self.font_small, ab["name"], True, nc), (tx, cr.y + 12))
+                    screen.blit(render_text(self.font_tiny, f"КД: {ab['cd']}", True, (150,160,180) if is_owned else (80,85,95)), (tx, cr.y + 42))
+                    screen.blit(render_text(self.font_tiny, ab["desc"], True, (170,175,195) if is_owned else (90,95,110)), (tx, cr.y + 65))
                     # Status badge
                     if is_act:
-                        act_badge = self.font_tiny.render("[АКТИВНА]", True, ab["color"])
+                        act_badge = render_text(self.font_tiny, "[АКТИВНА]", True, ab["color"])
                         screen.blit(act_badge, (cr.right - act_badge.get_width() - 15, cr.y + 12))
                     elif not is_owned:
-                        lock_t = self.font_tiny.render("[НЕ КУПЛЕНА]", True, (100,100,115))
+                        lock_t = render_text(self.font_tiny, "[НЕ КУПЛЕНА]", True, (100,100,115))
                         screen.blit(lock_t, (cr.right - lock_t.get_width() - 15, cr.y + 12))
                 y += card_h + spacing
             screen.set_clip(None)
@@ -2767,18 +2679,18 @@ class Engine:
                     pygame.draw.rect(screen, rcol, cr, 2, border_radius=10)
                     
                     # Rarity badge (inside card, top right)
-                    rar_t = self.font_tiny.render(prarity.upper(), True, rcol)
+                    rar_t = render_text(self.font_tiny, prarity.upper(), True, rcol)
                     rar_bg = pygame.Rect(cr.right - rar_t.get_width() - 22, cr.y + 6, rar_t.get_width() + 14, 20)
                     pygame.draw.rect(screen, (20,22,38), rar_bg, border_radius=5)
                     pygame.draw.rect(screen, rcol, rar_bg, 1, border_radius=5)
                     screen.blit(rar_t, (rar_bg.x + 7, rar_bg.y + 1))
                     
-                    name_t = self.font_small.render(pname, True, COLORS["ui"])
+                    name_t = render_text(self.font_small, pname, True, COLORS["ui"])
                     screen.blit(name_t, (cr.x + 20, cr.y + 14))
-                    desc_t = self.font_tiny.render(pdesc[:95], True, (180,180,200))
+                    desc_t = render_text(self.font_tiny, pdesc[:95], True, (180,180,200))
                     screen.blit(desc_t, (cr.x + 20, cr.y + 48))
                     if len(pdesc) > 95:
-                        desc2_t = self.font_tiny.render(pdesc[95:], True, (180,180,200))
+                        desc2_t = render_text(self.font_tiny, pdesc[95:], True, (180,180,200))
                         screen.blit(desc2_t, (cr.x + 20, cr.y + 66))
                 y += card_h + spacing
             screen.set_clip(None)
@@ -2789,7 +2701,7 @@ class Engine:
                 pygame.draw.rect(screen, COLORS["player"], (cont_x + cont_w - 12, sb_y, 8, sb_h), border_radius=4)
         
         # Hint
-        hint_t = self.font_tiny.render("Колесико мыши или стрелки для прокрутки", True, (120,120,140))
+        hint_t = render_text(self.font_tiny, "Колесико мыши или стрелки для прокрутки", True, (120,120,140))
         screen.blit(hint_t, hint_t.get_rect(center=(WIDTH//2, HEIGHT - 110)))
         
         self.draw_back_button()
@@ -2802,7 +2714,7 @@ class Engine:
         color = COLORS["player"] if is_hover else COLORS["card_border"]
         pygame.draw.rect(screen, color, button_rect, 3, border_radius=8)
         
-        text = self.font_small.render("НАЗАД", True, COLORS["player"])
+        text = render_text(self.font_small, "НАЗАД", True, COLORS["player"])
         text_rect = text.get_rect(center=button_rect.center)
         screen.blit(text, text_rect)
         
@@ -2815,16 +2727,16 @@ class Engine:
         overlay.fill((0, 0, 0, 200))
         screen.blit(overlay, (0, 0))
         
-        title = self.font_huge.render("ПОВЫШЕНИЕ УРОВНЯ!", True, COLORS["player"])
+        title = render_text(self.font_huge, "ПОВЫШЕНИЕ УРОВНЯ!", True, COLORS["player"])
         title_rect = title.get_rect(center=(WIDTH // 2, 150))
         screen.blit(title, title_rect)
         
-        subtitle = self.font_medium.render(f"Уровень {self.player.level}", True, COLORS["ui"])
+        subtitle = render_text(self.font_medium, f"Уровень {self.player.level}", True, COLORS["ui"])
         subtitle_rect = subtitle.get_rect(center=(WIDTH // 2, 230))
         screen.blit(subtitle, subtitle_rect)
         
         if not hasattr(self, 'current_perks'):
-            self.current_perks = PerkManager.get_available_perks(self.player)
+            self.current_perks = PerkManager.get_available_perks(self.player, self.rng)
         
         card_width, card_height = 350, 200
         total_width = len(self.current_perks) * card_width + (len(self.current_perks) - 1) * 40
@@ -2863,17 +2775,17 @@ class Engine:
                 "common": "ОБЫЧНЫЙ", "uncommon": "НЕОБЫЧНЫЙ",
                 "rare": "РЕДКИЙ", "epic": "ЭПИЧЕСКИЙ", "legendary": "ЛЕГЕНДАРНЫЙ"
             }
-            rarity_label = self.font_tiny.render(rarity_names.get(perk.rarity, ""), True, rarity_color)
+            rarity_label = render_text(self.font_tiny, rarity_names.get(perk.rarity, ""), True, rarity_color)
             rarity_bg = pygame.Rect(card_rect.x + 8, card_rect.y - 14, rarity_label.get_width() + 16, 22)
             pygame.draw.rect(screen, (20, 22, 38), rarity_bg, border_radius=5)
             pygame.draw.rect(screen, rarity_color, rarity_bg, 1, border_radius=5)
             screen.blit(rarity_label, (rarity_bg.x + 8, rarity_bg.y + 1))  # +1 вместо +3
             
-            icon_text = self.font_large.render(perk.icon, True, rarity_color)
+            icon_text = render_text(self.font_large, perk.icon, True, rarity_color)
             icon_rect = icon_text.get_rect(center=(card_rect.centerx, card_rect.y + 48))
             screen.blit(icon_text, icon_rect)
             
-            name_text = self.font_small.render(perk.name, True, COLORS["ui"])
+            name_text = render_text(self.font_small, perk.name, True, COLORS["ui"])
             name_rect = name_text.get_rect(center=(card_rect.centerx, card_rect.y + 105))
             screen.blit(name_text, name_rect)
             
@@ -2893,7 +2805,7 @@ class Engine:
             
             desc_y = card_rect.y + 135
             for line in lines[:2]:
-                desc_text = self.font_tiny.render(line, True, (180, 180, 200))
+                desc_text = render_text(self.font_tiny, line, True, (180, 180, 200))
                 desc_rect = desc_text.get_rect(center=(card_rect.centerx, desc_y))
                 screen.blit(desc_text, desc_rect)
                 desc_y += 22
@@ -2901,12 +2813,12 @@ class Engine:
             # Подсказка "НАЖМИТЕ" если можно выбрать, иначе "ОТПУСТИТЕ КНОПКУ"
             if is_hover:
                 if can_select:
-                    hint = self.font_tiny.render("НАЖМИТЕ ДЛЯ ВЫБОРА", True, rarity_color)
+                    hint = render_text(self.font_tiny, "НАЖМИТЕ ДЛЯ ВЫБОРА", True, rarity_color)
                     pygame.draw.rect(screen, (20, 22, 38),
                                      pygame.Rect(card_rect.x, card_rect.bottom - 28, card_rect.width, 28),
                                      border_radius=12)
                 else:
-                    hint = self.font_tiny.render("ОТПУСТИТЕ КНОПКУ МЫШИ", True, (180, 180, 200))
+                    hint = render_text(self.font_tiny, "ОТПУСТИТЕ КНОПКУ МЫШИ", True, (180, 180, 200))
                     pygame.draw.rect(screen, (30, 30, 30),
                                      pygame.Rect(card_rect.x, card_rect.bottom - 28, card_rect.width, 28),
                                      border_radius=12)
@@ -2916,15 +2828,12 @@ class Engine:
             # Выбор только если кнопка была предварительно отпущена
             if is_hover and can_select and pygame.mouse.get_pressed()[0]:
                 self.level_up_click_handled = True
-                PerkManager.apply_perk(self.player, perk.id)
-                delattr(self, 'current_perks')
-                self.state = GameState.PLAY
-                self.sound_manager.play_sound("powerup")
+                self.choose_perk(perk.id)
                 return
 
     def draw_wave_complete(self):
         # Просто показываем таймер вверху экрана
-        timer_text = self.font_large.render(
+        timer_text = render_text(self.font_large, 
             f"Следующая волна через: {int(self.wave_system.wave_break_time)}s",
             True, COLORS["warning"]
         )
@@ -2943,7 +2852,7 @@ class Engine:
         overlay.fill((0, 0, 15, 180))
         screen.blit(overlay, (0, 0))
         
-        pause_text = self.font_huge.render("ПАУЗА", True, COLORS["ui"])
+        pause_text = render_text(self.font_huge, "ПАУЗА", True, COLORS["ui"])
         pause_rect = pause_text.get_rect(center=(WIDTH // 2, 80))
         screen.blit(pause_text, pause_rect)
         
@@ -2999,7 +2908,7 @@ class Engine:
             upgrade_texts = ["Пока нет улучшений"]
         
         # Отрисовка в 2 колонки ПО ЦЕНТРУ экрана
-        upgrades_title = self.font_small.render("АКТИВНЫЕ ПЕРКИ:", True, COLORS["player"])
+        upgrades_title = render_text(self.font_small, "АКТИВНЫЕ ПЕРКИ:", True, COLORS["player"])
         title_x = WIDTH // 2 - upgrades_title.get_width() // 2
         screen.blit(upgrades_title, (title_x, 160))
         
@@ -3017,7 +2926,7 @@ class Engine:
             row = i % max_rows
             x = start_x + col * col_width
             y = y_start + row * line_height
-            rendered = self.font_tiny.render(text, True, COLORS["ui"])
+            rendered = render_text(self.font_tiny, text, True, COLORS["ui"])
             screen.blit(rendered, (x, y))
         
         button_width, button_height = 400, 70  # Уменьшено
@@ -3050,7 +2959,7 @@ class Engine:
             pygame.draw.rect(screen, border_color, button_rect, border_width, border_radius=12)
             
             text_color = COLORS["player"] if is_hover else COLORS["ui"]
-            button_text = self.font_medium.render(btn_data["text"], True, text_color)
+            button_text = render_text(self.font_medium, btn_data["text"], True, text_color)
             text_rect = button_text.get_rect(center=button_rect.center)
             screen.blit(button_text, text_rect)
             
@@ -3063,21 +2972,19 @@ class Engine:
                     self.menu_page = "main"
                 pygame.time.delay(200)
         
-        hint = self.font_small.render("ESC - продолжить", True, (150, 150, 170))
+        hint = render_text(self.font_small, "ESC - продолжить", True, (150, 150, 170))
         hint_rect = hint.get_rect(center=(WIDTH // 2, HEIGHT - 80))
         screen.blit(hint, hint_rect)
     
     def draw_game_over(self):
         # Dark gradient background
-        for _i in range(HEIGHT):
-            _p = _i / HEIGHT
-            pygame.draw.line(screen, (int(18-10*_p), int(5-2*_p), int(5-2*_p)), (0,_i),(WIDTH,_i))
+        screen.blit(self._gradient(WIDTH, HEIGHT, (18, 5, 5), (8, 3, 3)), (0, 0))
         
         cx = WIDTH // 2
         mouse_pos = pygame.mouse.get_pos()
         
         # Title - fixed position relative to top
-        title = self.font_huge.render("GAME OVER", True, COLORS["enemy"])
+        title = render_text(self.font_huge, "GAME OVER", True, COLORS["enemy"])
         screen.blit(title, title.get_rect(center=(cx, int(HEIGHT * 0.18))))
         
         # Stats card - centered
@@ -3101,22 +3008,22 @@ class Engine:
         col_w = card_w // 3
         for i, (lbl, val, col) in enumerate(stats_top):
             sx = card_x + i * col_w + col_w // 2
-            lt = self.font_tiny.render(lbl, True, (160, 150, 150))
+            lt = render_text(self.font_tiny, lbl, True, (160, 150, 150))
             screen.blit(lt, lt.get_rect(center=(sx, card_y + 50)))
-            vt = self.font_medium.render(val, True, col)
+            vt = render_text(self.font_medium, val, True, col)
             screen.blit(vt, vt.get_rect(center=(sx, card_y + 85)))
         
         col_w2 = card_w // 2
         for i, (lbl, val, col) in enumerate(stats_bot):
             sx = card_x + i * col_w2 + col_w2 // 2
-            lt = self.font_tiny.render(lbl, True, (160, 150, 150))
+            lt = render_text(self.font_tiny, lbl, True, (160, 150, 150))
             screen.blit(lt, lt.get_rect(center=(sx, card_y + 140)))
-            vt = self.font_medium.render(val, True, col)
+            vt = render_text(self.font_medium, val, True, col)
             screen.blit(vt, vt.get_rect(center=(sx, card_y + 175)))
         
         # Currency earned
         earned = self.kills + self.player.level * 10 + self.wave_system.current_wave * 20
-        earned_t = self.font_small.render(f"Заработано: +{earned} валюты", True, COLORS["warning"])
+        earned_t = render_text(self.font_small, f"Заработано: +{earned} валюты", True, COLORS["warning"])
         screen.blit(earned_t, earned_t.get_rect(center=(cx, card_y + card_h + 30)))
         
         # Buttons
@@ -3134,7 +3041,7 @@ class Engine:
             pygame.draw.rect(screen, bg, brect, border_radius=10)
             pygame.draw.rect(screen, border, brect, 2, border_radius=10)
             tc = COLORS["bg"] if (i == 0 and is_hover) else (COLORS["ui"])
-            bt = self.font_small.render(label, True, tc)
+            bt = render_text(self.font_small, label, True, tc)
             screen.blit(bt, bt.get_rect(center=brect.center))
             
             if is_hover and pygame.mouse.get_pressed()[0]:
@@ -3161,11 +3068,12 @@ class Engine:
             self.ability_active_timer = 300
             push_radius = 250
             push_force = 18
-            for enemy in self.enemies:
+            # Индекс с прошлого тика отстаёт от позиций — перестраиваем
+            self.enemies.reindex()
+            for enemy in self.enemies.enemies_within(self.player.pos, push_radius):
                 d = enemy.pos - self.player.pos
-                if d.length() < push_radius:
-                    if d.length() > 0:
-                        enemy.pos += d.normalize() * push_force
+                if d.length() > 0:
+                    enemy.pos += d.normalize() * push_force
             # Visual particle burst
             self.particle_system.emit(self.player.pos, 30, COLORS["shield"])
             self.sound_manager.play_sound("explosion")
@@ -3173,9 +3081,7 @@ class Engine:
         elif ab_id == "time_slow":
             # Замедляет всех врагов (не замораживает)
             self.ability_active_timer = 4000
-            for enemy in self.enemies:
-                enemy.slow_duration = max(enemy.slow_duration, 4000)
-                enemy.slow_factor = min(enemy.slow_factor, 0.4)
+            self.enemies.slow_all(4000, 0.4)
             self.particle_system.emit(self.player.pos, 20, (100, 200, 255))
         
         elif ab_id == "overdrive":
@@ -3190,15 +3096,10 @@ class Engine:
             # Huge AOE damage
             nuke_radius = 400
             nuke_dmg = 150
-            for enemy in self.enemies[:]:
-                d = (enemy.pos - self.player.pos).length()
-                if d < nuke_radius:
-                    if enemy.take_damage(nuke_dmg):
-                        self.particle_system.emit(enemy.pos, 20, enemy.color)
-                        self.exp_gems.append(pygame.Vector2(enemy.pos))
-                        self.enemies.remove(enemy)
-                        self.kills += 1
-                        self.score += enemy.exp_value
+            self.enemies.reindex()  # Точные позиции на момент взрыва
+            for enemy in self.enemies.enemies_within(self.player.pos, nuke_radius):
+                if enemy.take_damage(nuke_dmg):
+                    self.kill_enemy(enemy, nuke_dmg, 20)
             self.particle_system.emit(self.player.pos, 60, (255, 100, 0))
             self.sound_manager.play_sound("explosion")
         
@@ -3219,18 +3120,40 @@ class Engine:
             import math as _m
             for bi in range(24):
                 angle = bi * (360 / 24)
-                is_crit = random.random() < self.player.crit_chance
+                is_crit = self.rng.random() < self.player.crit_chance
                 dmg = int(self.player.dmg * (self.player.crit_multiplier if is_crit else 1))
-                self.bullets.append(Bullet(
+                self.bullets.spawn(
                     self.player.pos, angle, self.player.bullet_speed * 1.2,
                     dmg, self.player.piercing, self.player.bullet_size,
                     self.player.bullet_lifetime, is_crit
-                ))
+                )
             self.particle_system.emit(self.player.pos, 30, COLORS["player"])
             self.sound_manager.play_sound("shoot")
 
-    def game_loop(self):
+    def update_world(self, spawning: bool = True):
+        """Один тик логики боя без отрисовки.
+
+        spawning=False — перерыв между волнами: враги не появляются,
+        система волн не тикает.
+        """
+        prof = self.profiler
+        prof.restart_lap()
         self.time_survived += self.dt
+        self.stat_changed("time_survived")
+        self.sim_time += self.dt * 1000
+        self.sim_tick += 1
+        inp = self.input.poll(self)
+        if self.ability_queued:
+            inp.ability = True
+            self.ability_queued = False
+        if self.recorder is not None:
+            # Дальше идёт ровно то, что окажется в записи
+            inp = self.recorder.record(inp)
+        
+        # Позиции прошлого тика — для интерполяции при отрисовке
+        self.player.prev_pos = pygame.Vector2(self.player.pos)
+        self.prev_cam = pygame.Vector2(self.cam)
+        self.enemies.snapshot()
         
         # Update ability cooldown
         if self.ability_cooldown > 0:
@@ -3245,77 +3168,259 @@ class Engine:
                 if hasattr(self, '_overdrive_active') and self._overdrive_active:
                     self._overdrive_active = False
                     self.player.fire_rate = getattr(self, '_orig_fire_rate', self.player.fire_rate)
+        if inp.ability:
+            self.try_activate_ability()
+        prof.mark("input")
         
         self.player.update(self.dt)
-        self.update_player_input()
-        self.update_shooting()
+        prof.mark("player")
+        self.update_player_input(inp)
+        prof.mark("input")
+        self.update_shooting(inp)
+        prof.mark("shooting")
         
         target_cam = pygame.Vector2(WIDTH // 2, HEIGHT // 2) - self.player.pos
-        self.cam += (target_cam - self.cam) * 0.1
-        
-        self.spawn_enemies()
-        self.update_wave_system()
-        
-        for enemy in self.enemies[:]:
-            enemy.update(self.dt, self.player.pos, self.enemies)
-            # Удаляем врагов убитых эффектами (яд и т.д.)
-            if enemy.hp <= 0 and enemy in self.enemies:
-                self.particle_system.emit(enemy.pos, 15, enemy.color)
-                self.exp_gems.append(pygame.Vector2(enemy.pos))
-                self.enemies.remove(enemy)
-                self.kills += 1
-                self.score += enemy.exp_value
-                if self.player.lifesteal > 0:
-                    self.player.heal(int(5 * self.player.lifesteal))
-        
-        for bullet in self.bullets[:]:
-            if bullet.update(self.dt):
-                self.bullets.remove(bullet)
+        self.cam += (target_cam - self.cam) * (1 - 0.9 ** (self.dt * BASE_HZ))
         
-        self.update_combat()
-        self.update_exp_gems()
-        self.particle_system.update(self.dt)
+        if spawning:
+            self.spawn_enemies()
+            self.update_wave_system()
+        prof.mark("spawn")
         
-        # Проверяем достижения каждые 3 секунды
-        if not hasattr(self, '_ach_timer'):
-            self._ach_timer = 0
-        self._ach_timer += self.dt
-        if self._ach_timer >= 3.0:
-            self._ach_timer = 0
-            AchievementSystem.check_achievements(self, self.save_system)
+        for enemy in self.enemies.update(self.dt, self.player.pos):
+            # Убитые эффектами (яд и т.д.): добивает тик яда
+            self.kill_enemy(enemy, int(enemy.poison_damage))
+        prof.mark("enemies")
         
-        # РИСОВАНИЕ
-        self.draw_background()
-        self.particle_system.draw(screen, self.cam)
+        bullets = self.bullets
+        for i in range(len(bullets) - 1, -1, -1):
+            if bullets[i].update(self.dt):
+                bullets.release_at(i)
+        prof.mark("bullets")
         
-        for gem in self.exp_gems:
-            glow_surf = pygame.Surface((30, 30), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surf, (*COLORS["exp_glow"], 80), (15, 15), 12)
-            screen.blit(glow_surf, (gem.x + self.cam.x - 15, gem.y + self.cam.y - 15))
-            pygame.draw.circle(screen, COLORS["exp"], 
-                             (int(gem.x + self.cam.x), int(gem.y + self.cam.y)), 5)
+        self.update_combat()
+        self.flush_kills()
+        prof.mark("combat")
+        self.update_exp_gems()
+        prof.mark("gems")
+        self.particle_system.update(self.dt)
+        prof.mark("particles")
         
-        for enemy in self.enemies:
-            enemy.draw(screen, self.cam)
+    
+    def draw_world(self, alpha: float = 1.0):
+        """Рисует мир между двумя тиками логики.
+
+        alpha — доля пути от прошлого тика к текущему: камера, игрок, враги
+        и пули рисуются в интерполированных позициях. Частицы, кристаллы и
+        снаряды врагов — в текущих (они мелкие, рывок не заметен).
+        """
+        prof = self.profiler
+        prof.restart_lap()
+        cam = self.prev_cam.lerp(self.cam, alpha)
+        self.draw_background(cam)
+        prof.mark("draw_background")
+        stats = self.render_stats
+        stats.clear()
+        stats["particles_culled"] = self.particle_system.draw(screen, cam)
+        
+        # Всё, что целиком за краем экрана, не рисуется
+        stats["gems_culled"] = self.exp_gems.draw(screen, cam)
+        
+        # Враги: отсечение и LOD одной векторной проверкой; смещение камеры
+        # на (интерполированная - текущая позиция)
+        enemies = self.enemies
+        idx, shifts, simple = enemies.visible(cam, alpha, WIDTH, HEIGHT)
+        if len(idx) > LOD_ENEMY_THRESHOLD:
+            idx, shifts, simple = enemies.visible(cam, alpha, WIDTH, HEIGHT, self.player.pos, LOD_DISTANCE)
+        views = enemies.views
+        for i, (sx, sy), lod in zip(idx.tolist(), shifts.tolist(), simple.tolist()):
+            if lod:
+                views[i].draw_simple(screen, pygame.Vector2(cam.x + sx, cam.y + sy))
+            else:
+                views[i].draw(screen, pygame.Vector2(cam.x + sx, cam.y + sy))
+        stats["enemies_culled"] = len(enemies) - len(idx)
+        stats["enemies_simplified"] = int(simple.sum())
         
+        back = 1.0 - alpha
+        culled = 0
         for bullet in self.bullets:
-            bullet.draw(screen, self.cam)
+            bx = bullet.pos.x + cam.x
+            by = bullet.pos.y + cam.y
+            margin = 8 * bullet.size
+            if bx < -margin or bx > WIDTH + margin or by < -margin or by > HEIGHT + margin:
+                culled += 1
+                continue
+            bullet.draw(screen, cam + (bullet.prev_pos - bullet.pos) * back)
+        stats["bullets_culled"] = culled
         
         # Снаряды врагов
-        if hasattr(self, 'enemy_bullets'):
-            for eb in self.enemy_bullets:
-                ex = int(eb['pos'].x + self.cam.x)
-                ey = int(eb['pos'].y + self.cam.y)
-                if eb['type'] == 'mortar':
-                    # Мортира мигает
-                    pulse = int(180 + 75 * abs(math.sin(pygame.time.get_ticks() / 150)))
-                    pygame.draw.circle(screen, (pulse, 120, 20), (ex, ey), eb['size'])
-                    pygame.draw.circle(screen, (255, 200, 0), (ex, ey), eb['size'], 2)
-                else:
-                    pygame.draw.circle(screen, eb['color'], (ex, ey), eb['size'])
+        stats["enemy_bullets_culled"] = self.enemy_bullets.draw(screen, cam)
         
-        self.player.draw(screen, self.cam)
+        self.player.draw(screen, cam + (self.player.prev_pos - self.player.pos) * back)
+        prof.mark("draw_entities")
         self.draw_ui()
+        prof.mark("draw_ui")
+    
+    def advance(self, frame_time: float) -> float:
+        """Прогоняет накопленное время кадра фиксированными тиками SIM_DT.
+
+        Возвращает alpha для интерполяции отрисовки. Если тик перевёл игру
+        в другое состояние (уровень, пауза, конец), остаток времени сгорает.
+        """
+        self.sim_accumulator += min(frame_time, MAX_FRAME_TIME)
+        while self.sim_accumulator >= SIM_DT:
+            self.sim_accumulator -= SIM_DT
+            if self.step(SIM_DT) not in (GameState.PLAY, GameState.WAVE_COMPLETE):
+                self.sim_accumulator = 0.0
+                return 1.0
+        return self.sim_accumulator / SIM_DT
+    
+    def entity_counts(self) -> dict:
+        return {
+            "enemies": len(self.enemies),
+            "bullets": len(self.bullets),
+            "enemy_bullets": len(self.enemy_bullets),
+            "gems": len(self.exp_gems),
+            "particles": len(self.particle_system),
+        }
+    
+    def game_loop(self):
+        self.profiler.begin_frame()
+        self.draw_world(self.advance(self.dt))
+        if self.state == GameState.WAVE_COMPLETE:
+            self.draw_wave_complete()
+        self.profiler.end_frame({**self.entity_counts(), **self.render_stats})
+        if self.profiler.overlay:
+            self.draw_profiler()
+    
+    def draw_profiler(self):
+        if self._profiler_font is None:
+            self._profiler_font = pygame.font.SysFont("consolas,dejavusansmono,monospace", 15)
+        self.profiler.draw(screen, self._profiler_font, WIDTH - 10, 120)
+    
+    def toggle_profiler(self):
+        """F3: оверлей с замерами; запись идёт, пока оверлей открыт"""
+        self.profiler.overlay = not self.profiler.overlay
+        self.profiler.enabled = self.profiler.overlay
+        if self.profiler.enabled:
+            self.profiler.reset()
+    
+    def step(self, dt: float = SIM_DT) -> GameState:
+        """Тик симуляции без отрисовки и без ограничения частоты (headless).
+
+        Повышение уровня решает провайдер ввода (pick_perk), перерыв между
+        волнами тикает как в обычной игре.
+        """
+        self.dt = dt
+        if self.state == GameState.PLAY:
+            self.update_world()
+        elif self.state == GameState.WAVE_COMPLETE:
+            self.update_world(spawning=False)
+            if self.wave_system.update_break(self.dt):
+                self.wave_system.start_wave()
+                self.stat_changed("wave")
+                self.state = GameState.PLAY
+        elif self.state == GameState.LEVEL_UP:
+            if not hasattr(self, 'current_perks'):
+                self.current_perks = PerkManager.get_available_perks(self.player, self.rng)
+            choice = self.input.pick_perk(self.current_perks, self)
+            if choice is not None:
+                self.choose_perk(self.current_perks[choice].id)
+        return self.state
+    
+    def simulate(self, ticks: int, dt: float = SIM_DT) -> int:
+        """Прогоняет до ticks тиков (или до GAME_OVER); возвращает число тиков"""
+        prof = self.profiler
+        for tick in range(ticks):
+            prof.begin_frame()
+            state = self.step(dt)
+            prof.end_frame(self.entity_counts())
+            if state == GameState.GAME_OVER:
+                return tick + 1
+        return ticks
+    
+    def choose_perk(self, perk_id: str):
+        if self.recorder is not None:
+            self.recorder.record_perk([p.id for p in self.current_perks].index(perk_id))
+        PerkManager.apply_perk(self.player, perk_id)
+        AchievementSystem.check_achievements(self, self.save_system)
+        delattr(self, 'current_perks')
+        self.state = GameState.PLAY
+        self.sound_manager.play_sound("powerup")
+    
+    # --- Запись и повтор забега ---
+    def run_header(self) -> dict:
+        """Всё, кроме ввода, от чего зависит исход забега"""
+        data = self.save_system.data
+        return {
+            "seed": self.seed,
+            "game_mode": self.game_mode.name,
+            "dt": SIM_DT,
+            "save": {
+                "modules": data["modules"],
+                "current_skin": data["current_skin"],
+                "active_ability": data.get("active_ability", ""),
+                "owned_abilities": data.get("owned_abilities", []),
+                "wave_break_duration": data["settings"].get("wave_break_duration", 10),
+            },
+        }
+    
+    def apply_run_header(self, header: dict):
+        """Начинает забег с параметрами из записи (для повтора)"""
+        data = self.save_system.data
+        save = header["save"]
+        data["modules"] = dict(save["modules"])
+        data["current_skin"] = save["current_skin"]
+        data["active_ability"] = save["active_ability"]
+        data["owned_abilities"] = list(save["owned_abilities"])
+        data["settings"]["wave_break_duration"] = save["wave_break_duration"]
+        self.game_mode = GameMode[header["game_mode"]]
+        self.reset_game(seed=header["seed"])
+        self.state = GameState.PLAY
+    
+    def start_recording(self):
+        """Записывать ввод текущего забега (вызывать сразу после reset_game)"""
+        self.recorder = InputRecorder(self.run_header())
+    
+    def finish_recording(self, path: Optional[str] = None) -> Optional[str]:
+        """Сохраняет запись (по умолчанию в RECORD_DIR) и прекращает запись"""
+        recorder, self.recorder = self.recorder, None
+        if recorder is None or not len(recorder):
+            return None
+        if path is None:
+            os.makedirs(RECORD_DIR, exist_ok=True)
+            path = os.path.join(RECORD_DIR, f"run-{self.seed}-{len(recorder)}.csr")
+        recorder.save(path)
+        return path
+    
+    def state_digest(self) -> dict:
+        """Итог забега для сравнения прогонов (повтор должен совпасть точно)"""
+        n = len(self.enemies)
+        h = hashlib.sha1()
+        h.update(self.enemies.pos[:n].tobytes())
+        h.update(self.enemies.hp[:n].tobytes())
+        return {
+            "tick": self.sim_tick,
+            "state": self.state.name,
+            "wave": self.wave_system.current_wave,
+            "kills": self.kills,
+            "score": self.score,
+            "level": self.player.level,
+            "exp": self.player.exp,
+            "hp": self.player.hp,
+            "player_pos": [self.player.pos.x, self.player.pos.y],
+            "enemies": n,
+            "enemies_sha1": h.hexdigest(),
+        }
+    
+    def try_activate_ability(self):
+        """Активная способность, если она куплена, выбрана и не на кулдауне"""
+        if self.state != GameState.PLAY or self.ability_cooldown > 0:
+            return
+        active_ab = self.save_system.data.get("active_ability", "")
+        owned = self.save_system.data.get("owned_abilities", [])
+        if active_ab and active_ab in owned:
+            self._activate_ability(active_ab)
     
     def run(self):
         while True:
@@ -3323,6 +3428,9 @@ class Engine:
             
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    if self.recorder is not None:
+                        self.finish_recording()
+                    self.save_system.flush()
                     pygame.quit()
                     sys.exit()
                 
@@ -3347,12 +3455,11 @@ class Engine:
                     
                     # Active ability key - configurable (default Q)
                     ability_key = self.save_system.data["controls"].get("ability", pygame.K_q)
-                    if self.state == GameState.PLAY and self.ability_cooldown <= 0:
-                        active_ab = self.save_system.data.get("active_ability", "")
-                        if active_ab and event.key == ability_key:
-                            owned = self.save_system.data.get("owned_abilities", [])
-                            if active_ab in owned:
-                                self._activate_ability(active_ab)
+                    if event.key == ability_key and self.state == GameState.PLAY:
+                        self.ability_queued = True  # Сработает на ближайшем тике
+                    
+                    if event.key == self.save_system.data["controls"].get("profiler", pygame.K_F3):
+                        self.toggle_profiler()
                     
                     # Переключение автострельбы настраиваемой кнопкой
                     auto_fire_key = self.save_system.data["controls"].get("auto_fire_toggle", pygame.K_TAB)
@@ -3426,71 +3533,13 @@ class Engine:
                 self.draw_level_up()
             
             elif self.state == GameState.WAVE_COMPLETE:
-                # Игра продолжается, только не спавнятся враги
-                self.time_survived += self.dt
-                
-                self.player.update(self.dt)
-                self.update_player_input()
-                self.update_shooting()
-                
-                target_cam = pygame.Vector2(WIDTH // 2, HEIGHT // 2) - self.player.pos
-                self.cam += (target_cam - self.cam) * 0.1
-                
-                for enemy in self.enemies[:]:
-                    enemy.update(self.dt, self.player.pos, self.enemies)
-                    if enemy.hp <= 0 and enemy in self.enemies:
-                        self.particle_system.emit(enemy.pos, 10, enemy.color)
-                        self.exp_gems.append(pygame.Vector2(enemy.pos))
-                        self.enemies.remove(enemy)
-                        self.kills += 1
-                        self.score += enemy.exp_value
-                
-                for bullet in self.bullets[:]:
-                    if bullet.update(self.dt):
-                        self.bullets.remove(bullet)
-                
-                self.update_combat()
-                self.update_exp_gems()
-                self.particle_system.update(self.dt)
-                
-                # Рисование
-                self.draw_background()
-                self.particle_system.draw(screen, self.cam)
-                
-                for gem in self.exp_gems:
-                    glow_surf = pygame.Surface((30, 30), pygame.SRCALPHA)
-                    pygame.draw.circle(glow_surf, (*COLORS["exp_glow"], 80), (15, 15), 12)
-                    screen.blit(glow_surf, (gem.x + self.cam.x - 15, gem.y + self.cam.y - 15))
-                    pygame.draw.circle(screen, COLORS["exp"], 
-                                     (int(gem.x + self.cam.x), int(gem.y + self.cam.y)), 5)
-                
-                for enemy in self.enemies:
-                    enemy.draw(screen, self.cam)
-                
-                for bullet in self.bullets:
-                    bullet.draw(screen, self.cam)
-                
-                # Снаряды врагов
-                if hasattr(self, 'enemy_bullets'):
-                    for eb in self.enemy_bullets:
-                        ex = int(eb['pos'].x + self.cam.x)
-                        ey = int(eb['pos'].y + self.cam.y)
-                        pygame.draw.circle(screen, eb['color'], (ex, ey), eb['size'])
-                
-                self.player.draw(screen, self.cam)
-                self.draw_ui()
-                self.draw_wave_complete()
-                
-                # Автоматически обновляем перерыв
-                if self.wave_system.update_break(self.dt):
-                    self.wave_system.start_wave()
-                    self.state = GameState.PLAY
+                # Игра продолжается, только не спавнятся враги;
+                # перерыв тикает в step() вместе с логикой
+                self.game_loop()
             
             elif self.state == GameState.PAUSE:
                 self.draw_background()
-                for gem in self.exp_gems:
-                    pygame.draw.circle(screen, COLORS["exp"], 
-                                     (int(gem.x + self.cam.x), int(gem.y + self.cam.y)), 5)
+                self.exp_gems.draw(screen, self.cam)
                 for enemy in self.enemies:
                     enemy.draw(screen, self.cam)
                 for bullet in self.bullets:
@@ -3500,6 +3549,8 @@ class Engine:
                 self.draw_pause()
             
             elif self.state == GameState.GAME_OVER:
+                if self.recorder is not None:
+                    self.finish_recording()
                 self.draw_game_over()
             
             # Рисуем курсор поверх всего
@@ -1,56 +1,305 @@
 import pygame
 import math
-from dataclasses import dataclass
-from typing import List, Tuple, Dict, Optional
+from typing import Callable, List, Tuple, Dict, Optional
+from itertools import islice
+from operator import itemgetter
+import heapq
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
 import random
+import numpy as np
 from config import *
-
-@dataclass
-class Particle:
-    pos: pygame.Vector2
-    vel: pygame.Vector2
-    color: Tuple[int, int, int]
-    lifetime: float
-    max_lifetime: float
-    size: float
+from render_cache import get_font, render_text, sprite_cache
+from spatial import FlowField, SpatialHash
 
 class ParticleSystem:
-    def __init__(self):
-        self.particles: List[Particle] = []
+    """Частицы в NumPy-буфере фиксированной ёмкости.
+
+    Живые частицы лежат непрерывным блоком [0, count) от старых к новым:
+    update сдвигает их одной векторной операцией и уплотняет блок маской,
+    а при переполнении emit вытесняет самые старые. Рисование — готовыми
+    спрайтами по (цвет, радиус, ступень прозрачности) через blits.
+    """
+
+    ALPHA_STEPS = 16
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)
+        self.max_lifetime = np.ones(capacity, dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.int16)   # индекс в palette
+        self.palette: List[Tuple[int, int, int]] = []
+        self._palette_index: Dict[Tuple[int, int, int], int] = {}
+        self._sprites: Dict[Tuple[int, int, int], pygame.Surface] = {}
+        self._rng = np.random.default_rng()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _color_index(self, color: Tuple[int, int, int]) -> int:
+        color = tuple(color[:3])
+        idx = self._palette_index.get(color)
+        if idx is None:
+            idx = len(self.palette)
+            self.palette.append(color)
+            self._palette_index[color] = idx
+        return idx
     
     def emit(self, pos: pygame.Vector2, count: int, color: Tuple[int, int, int], 
              speed_range: Tuple[float, float] = (2, 8)):
-        for _ in range(count):
-            angle = random.uniform(0, math.tau)
-            speed = random.uniform(*speed_range)
-            vel = pygame.Vector2(math.cos(angle) * speed, math.sin(angle) * speed)
-            lifetime = random.uniform(0.3, 0.8)
-            size = random.uniform(2, 5)
-            self.particles.append(Particle(
-                pos=pygame.Vector2(pos),
-                vel=vel,
-                color=color,
-                lifetime=lifetime,
-                max_lifetime=lifetime,
-                size=size
-            ))
+        count = min(int(count), self.capacity)
+        if count <= 0:
+            return
+        # Переполнение: вытесняем самые старые частицы
+        overflow = self.count + count - self.capacity
+        if overflow > 0:
+            self._keep(slice(overflow, self.count))
+        start, end = self.count, self.count + count
+        rng = self._rng
+        angle = rng.uniform(0, math.tau, count)
+        speed = rng.uniform(speed_range[0], speed_range[1], count)
+        lifetime = rng.uniform(0.3, 0.8, count)
+        self.pos[start:end] = (pos[0], pos[1])
+        self.vel[start:end, 0] = np.cos(angle) * speed
+        self.vel[start:end, 1] = np.sin(angle) * speed
+        self.lifetime[start:end] = lifetime
+        self.max_lifetime[start:end] = lifetime
+        self.size[start:end] = rng.uniform(2, 5, count)
+        self.color[start:end] = self._color_index(color)
+        self.count = end
+    
+    def emit_many(self, positions: np.ndarray, counts, colors: List[Tuple[int, int, int]]):
+        """Несколько вспышек одним вызовом: counts[i] частиц цвета colors[i]
+        из positions[i] (N×2), скорость по умолчанию"""
+        counts = np.asarray(counts, dtype=np.int64)
+        total = int(counts.sum())
+        if total <= 0:
+            return
+        if total > self.capacity:
+            # Не влезают все — оставляем последние вспышки целиком
+            keep = np.flatnonzero(np.cumsum(counts[::-1]) <= self.capacity)
+            first = len(counts) - len(keep)
+            positions, counts, colors = positions[first:], counts[first:], colors[first:]
+            total = int(counts.sum())
+        overflow = self.count + total - self.capacity
+        if overflow > 0:
+            self._keep(slice(overflow, self.count))
+        start, end = self.count, self.count + total
+        rng = self._rng
+        angle = rng.uniform(0, math.tau, total)
+        speed = rng.uniform(2, 8, total)
+        lifetime = rng.uniform(0.3, 0.8, total)
+        self.pos[start:end] = np.repeat(positions, counts, axis=0)
+        self.vel[start:end, 0] = np.cos(angle) * speed
+        self.vel[start:end, 1] = np.sin(angle) * speed
+        self.lifetime[start:end] = lifetime
+        self.max_lifetime[start:end] = lifetime
+        self.size[start:end] = rng.uniform(2, 5, total)
+        self.color[start:end] = np.repeat([self._color_index(c) for c in colors], counts)
+        self.count = end
+    
+    def _keep(self, sel):
+        """Уплотняет живой блок: оставляет строки sel (срез или маска) в начале"""
+        n = self.count
+        kept = 0
+        for arr in (self.pos, self.vel, self.lifetime, self.max_lifetime, self.size, self.color):
+            rows = arr[:n][sel]
+            kept = len(rows)
+            arr[:kept] = rows
+        self.count = kept
     
     def update(self, dt: float):
-        for p in self.particles[:]:
-            p.pos += p.vel
-            p.vel *= 0.95
-            p.lifetime -= dt
-            if p.lifetime <= 0:
-                self.particles.remove(p)
+        n = self.count
+        if n == 0:
+            return
+        k = dt * BASE_HZ
+        self.pos[:n] += self.vel[:n] * k
+        self.vel[:n] *= 0.95 ** k
+        lifetime = self.lifetime[:n]
+        lifetime -= dt
+        alive = lifetime > 0
+        if not alive.all():
+            self._keep(alive)
     
-    def draw(self, surf: pygame.Surface, offset: pygame.Vector2):
-        for p in self.particles:
-            alpha = int((p.lifetime / p.max_lifetime) * 255)
-            color = (*p.color, alpha)
-            s = pygame.Surface((int(p.size * 2), int(p.size * 2)), pygame.SRCALPHA)
-            pygame.draw.circle(s, color, (int(p.size), int(p.size)), int(p.size))
-            surf.blit(s, (p.pos.x + offset.x - p.size, p.pos.y + offset.y - p.size))
+    def _sprite(self, color_idx: int, radius: int, alpha_step: int) -> pygame.Surface:
+        key = (color_idx, radius, alpha_step)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            alpha = min(255, alpha_step * 256 // self.ALPHA_STEPS + 8)
+            sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*self.palette[color_idx], alpha), (radius, radius), radius)
+            self._sprites[key] = sprite
+        return sprite
+    
+    def draw(self, surf: pygame.Surface, offset: pygame.Vector2) -> int:
+        """Рисует частицы в пределах surf; возвращает число отсечённых"""
+        n = self.count
+        if n == 0:
+            return 0
+        radius = self.size[:n].astype(np.int32)
+        x = self.pos[:n, 0] + (offset[0] - radius)
+        y = self.pos[:n, 1] + (offset[1] - radius)
+        width, height = surf.get_size()
+        on_screen = (x > -2 * radius) & (x < width) & (y > -2 * radius) & (y < height)
+        idx = np.flatnonzero(on_screen)
+        steps = (self.lifetime[idx] / self.max_lifetime[idx] * self.ALPHA_STEPS).astype(np.int32)
+        np.clip(steps, 0, self.ALPHA_STEPS - 1, out=steps)
+        sprite = self._sprite
+        surf.blits([(sprite(c, r, a), (px, py)) for c, r, a, px, py in
+                    zip(self.color[idx].tolist(), radius[idx].tolist(), steps.tolist(),
+                        x[idx].tolist(), y[idx].tolist())],
+                   doreturn=False)
+        return n - len(idx)
+
+class GemStore:
+    """Кристаллы опыта в NumPy-массивах.
+
+    value — сколько обычных кристаллов в одном: когда кристаллов больше
+    GEM_CAP, лежащие в одной клетке GEM_MERGE_CELL сливаются в один
+    (значения складываются, позиция — взвешенное среднее). Притяжение и
+    подбор — векторные операции над живым блоком [0, count).
+    """
+
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.value = np.zeros(capacity, dtype=np.int64)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __bool__(self) -> bool:
+        return self.count > 0
+    
+    def __iter__(self):
+        """Позиции кристаллов (копии)"""
+        return (pygame.Vector2(x, y) for x, y in self.pos[:self.count].tolist())
+    
+    def spawn(self, pos, value: int = 1):
+        if self.count == self.capacity:
+            self.capacity *= 2
+            self.pos = np.resize(self.pos, (self.capacity, 2))
+            self.value = np.resize(self.value, self.capacity)
+        i = self.count
+        self.pos[i] = (pos[0], pos[1])
+        self.value[i] = value
+        self.count += 1
+    
+    def spawn_many(self, positions: np.ndarray, value: int = 1):
+        """Кристаллы в точках positions (N×2) одной записью в колонки"""
+        k = len(positions)
+        if k == 0:
+            return
+        while self.count + k > self.capacity:
+            self.capacity *= 2
+            self.pos = np.resize(self.pos, (self.capacity, 2))
+            self.value = np.resize(self.value, self.capacity)
+        i = self.count
+        self.pos[i:i + k] = positions
+        self.value[i:i + k] = value
+        self.count += k
+    
+    def clear(self):
+        self.count = 0
+    
+    def _keep(self, sel):
+        n = self.count
+        pos = self.pos[:n][sel]
+        kept = len(pos)
+        self.pos[:kept] = pos
+        self.value[:kept] = self.value[:n][sel]
+        self.count = kept
+    
+    def update(self, target: pygame.Vector2, magnet_radius: float, dt: float) -> int:
+        """Притягивает кристаллы в радиусе магнита к target и подбирает те,
+        что были ближе 20 px; возвращает число подобранных обычных кристаллов"""
+        n = self.count
+        if n == 0:
+            return 0
+        pos = self.pos[:n]
+        d = np.array((target.x, target.y)) - pos
+        dist = np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1])
+        pulled = np.flatnonzero(dist < magnet_radius)
+        if pulled.size:
+            dp = dist[pulled]
+            pull_speed = 8 + (1 - dp / magnet_radius) * 12
+            # Кристалл ровно на игроке не сдвигается (и подбирается ниже)
+            step = np.divide(pull_speed * (dt * BASE_HZ), dp, out=np.zeros_like(dp), where=dp > 0)
+            pos[pulled] += d[pulled] * step[:, None]
+        picked = dist < 20
+        collected = 0
+        if picked.any():
+            collected = int(self.value[:n][picked].sum())
+            self._keep(~picked)
+        cell = GEM_MERGE_CELL
+        while self.count > GEM_CAP:
+            self.merge(cell)
+            cell *= 2  # одной клетки не хватило — сливаем крупнее
+        return collected
+    
+    def merge(self, cell: float = GEM_MERGE_CELL):
+        """Сливает кристаллы, лежащие в одной клетке сетки"""
+        n = self.count
+        keys = np.floor(self.pos[:n] / cell).astype(np.int64)
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        m = len(first)
+        if m == n:
+            return
+        inverse = inverse.reshape(-1)
+        value = self.value[:n]
+        weight = value.astype(np.float64)
+        total = np.bincount(inverse, weights=weight, minlength=m)
+        x = np.bincount(inverse, weights=self.pos[:n, 0] * weight, minlength=m) / total
+        y = np.bincount(inverse, weights=self.pos[:n, 1] * weight, minlength=m) / total
+        # Порядок — по первому кристаллу клетки
+        order = np.argsort(first)
+        self.pos[:m, 0] = x[order]
+        self.pos[:m, 1] = y[order]
+        self.value[:m] = total[order].astype(np.int64)
+        self.count = m
+    
+    @staticmethod
+    def _sprite(tier: int) -> pygame.Surface:
+        """Свечение и ядро кристалла; крупнее для слитых (ступень tier)"""
+        key = ("gem", tier)
+        sprite = sprite_cache.get(key)
+        if sprite is None:
+            glow_r = 12 + tier * 3
+            core_r = 5 + tier
+            half = glow_r + 3
+            sprite = pygame.Surface((half * 2, half * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*COLORS["exp_glow"], 80), (half, half), glow_r)
+            pygame.draw.circle(sprite, COLORS["exp"], (half, half), core_r)
+            sprite_cache.put(key, sprite)
+        return sprite
+    
+    def draw(self, surf: pygame.Surface, offset: pygame.Vector2) -> int:
+        """Рисует кристаллы в пределах surf; возвращает число отсечённых"""
+        n = self.count
+        if n == 0:
+            return 0
+        x = self.pos[:n, 0] + offset[0]
+        y = self.pos[:n, 1] + offset[1]
+        width, height = surf.get_size()
+        idx = np.flatnonzero((x >= -GEM_DRAW_REACH) & (x <= width + GEM_DRAW_REACH) &
+                             (y >= -GEM_DRAW_REACH) & (y <= height + GEM_DRAW_REACH))
+        tiers = np.minimum(np.log2(self.value[idx]).astype(np.int32), GEM_MAX_TIER)
+        sprite = self._sprite
+        blits = []
+        for tier, gx, gy in zip(tiers.tolist(), x[idx].tolist(), y[idx].tolist()):
+            image = sprite(tier)
+            half = image.get_width() // 2
+            blits.append((image, (int(gx) - half, int(gy) - half)))
+        surf.blits(blits, doreturn=False)
+        return n - len(idx)
+
 
 class GameObject(ABC):
     def __init__(self, pos: pygame.Vector2):
@@ -66,6 +315,9 @@ class GameObject(ABC):
         pass
 
 
+_FACING_STEP = 3  # градусов на ступень поворота спрайта игрока
+
+
 class Player(GameObject):
     def __init__(self, modules: dict, skin_id: str = "default"):
         super().__init__(pygame.Vector2(WIDTH // 2, HEIGHT // 2))
@@ -77,10 +329,12 @@ class Player(GameObject):
         self.speed = 6.5 + modules.get("speed", 0) * 0.5
         self.dmg = 10 + modules.get("damage", 0) * 2
         self.velocity = pygame.Vector2(0, 0)
+        self.prev_pos = pygame.Vector2(self.pos)  # Позиция на прошлом тике (для интерполяции)
         self.facing_angle = 0
         
         self.fire_rate = max(100, 250 - modules.get("fire_rate", 0) * 5)
-        self.last_shot = 0
+        self.last_shot = float("-inf")  # мс по часам симуляции
+        self.orbit_phase = 0.0  # Угол орбитальных снарядов (рад), растёт на 1 рад/с
         self.bullet_speed = 15
         self.bullet_lifetime = 1000
         self.crit_chance = 0.1 + modules.get("crit", 0) * 0.02
@@ -191,7 +445,8 @@ class Player(GameObject):
                 self.heal(heal_amount)
                 self.regen_accumulator -= heal_amount
         
-        self.velocity *= 0.85
+        self.velocity *= 0.85 ** (dt * BASE_HZ)
+        self.orbit_phase = (self.orbit_phase + dt) % 6.28
     
     def dash(self, direction: pygame.Vector2):
         if self.dash_ready and direction.length() > 0:
@@ -202,16 +457,8 @@ class Player(GameObject):
             return True
         return False
     
-    def draw(self, surf: pygame.Surface, offset: pygame.Vector2):
-        m_pos = pygame.mouse.get_pos()
-        rel = pygame.Vector2(m_pos) - (self.pos + offset)
-        if rel.length() > 0:
-            self.facing_angle = math.degrees(math.atan2(rel.y, rel.x))
-        
-        if self.invulnerable > 0 and int(self.invulnerable / 100) % 2 == 0:
-            return
-        
-        # Разные формы для разных скинов
+    def _hull_points(self) -> List[pygame.Vector2]:
+        """Контур корабля для текущего скина (нос смотрит вправо)"""
         if self.skin_id == "default":
             pts = [
                 pygame.Vector2(32, 0), pygame.Vector2(20, -8),
@@ -297,27 +544,56 @@ class Player(GameObject):
                 pygame.Vector2(-18, 15), pygame.Vector2(20, 8),
             ]
         
-        rotated = [p.rotate(self.facing_angle) + self.pos + offset for p in pts]
+        return pts
+    
+    def _render_hull(self, color: Tuple[int, int, int], angle: float) -> pygame.Surface:
+        pts = [p.rotate(angle) for p in self._hull_points()]
+        half = int(max(p.length() for p in pts)) + 2
+        sprite = pygame.Surface((half * 2 + 1, half * 2 + 1), pygame.SRCALPHA)
+        center = pygame.Vector2(half, half)
+        rotated = [p + center for p in pts]
+        pygame.draw.polygon(sprite, color, rotated)
+        pygame.draw.polygon(sprite, self.glow_color, rotated, 2)
+        return sprite
+    
+    def draw(self, surf: pygame.Surface, offset: pygame.Vector2):
+        m_pos = pygame.mouse.get_pos()
+        rel = pygame.Vector2(m_pos) - (self.pos + offset)
+        if rel.length() > 0:
+            self.facing_angle = math.degrees(math.atan2(rel.y, rel.x))
+        
+        if self.invulnerable > 0 and int(self.invulnerable / 100) % 2 == 0:
+            return
         
+        x = self.pos.x + offset.x
+        y = self.pos.y + offset.y
         if self.shield > 0:
-            glow_surf = pygame.Surface((80, 80), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surf, (*COLORS["shield"], 30), (40, 40), 35)
-            surf.blit(glow_surf, (self.pos.x + offset.x - 40, self.pos.y + offset.y - 40))
+            glow = sprite_cache.get(("player_shield",))
+            if glow is None:
+                glow = pygame.Surface((80, 80), pygame.SRCALPHA)
+                pygame.draw.circle(glow, (*COLORS["shield"], 30), (40, 40), 35)
+                sprite_cache.put(("player_shield",), glow)
+            surf.blit(glow, (x - 40, y - 40))
         
         color = self.color
         if self.hit_flash > 0:
-            flash_intensity = int((self.hit_flash / 200) * 255)
+            flash_intensity = int((self.hit_flash / 200) * 255) // 32 * 32
             color = (255, flash_intensity, flash_intensity)
         
-        pygame.draw.polygon(surf, color, rotated)
-        pygame.draw.polygon(surf, self.glow_color, rotated, 2)
+        # Корпус: готовый спрайт по (скин, цвет, ступень поворота)
+        angle_step = round(self.facing_angle / _FACING_STEP) % (360 // _FACING_STEP)
+        key = ("player", self.skin_id, color, self.glow_color, angle_step)
+        sprite = sprite_cache.get(key)
+        if sprite is None:
+            sprite = sprite_cache.put(key, self._render_hull(color, angle_step * _FACING_STEP))
+        half = sprite.get_width() // 2
+        surf.blit(sprite, (x - half, y - half))
         
         # Орбитальные пули
         if hasattr(self, 'orbital_bullets') and self.orbital_bullets > 0:
-            time_ms = pygame.time.get_ticks()
             orbit_radius = 50
             for i in range(self.orbital_bullets):
-                angle = (time_ms / 1000 + i * (6.28 / self.orbital_bullets)) % 6.28
+                angle = (self.orbit_phase + i * (6.28 / self.orbital_bullets)) % 6.28
                 orb_x = self.pos.x + offset.x + math.cos(angle) * orbit_radius
                 orb_y = self.pos.y + offset.y + math.sin(angle) * orbit_radius
                 pygame.draw.circle(surf, COLORS["player"], (int(orb_x), int(orb_y)), 8)
@@ -330,249 +606,301 @@ class EnemyShape(Enum):
     HEXAGON = "hexagon"
     DIAMOND = "diamond"
 
+class Behaviour:
+    """Флаги поведения архетипа врага (битовая маска EnemyArchetype.flags)"""
+    RANGED = 1        # держит дистанцию и стреляет (EnemyArchetype.shot)
+    SUPPORT = 2       # держится у союзников, раз в aura_interval действует аура
+    SHIELDER = 4      # аура: щит союзникам + персональный щит
+    HEALER = 8        # аура: лечение союзников
+    BUFFER = 16       # аура: ускорение союзников
+    BERSERK = 32      # ярость при <40% HP
+    PHASING = 64      # периодически неуязвим
+    LEECH = 128       # лечится, ударив игрока
+    HP_BAR = 256      # полоска HP видна и при полном здоровье
+
+    # Врагу нужен персональный Enemy.update; остальные — чистые преследователи
+    SPECIAL = RANGED | SUPPORT | BERSERK | PHASING
+
+
+@dataclass(frozen=True)
+class EnemyShot:
+    """Выстрел дальнобойного врага"""
+    range: float              # дальше не стреляет (кулдаун всё равно идёт)
+    speed: float              # px за тик 60 Гц
+    lifetime: float           # мс
+    size: int
+    lead: float = 0.0         # доля упреждения по скорости игрока
+    color: Optional[Tuple[int, int, int]] = None  # None — цвет врага
+    lobbed: bool = False      # мортира: взрыв в точке, где был игрок
+    # Усиление с ранга EnemyArchetype.empower_at
+    empowered_volley: int = 1             # снарядов веером
+    empowered_armor_pierce: bool = False  # игнорирует неуязвимость игрока
+
+
+@dataclass(frozen=True)
+class EnemyArchetype:
+    """Неизменяемое описание типа врага.
+
+    Статы на спавне: max_hp = int(hp × ранг), speed = speed + speed_scale × ранг,
+    dmg = int(dmg + dmg_scale × ранг); scaled — такие же кривые
+    (имя, база, коэффициент) для прочих полей экземпляра.
+    """
+    type_id: int
+    name: str
+    display_name: str
+    tier: int
+    faction: str
+    color: Tuple[int, int, int]
+    size: int
+    shape: EnemyShape
+    exp_value: int
+    hp: float
+    speed: float
+    speed_scale: float
+    dmg: int
+    dmg_scale: float
+    flags: int = 0
+    # Ранг, с которого включается особая способность (Enemy.empowered)
+    empower_at: float = math.inf
+    damage_reduction: float = 0.0
+    scaled: Tuple[Tuple[str, float, float], ...] = ()
+    # Дальний бой
+    shot: Optional[EnemyShot] = None
+    preferred_range: float = 0
+    shoot_interval: float = 0
+    # Аура поддержки
+    aura_radius: float = 0
+    aura_interval: float = 0
+    ally_distance: float = 0  # на каком расстоянии держаться от ближайшего союзника
+    # Фазирование
+    phase_interval: float = 0
+    phase_duration: float = 0
+
+    def stats(self, difficulty_mult: float) -> tuple:
+        """(max_hp, speed, dmg, empowered, scaled) для ранга; кэшируется"""
+        return _archetype_stats(self, difficulty_mult)
+
+
+@lru_cache(maxsize=1024)
+def _archetype_stats(arch: EnemyArchetype, mult: float) -> tuple:
+    return (int(arch.hp * mult),
+            arch.speed + mult * arch.speed_scale,
+            int(arch.dmg + mult * arch.dmg_scale),
+            mult >= arch.empower_at,
+            tuple((name, int(base + mult * k)) for name, base, k in arch.scaled))
+
+
+# Фракции и их цвета:
+# "Рой" (Swarm) - красно-оранжевые оттенки: базовые враги, рои, быстрые
+# "Теневые" (Shadow) - пурпурно-тёмные: призраки, паразиты, снайперы
+# "Элита" (Elite) - синие/бирюзовые: рейнджеры, танки, берсерки
+# "Командиры" (Command) - золото/фиолетовые: щитоносцы, часовые, боссы
+# "Поддержка" (Support) - зелёные/жёлтые: хилеры, усилители
+_ARCHETYPES = (
+    # С ранга 3: при смерти ускоряет ближних врагов
+    dict(name="basic", display_name="Дрон", tier=1, faction="Рой", color=(255, 46, 99),
+         size=20, shape=EnemyShape.CIRCLE, exp_value=10,
+         hp=30, speed=2.5, speed_scale=0.3, dmg=8, dmg_scale=1.5, empower_at=3.0),
+    # С ранга 2: уклонение при низком HP
+    dict(name="fast", display_name="Стремительный", tier=1, faction="Рой", color=(255, 200, 40),
+         size=15, shape=EnemyShape.TRIANGLE, exp_value=15,
+         hp=20, speed=5.0, speed_scale=0.5, dmg=5, dmg_scale=1, empower_at=2.0),
+    # Тяжёлая броня снижает 20% урона
+    dict(name="tank", display_name="Бронетанк", tier=3, faction="Элита", color=(40, 140, 255),
+         size=30, shape=EnemyShape.SQUARE, exp_value=30,
+         hp=100, speed=1.5, speed_scale=0.2, dmg=10, dmg_scale=2,
+         flags=Behaviour.HP_BAR, damage_reduction=0.20),
+    dict(name="boss", display_name="Повелитель", tier=5, faction="Командиры", color=(150, 0, 255),
+         size=50, shape=EnemyShape.HEXAGON, exp_value=200,
+         hp=500, speed=2.0, speed_scale=0.3, dmg=18, dmg_scale=4,
+         flags=Behaviour.HP_BAR),
+    # Держится далеко, стреляет с упреждением; с ранга 2 пуля пробивает неуязвимость
+    dict(name="sniper", display_name="Охотник", tier=2, faction="Теневые", color=(180, 40, 220),
+         size=18, shape=EnemyShape.DIAMOND, exp_value=25,
+         hp=45, speed=1.2, speed_scale=0.15, dmg=18, dmg_scale=3,
+         flags=Behaviour.RANGED, empower_at=2.0,
+         shot=EnemyShot(range=700, speed=8, lifetime=2000, size=8, lead=0.6,
+                       empowered_armor_pierce=True),
+         preferred_range=500, shoot_interval=2500),
+    dict(name="swarm", display_name="Личинка", tier=1, faction="Рой", color=(255, 120, 30),
+         size=11, shape=EnemyShape.CIRCLE, exp_value=8,
+         hp=12, speed=6.5, speed_scale=0.6, dmg=3, dmg_scale=0.5),
+    # Периодически входит в фазу неуязвимости
+    dict(name="ghost", display_name="Фантом", tier=2, faction="Теневые", color=(140, 50, 200),
+         size=22, shape=EnemyShape.HEXAGON, exp_value=20,
+         hp=35, speed=3.5, speed_scale=0.4, dmg=12, dmg_scale=2,
+         flags=Behaviour.PHASING, phase_interval=3000, phase_duration=800),
+    # Ускоряется при <40% HP
+    dict(name="bruiser", display_name="Берсерк", tier=3, faction="Элита", color=(60, 160, 240),
+         size=35, shape=EnemyShape.SQUARE, exp_value=45,
+         hp=160, speed=2.2, speed_scale=0.25, dmg=15, dmg_scale=3,
+         flags=Behaviour.BERSERK | Behaviour.HP_BAR),
+    dict(name="leech", display_name="Паразит", tier=2, faction="Теневые", color=(220, 50, 200),
+         size=18, shape=EnemyShape.TRIANGLE, exp_value=20,
+         hp=55, speed=3.0, speed_scale=0.3, dmg=7, dmg_scale=1.5,
+         flags=Behaviour.LEECH, scaled=(("leech_heal", 8, 2),)),
+    dict(name="bomber", display_name="Камикадзе", tier=3, faction="Рой", color=(255, 80, 20),
+         size=27, shape=EnemyShape.CIRCLE, exp_value=35,
+         hp=50, speed=1.8, speed_scale=0.2, dmg=25, dmg_scale=4),
+    dict(name="sentinel", display_name="Часовой", tier=4, faction="Командиры", color=(100, 50, 255),
+         size=40, shape=EnemyShape.HEXAGON, exp_value=80,
+         hp=280, speed=0.7, speed_scale=0.1, dmg=20, dmg_scale=4,
+         flags=Behaviour.HP_BAR),
+    # Тройной выстрел с ранга 3
+    dict(name="ranger", display_name="Рейнджер", tier=2, faction="Элита", color=(60, 200, 220),
+         size=20, shape=EnemyShape.DIAMOND, exp_value=30,
+         hp=50, speed=1.5, speed_scale=0.15, dmg=16, dmg_scale=2.5,
+         flags=Behaviour.RANGED, empower_at=3.0,
+         shot=EnemyShot(range=600, speed=5, lifetime=2500, size=7, lead=0.35,
+                       empowered_volley=3),
+         preferred_range=350, shoot_interval=2000),
+    # Стреляет с дальней дистанции
+    dict(name="lancer", display_name="Ланцет", tier=2, faction="Элита", color=(80, 220, 180),
+         size=16, shape=EnemyShape.TRIANGLE, exp_value=28,
+         hp=40, speed=2.0, speed_scale=0.2, dmg=12, dmg_scale=2,
+         flags=Behaviour.RANGED,
+         shot=EnemyShot(range=600, speed=6, lifetime=2000, size=6),
+         preferred_range=400, shoot_interval=3000),
+    dict(name="mortar", display_name="Мортирщик", tier=3, faction="Командиры", color=(120, 80, 200),
+         size=28, shape=EnemyShape.SQUARE, exp_value=40,
+         hp=70, speed=0.6, speed_scale=0.05, dmg=22, dmg_scale=3,
+         flags=Behaviour.RANGED,
+         shot=EnemyShot(range=700, speed=3.5, lifetime=2000, size=12, color=(255, 140, 0), lobbed=True),
+         preferred_range=500, shoot_interval=3500),
+    # Щит союзникам раз в 1.5 с и собственный щит
+    dict(name="shielder", display_name="Щитоносец", tier=3, faction="Командиры", color=(80, 200, 255),
+         size=35, shape=EnemyShape.HEXAGON, exp_value=60,
+         hp=200, speed=1.0, speed_scale=0.1, dmg=8, dmg_scale=1.5,
+         flags=Behaviour.SUPPORT | Behaviour.SHIELDER, scaled=(("personal_shield", 0, 100),),
+         aura_radius=220, aura_interval=1500, ally_distance=154),
+    # Лечит союзников в ауре каждые 2 сек
+    dict(name="healer", display_name="Регенератор", tier=3, faction="Поддержка", color=(50, 220, 100),
+         size=22, shape=EnemyShape.CIRCLE, exp_value=50,
+         hp=65, speed=1.8, speed_scale=0.15, dmg=6, dmg_scale=1,
+         flags=Behaviour.SUPPORT | Behaviour.HEALER, scaled=(("heal_amount", 0, 8),),
+         aura_radius=200, aura_interval=2000, ally_distance=140),
+    # Даёт союзникам +40% к скорости
+    dict(name="buffer", display_name="Усилитель", tier=3, faction="Поддержка", color=(220, 200, 50),
+         size=20, shape=EnemyShape.DIAMOND, exp_value=55,
+         hp=55, speed=1.5, speed_scale=0.1, dmg=5, dmg_scale=0.8,
+         flags=Behaviour.SUPPORT | Behaviour.BUFFER,
+         aura_radius=180, aura_interval=3000, ally_distance=140),
+)
+
+# Реестр архетипов: имя типа -> EnemyArchetype; ENEMY_ARCHETYPE_LIST[type_id]
+ENEMY_ARCHETYPE_LIST = tuple(EnemyArchetype(type_id=i, **spec) for i, spec in enumerate(_ARCHETYPES))
+ENEMY_ARCHETYPES = MappingProxyType({arch.name: arch for arch in ENEMY_ARCHETYPE_LIST})
+_ARCHETYPE_FLAGS = np.array([arch.flags for arch in ENEMY_ARCHETYPE_LIST], dtype=np.int64)
+
+
+class _Column:
+    """Поле врага: до вставки в EnemyStore живёт в __dict__, после — в колонке"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        store = obj._store
+        if store is None:
+            try:
+                return obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name) from None
+        return store.columns[self.name].item(obj._slot)
+
+    def __set__(self, obj, value):
+        store = obj._store
+        if store is None:
+            obj.__dict__[self.name] = value
+        else:
+            store.columns[self.name][obj._slot] = value
+
+
+class _PosColumn(_Column):
+    """Позиция врага. Возвращается копией: менять только присваиванием (pos += ...)"""
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        store = obj._store
+        if store is None:
+            return obj.__dict__["pos"]
+        xy = store.pos
+        return pygame.Vector2(xy.item(obj._slot, 0), xy.item(obj._slot, 1))
+
+    def __set__(self, obj, value):
+        store = obj._store
+        if store is None:
+            obj.__dict__["pos"] = pygame.Vector2(value)
+        else:
+            store.pos[obj._slot] = (value[0], value[1])
+
+
 class Enemy(GameObject):
+    # Поля, которые EnemyStore держит в NumPy-колонках
+    pos = _PosColumn()
+    hp = _Column()
+    speed = _Column()
+    size = _Column()
+    slow_factor = _Column()
+    frozen_duration = _Column()
+    slow_duration = _Column()
+    poison_duration = _Column()
+    poison_damage = _Column()
+    poison_accum = _Column()
+    hit_flash = _Column()
+    rotation = _Column()
+    chain_lightning_timer = _Column()
+    chain_lightning_target = _Column()
+    speed_buff_timer = _Column()
+
+    _store = None
+    _slot = -1
+    handle = -1      # метка EnemyStore.get, выдаётся при append
+    dying = False    # убит в этом тике, ждёт EnemyStore.flush
+
+    # Поля, которые есть не у всех типов: значения по умолчанию на классе
+    is_miniboss = False  # выставляется извне
+    empowered = False
+    leech_heal = 0
+    personal_shield = 0
+    max_personal_shield = 0
+    heal_amount = 0
+    shoot_cooldown = 0
+    aura_timer = 0
+    phase_timer = 0
+    is_phasing = False
+    berserk_triggered = False
+    _base_speed_saved = None  # скорость до баффа усилителя
+
     def __init__(self, pos: pygame.Vector2, enemy_type: str = "basic", 
                  difficulty_mult: float = 1.0, shape: Optional[EnemyShape] = None):
         super().__init__(pos)
+        arch = ENEMY_ARCHETYPES.get(enemy_type)
+        if arch is None:
+            raise ValueError(f"неизвестный тип врага: {enemy_type}")
+        self.arch = arch
         self.type = enemy_type
+        self.type_id = arch.type_id
+        self.display_name = arch.display_name
+        self.tier = arch.tier
+        self.faction = arch.faction
         self.hit_flash = 0
         self.rotation = 0
         
-        # Таблица имён, уровней и фракций
-        # Фракции и их цвета:
-        # "Рой" (Swarm) - красно-оранжевые оттенки: базовые враги, рои, быстрые
-        # "Теневые" (Shadow) - пурпурно-тёмные: призраки, паразиты, снайперы
-        # "Элита" (Elite) - синие/бирюзовые: рейнджеры, танки, берсерки
-        # "Командиры" (Command) - золото/фиолетовые: щитоносцы, часовые, боссы
-        # "Поддержка" (Support) - зелёные/жёлтые: хилеры, усилители
-        _ENEMY_META = {
-            "basic":    ("Дрон",         1, "Рой"),
-            "swarm":    ("Личинка",      1, "Рой"),
-            "fast":     ("Стремительный",1, "Рой"),
-            "sniper":   ("Охотник",      2, "Теневые"),
-            "ghost":    ("Фантом",       2, "Теневые"),
-            "leech":    ("Паразит",      2, "Теневые"),
-            "tank":     ("Бронетанк",    3, "Элита"),
-            "bruiser":  ("Берсерк",      3, "Элита"),
-            "ranger":   ("Рейнджер",     2, "Элита"),
-            "lancer":   ("Ланцет",       2, "Элита"),
-            "bomber":   ("Камикадзе",    3, "Рой"),
-            "sentinel": ("Часовой",      4, "Командиры"),
-            "boss":     ("Повелитель",   5, "Командиры"),
-            "mortar":   ("Мортирщик",    3, "Командиры"),
-            "shielder": ("Щитоносец",    3, "Командиры"),
-            "healer":   ("Регенератор",  3, "Поддержка"),
-            "buffer":   ("Усилитель",    3, "Поддержка"),
-        }
-        _meta = _ENEMY_META.get(enemy_type, (enemy_type.capitalize(), 1, "?"))
-        self.display_name = _meta[0]
-        self.tier = _meta[1]
-        self.faction = _meta[2]
-        self.is_miniboss = False  # будет выставлено извне
-        
-        # Базовая статистика в зависимости от типа
-        if enemy_type == "basic":
-            self.max_hp = int(30 * difficulty_mult)
-            self.speed = 2.5 + difficulty_mult * 0.3
-            self.dmg = 8 + int(difficulty_mult * 1.5)
-            self.exp_value = 10
-            self.color = (255, 46, 99)    # Красный — Рой
-            self.size = 20
-            self.shape = EnemyShape.CIRCLE
-            # Особая способность с ранга 3+: при смерти ускоряет ближних врагов
-            self.on_death_buff = (difficulty_mult >= 3.0)
-        elif enemy_type == "fast":
-            self.max_hp = int(20 * difficulty_mult)
-            self.speed = 5.0 + difficulty_mult * 0.5
-            self.dmg = 5 + int(difficulty_mult * 1)
-            self.exp_value = 15
-            self.color = (255, 200, 40)   # Жёлто-оранжевый — Рой
-            self.size = 15
-            self.shape = EnemyShape.TRIANGLE
-            # Особая способность с ранга 2: уклонение при низком HP
-            self.evade_hp_threshold = 0.25 if difficulty_mult >= 2.0 else 0
-        elif enemy_type == "tank":
-            self.max_hp = int(100 * difficulty_mult)
-            self.speed = 1.5 + difficulty_mult * 0.2
-            self.dmg = 10 + int(difficulty_mult * 2)
-            self.exp_value = 30
-            self.color = (40, 140, 255)   # Синий — Элита
-            self.size = 30
-            self.shape = EnemyShape.SQUARE
-            # Особая способность: тяжёлая броня снижает 20% урона
-            self.damage_reduction = 0.20
-        elif enemy_type == "boss":
-            self.max_hp = int(500 * difficulty_mult)
-            self.speed = 2.0 + difficulty_mult * 0.3
-            self.dmg = 18 + int(difficulty_mult * 4)
-            self.exp_value = 200
-            self.color = (150, 0, 255)    # Фиолетовый — Командиры
-            self.size = 50
-            self.shape = EnemyShape.HEXAGON
-            # Особая способность: периодически призывает рой
-            self.summon_timer = 0
-            self.summon_interval = 5000
-        elif enemy_type == "sniper":
-            # Снайпер: держится далеко, стреляет прицельными снарядами
-            self.max_hp = int(45 * difficulty_mult)
-            self.speed = 1.2 + difficulty_mult * 0.15
-            self.dmg = 18 + int(difficulty_mult * 3)
-            self.exp_value = 25
-            self.color = (180, 40, 220)   # Тёмно-фиолетовый — Теневые
-            self.size = 18
-            self.shape = EnemyShape.DIAMOND
-            self.preferred_range = 500
-            self.shoot_cooldown = 0
-            self.shoot_interval = 2500
-            # Особая способность с ранга 2: пуля пробивает неуязвимость
-            self.armor_pierce = (difficulty_mult >= 2.0)
-        elif enemy_type == "swarm":
-            self.max_hp = int(12 * difficulty_mult)
-            self.speed = 6.5 + difficulty_mult * 0.6
-            self.dmg = 3 + int(difficulty_mult * 0.5)
-            self.exp_value = 8
-            self.color = (255, 120, 30)   # Оранжевый — Рой
-            self.size = 11
-            self.shape = EnemyShape.CIRCLE
-        elif enemy_type == "ghost":
-            # Призрак: периодически входит в фазу неуязвимости
-            self.max_hp = int(35 * difficulty_mult)
-            self.speed = 3.5 + difficulty_mult * 0.4
-            self.dmg = 12 + int(difficulty_mult * 2)
-            self.exp_value = 20
-            self.color = (140, 50, 200)   # Тёмно-пурпурный — Теневые
-            self.size = 22
-            self.shape = EnemyShape.HEXAGON
-            # Фазирование
-            self.phase_timer = 0
-            self.phase_interval = 3000
-            self.phase_duration = 800
-            self.is_phasing = False
-        elif enemy_type == "bruiser":
-            # Берсерк: ускоряется при низком HP
-            self.max_hp = int(160 * difficulty_mult)
-            self.speed = 2.2 + difficulty_mult * 0.25
-            self.base_speed = 2.2 + difficulty_mult * 0.25
-            self.dmg = 15 + int(difficulty_mult * 3)
-            self.exp_value = 45
-            self.color = (60, 160, 240)   # Синий — Элита
-            self.size = 35
-            self.shape = EnemyShape.SQUARE
-            # Берсерк-режим при <40% HP
-            self.berserk_triggered = False
-        elif enemy_type == "leech":
-            self.max_hp = int(55 * difficulty_mult)
-            self.speed = 3.0 + difficulty_mult * 0.3
-            self.dmg = 7 + int(difficulty_mult * 1.5)
-            self.exp_value = 20
-            self.color = (220, 50, 200)   # Пурпурный — Теневые
-            self.size = 18
-            self.shape = EnemyShape.TRIANGLE
-            self.leech_heal = 8 + int(difficulty_mult * 2)
-        elif enemy_type == "bomber":
-            self.max_hp = int(50 * difficulty_mult)
-            self.speed = 1.8 + difficulty_mult * 0.2
-            self.dmg = 25 + int(difficulty_mult * 4)
-            self.exp_value = 35
-            self.color = (255, 80, 20)    # Оранжево-красный — Рой
-            self.size = 27
-            self.shape = EnemyShape.CIRCLE
-            self.is_bomber = True
-        elif enemy_type == "sentinel":
-            self.max_hp = int(280 * difficulty_mult)
-            self.speed = 0.7 + difficulty_mult * 0.1
-            self.dmg = 20 + int(difficulty_mult * 4)
-            self.exp_value = 80
-            self.color = (100, 50, 255)   # Фиолетово-синий — Командиры
-            self.size = 40
-            self.shape = EnemyShape.HEXAGON
-            # Пульс страха при атаке
-            self.knockback_strength = 5.0
-        elif enemy_type == "ranger":
-            self.max_hp = int(50 * difficulty_mult)
-            self.speed = 1.5 + difficulty_mult * 0.15
-            self.dmg = 16 + int(difficulty_mult * 2.5)
-            self.exp_value = 30
-            self.color = (60, 200, 220)   # Бирюзовый — Элита
-            self.size = 20
-            self.shape = EnemyShape.DIAMOND
-            self.preferred_range = 350
-            self.shoot_cooldown = 0
-            self.shoot_interval = 2000
-            # Тройной выстрел с ранга 3
-            self.triple_shot = (difficulty_mult >= 3.0)
-        elif enemy_type == "lancer":
-            # Ланцет: стреляет пробивающими снарядами с дальней дистанции
-            self.max_hp = int(40 * difficulty_mult)
-            self.speed = 2.0 + difficulty_mult * 0.2
-            self.dmg = 12 + int(difficulty_mult * 2)
-            self.exp_value = 28
-            self.color = (80, 220, 180)   # Зелено-бирюзовый — Элита
-            self.size = 16
-            self.shape = EnemyShape.TRIANGLE
-            self.preferred_range = 400
-            self.shoot_cooldown = 0
-            self.shoot_interval = 3000
-            self.piercing_shot = True
-        elif enemy_type == "mortar":
-            self.max_hp = int(70 * difficulty_mult)
-            self.speed = 0.6 + difficulty_mult * 0.05
-            self.dmg = 22 + int(difficulty_mult * 3)
-            self.exp_value = 40
-            self.color = (120, 80, 200)   # Тёмно-синий — Командиры
-            self.size = 28
-            self.shape = EnemyShape.SQUARE
-            self.preferred_range = 500
-            self.shoot_cooldown = 0
-            self.shoot_interval = 3500
-        elif enemy_type == "shielder":
-            # Щитоносец — теперь со своим щитом!
-            self.max_hp = int(200 * difficulty_mult)
-            self.speed = 1.0 + difficulty_mult * 0.1
-            self.dmg = 8 + int(difficulty_mult * 1.5)
-            self.exp_value = 60
-            self.color = (80, 200, 255)   # Голубой — Командиры
-            self.size = 35
-            self.shape = EnemyShape.HEXAGON
-            self.aura_radius = 220
-            self.aura_timer = 0
-            # Персональный щит щитоносца
-            self.personal_shield = int(100 * difficulty_mult)
+        self.max_hp, self.speed, self.dmg, self.empowered, scaled = arch.stats(difficulty_mult)
+        self.base_speed = self.speed
+        self.exp_value = arch.exp_value
+        self.color = arch.color
+        self.size = arch.size
+        self.shape = arch.shape
+        self.damage_reduction = arch.damage_reduction
+        for name, value in scaled:
+            setattr(self, name, value)
+        if arch.flags & Behaviour.SHIELDER:
             self.max_personal_shield = self.personal_shield
-        elif enemy_type == "healer":
-            # Хилер: лечит союзников в ауре каждые 2 сек
-            self.max_hp = int(65 * difficulty_mult)
-            self.speed = 1.8 + difficulty_mult * 0.15
-            self.dmg = 6 + int(difficulty_mult * 1)
-            self.exp_value = 50
-            self.color = (50, 220, 100)   # Зелёный — Поддержка
-            self.size = 22
-            self.shape = EnemyShape.CIRCLE
-            self.heal_radius = 200
-            self.heal_timer = 0
-            self.heal_interval = 2000
-            self.heal_amount = int(8 * difficulty_mult)
-        elif enemy_type == "buffer":
-            # Усилитель: даёт союзникам +40% к скорости и урону
-            self.max_hp = int(55 * difficulty_mult)
-            self.speed = 1.5 + difficulty_mult * 0.1
-            self.dmg = 5 + int(difficulty_mult * 0.8)
-            self.exp_value = 55
-            self.color = (220, 200, 50)   # Жёлтый — Поддержка
-            self.size = 20
-            self.shape = EnemyShape.DIAMOND
-            self.buff_radius = 180
-            self.buff_timer = 0
-            self.buff_interval = 3000
-            self.buff_active = False
-        else:
-            self.max_hp = int(30 * difficulty_mult)
-            self.speed = 2.5
-            self.dmg = 8
-            self.exp_value = 10
-            self.color = COLORS["enemy"]
-            self.size = 20
-            self.shape = EnemyShape.CIRCLE
 
         self.hp = self.max_hp
 
@@ -586,11 +914,6 @@ class Enemy(GameObject):
         self.chain_lightning_target = False
         self.chain_lightning_timer = 0
         self.explosion_marked = False
-        # Специальные поля новых врагов
-        if not hasattr(self, 'is_bomber'):
-            self.is_bomber = (enemy_type == "bomber")
-        if not hasattr(self, 'leech_heal'):
-            self.leech_heal = 8 if enemy_type == "leech" else 0
         # Бафф от щитоносца (накапливается извне)
         self.shield_buff = 0
         # Бафф от усилителя (скорость)
@@ -598,7 +921,7 @@ class Enemy(GameObject):
     
     def take_damage(self, dmg: int) -> bool:
         # Персональный щит щитоносца (сначала)
-        if self.type == "shielder" and hasattr(self, 'personal_shield') and self.personal_shield > 0:
+        if self.personal_shield > 0:
             absorbed = min(self.personal_shield, dmg)
             dmg -= absorbed
             self.personal_shield -= absorbed
@@ -606,84 +929,59 @@ class Enemy(GameObject):
                 self.hit_flash = 100
                 return False
         # Щит от Щитоносца-союзника поглощает часть урона
-        if hasattr(self, 'shield_buff') and self.shield_buff > 0:
+        if self.shield_buff > 0:
             absorbed = min(self.shield_buff, dmg)
             dmg -= absorbed
             self.shield_buff -= absorbed
         # Броня танка
-        if hasattr(self, 'damage_reduction') and self.damage_reduction > 0 and dmg > 0:
+        if self.damage_reduction > 0 and dmg > 0:
             dmg = max(1, int(dmg * (1.0 - self.damage_reduction)))
         self.hp -= dmg
         self.hit_flash = 100
         return self.hp <= 0
     
-    def update(self, dt: float, target_pos: pygame.Vector2 = None, allies: list = None):
-        # Обработка яда
-        if self.poison_duration > 0:
-            self.poison_duration -= dt * 1000
-            if not hasattr(self, 'poison_accum'):
-                self.poison_accum = 0.0
-            self.poison_accum += self.poison_damage * dt
-            if self.poison_accum >= 1.0:
-                dmg_int = int(self.poison_accum)
-                self.hp -= dmg_int
-                self.poison_accum -= dmg_int
-            if self.hp <= 0:
-                return  # Враг умер от яда
-        
-        # Обработка заморозки
-        if self.frozen_duration > 0:
-            self.frozen_duration -= dt * 1000
-            # Не двигаемся пока заморожены
-        else:
-            # Обработка замедления
-            if self.slow_duration > 0:
-                self.slow_duration -= dt * 1000
-                if self.slow_duration <= 0:
-                    self.slow_duration = 0
-                    self.slow_factor = 1.0
-            effective_speed = self.speed * self.slow_factor
+    def update(self, dt: float, target_pos: pygame.Vector2 = None, allies: "EnemyStore" = None,
+               moving: bool = True):
+        """Особое поведение врага (по флагам архетипа).
+
+        Яд, заморозка, замедление, общие таймеры и движение преследователей
+        считаются пакетно в EnemyStore.update; moving=False — враг заморожен.
+        """
+        arch = self.arch
+        flags = arch.flags
+        if moving:
+            effective_speed = self.speed * self.slow_factor * dt * BASE_HZ
             # --- Берсерк-режим при <40% HP ---
-            if self.type == "bruiser" and not self.berserk_triggered and self.hp < self.max_hp * 0.4:
+            if flags & Behaviour.BERSERK and not self.berserk_triggered and self.hp < self.max_hp * 0.4:
                 self.berserk_triggered = True
                 self.speed = self.base_speed * 1.8
                 self.dmg = int(self.dmg * 1.5)
                 self.color = (240, 60, 40)  # Красный берсерк
             
             # --- Фазирование призрака ---
-            if self.type == "ghost":
+            if flags & Behaviour.PHASING:
                 self.phase_timer += dt * 1000
-                if not self.is_phasing and self.phase_timer >= self.phase_interval:
+                if not self.is_phasing and self.phase_timer >= arch.phase_interval:
                     self.is_phasing = True
                     self.phase_timer = 0
-                elif self.is_phasing and self.phase_timer >= self.phase_duration:
+                elif self.is_phasing and self.phase_timer >= arch.phase_duration:
                     self.is_phasing = False
                     self.phase_timer = 0
             
-            # --- Бафф скорости от усилителя ---
-            if self.speed_buff_timer > 0:
-                self.speed_buff_timer -= dt * 1000
-            
             # Особое поведение дальнобойных врагов
-            if self.type in ("ranger", "mortar", "sniper", "lancer") and target_pos:
-                pref_range = getattr(self, 'preferred_range', 300)
+            if flags & Behaviour.RANGED and target_pos:
+                pref_range = arch.preferred_range
                 direction = target_pos - self.pos
                 dist = direction.length()
                 if dist > pref_range + 40:
                     self.pos += direction.normalize() * effective_speed
                 elif dist < pref_range - 40:
                     self.pos -= direction.normalize() * effective_speed
-            elif target_pos and self.type not in ("shielder", "healer", "buffer"):
-                direction = target_pos - self.pos
-                if direction.length() > 0:
-                    self.pos += direction.normalize() * effective_speed
-            elif target_pos and self.type in ("shielder", "healer", "buffer"):
+            elif target_pos and flags & Behaviour.SUPPORT:
                 # Поддержка ищет ближайшего союзника и держится рядом
-                support_allies = [a for a in (allies or []) if a is not self]
-                if support_allies:
-                    # Найти ближайшего союзника
-                    nearest = min(support_allies, key=lambda a: (a.pos - self.pos).length())
-                    support_range = getattr(self, 'aura_radius', 200) * 0.7
+                nearest = allies.nearest_ally(self) if allies is not None else None
+                if nearest is not None:
+                    support_range = arch.ally_distance
                     d_ally = nearest.pos - self.pos
                     dist_ally = d_ally.length()
                     if dist_ally > support_range + 20:
@@ -699,43 +997,38 @@ class Enemy(GameObject):
                         self.pos += direction.normalize() * effective_speed
         
         # Обновляем кулдаун стрельбы дальнобойных
-        if self.type in ("ranger", "mortar", "sniper", "lancer"):
-            if hasattr(self, 'shoot_cooldown') and self.shoot_cooldown > 0:
+        if flags & Behaviour.RANGED:
+            if self.shoot_cooldown > 0:
                 self.shoot_cooldown -= dt * 1000
         
-        # Аура щитоносца
-        if self.type == "shielder":
+        # Таймер ауры поддержки (щит / исцеление / бафф)
+        if flags & Behaviour.SUPPORT:
             self.aura_timer = max(0, self.aura_timer - dt * 1000)
-        
-        # Хилер: таймер исцеления
-        if self.type == "healer":
-            self.heal_timer = max(0, self.heal_timer - dt * 1000)
-        
-        # Усилитель: таймер баффа
-        if self.type == "buffer":
-            self.buff_timer = max(0, self.buff_timer - dt * 1000)
-        
-        # Обработка молнии
-        if self.chain_lightning_timer > 0:
-            self.chain_lightning_timer -= dt * 1000
-            if self.chain_lightning_timer <= 0:
-                self.chain_lightning_target = False
-        
-        self.rotation += dt * 50  # Вращение для некоторых форм
-        
-        if self.hit_flash > 0:
-            self.hit_flash -= dt * 1000
     
+    def draw_reach(self) -> float:
+        """Насколько рисунок выходит от центра: эффекты, подпись, ауры"""
+        reach = self.size * 1.5 + 30
+        if self.arch.flags & Behaviour.SUPPORT:
+            reach = max(reach, self.arch.aura_radius + 2)
+        if self.is_miniboss:
+            reach += 80  # Подпись «МИНИ-БОСС» шире тела
+        return reach
+
+    def draw_simple(self, surf: pygame.Surface, offset: pygame.Vector2):
+        """Упрощённый вид (LOD): одноцветный круг без эффектов и полоски HP"""
+        pos = self.pos
+        pygame.draw.circle(surf, self.color, (int(pos.x + offset.x), int(pos.y + offset.y)), self.size)
+
     def draw(self, surf: pygame.Surface, offset: pygame.Vector2):
-        x = int(self.pos.x + offset.x)
-        y = int(self.pos.y + offset.y)
+        pos = self.pos
+        x = int(pos.x + offset.x)
+        y = int(pos.y + offset.y)
+        size = self.size
         
         # Призрак в фазе — полупрозрачный
-        if self.type == "ghost" and getattr(self, 'is_phasing', False):
-            ghost_surf = pygame.Surface((self.size * 3, self.size * 3), pygame.SRCALPHA)
-            pygame.draw.circle(ghost_surf, (*self.color, 60), 
-                             (self.size*1.5, self.size*1.5), self.size)
-            surf.blit(ghost_surf, (x - self.size*1.5, y - self.size*1.5))
+        if self.is_phasing:
+            sprite = _enemy_sprite(("ghost", size, self.color))
+            surf.blit(sprite, (x - size * 1.5, y - size * 1.5))
             return  # Не рисуем обычное тело в фазе
         
         color = self.color
@@ -747,137 +1040,71 @@ class Enemy(GameObject):
         
         # Эффект яда - зелёное свечение
         if self.poison_duration > 0:
-            poison_surf = pygame.Surface((self.size * 3, self.size * 3), pygame.SRCALPHA)
-            pygame.draw.circle(poison_surf, (50, 255, 50, 60), (self.size * 1.5, self.size * 1.5), self.size + 5)
-            surf.blit(poison_surf, (x - self.size * 1.5, y - self.size * 1.5))
+            surf.blit(_enemy_sprite(("poison", size)), (x - size * 1.5, y - size * 1.5))
             
             # Капли яда вокруг
             for i in range(3):
                 angle = (time_ms / 300 + i * 2.1) % 6.28
-                drop_x = x + int(math.cos(angle) * (self.size + 8))
-                drop_y = y + int(math.sin(angle) * (self.size + 8))
+                drop_x = x + int(math.cos(angle) * (size + 8))
+                drop_y = y + int(math.sin(angle) * (size + 8))
                 pygame.draw.circle(surf, (0, 200, 0), (drop_x, drop_y), 3)
         
-        # Эффект заморозки - голубое свечение
+        # Эффект заморозки - голубое свечение и кристаллы льда
         if self.frozen_duration > 0:
-            freeze_surf = pygame.Surface((self.size * 3, self.size * 3), pygame.SRCALPHA)
-            pygame.draw.circle(freeze_surf, (100, 200, 255, 80), (self.size * 1.5, self.size * 1.5), self.size + 6)
-            surf.blit(freeze_surf, (x - self.size * 1.5, y - self.size * 1.5))
-            
-            # Кристаллы льда
-            for i in range(4):
-                angle = i * 1.57  # 90 градусов
-                ice_x = x + int(math.cos(angle) * (self.size + 10))
-                ice_y = y + int(math.sin(angle) * (self.size + 10))
-                pts = [
-                    (ice_x, ice_y - 5),
-                    (ice_x - 3, ice_y + 3),
-                    (ice_x + 3, ice_y + 3)
-                ]
-                pygame.draw.polygon(surf, (150, 220, 255), pts)
-        
-        # Эффект молнии - жёлтые искры
+            half = size + 16
+            surf.blit(_enemy_sprite(("freeze", size)), (x - half, y - half))
+        
+        # Эффект молнии - жёлтые искры и вращающиеся разряды
         if self.chain_lightning_target and self.chain_lightning_timer > 0:
-            # Искры вокруг
-            for i in range(5):
-                angle = random.uniform(0, 6.28)
-                dist = random.uniform(self.size, self.size + 15)
-                spark_x = x + int(math.cos(angle) * dist)
-                spark_y = y + int(math.sin(angle) * dist)
-                pygame.draw.circle(surf, (255, 255, 0), (spark_x, spark_y), 2)
-            
-            # Линии молнии от центра
-            for i in range(3):
-                angle = (time_ms / 50 + i * 2.1) % 6.28
-                end_x = x + int(math.cos(angle) * (self.size + 12))
-                end_y = y + int(math.sin(angle) * (self.size + 12))
-                pygame.draw.line(surf, (255, 255, 100), (x, y), (end_x, end_y), 2)
+            step = int((time_ms / 50) % 6.28 / 6.28 * _LIGHTNING_STEPS)
+            half = size + 16
+            surf.blit(_enemy_sprite(("lightning", size, step)), (x - half, y - half))
         
         # Эффект взрыва - пульсирующее красное свечение
         if self.explosion_marked:
             pulse = abs(math.sin(time_ms / 200)) * 100 + 50
-            exp_surf = pygame.Surface((self.size * 3, self.size * 3), pygame.SRCALPHA)
-            pygame.draw.circle(exp_surf, (255, 0, 0, int(pulse)), (self.size * 1.5, self.size * 1.5), self.size + 8)
-            surf.blit(exp_surf, (x - self.size * 1.5, y - self.size * 1.5))
+            step = int(pulse) // 10
+            surf.blit(_enemy_sprite(("explode", size, step)), (x - size * 1.5, y - size * 1.5))
         
+        flags = self.arch.flags
+        aura_r = self.arch.aura_radius
         # Аура Щитоносца
-        if self.type == "shielder":
-            aura_r = getattr(self, 'aura_radius', 200)
-            aura_surf = pygame.Surface((aura_r*2+4, aura_r*2+4), pygame.SRCALPHA)
+        if flags & Behaviour.SHIELDER:
             pulse_a = int(25 + 15 * abs(math.sin(time_ms / 600)))
-            pygame.draw.circle(aura_surf, (80, 200, 255, pulse_a), (aura_r+2, aura_r+2), aura_r)
-            pygame.draw.circle(aura_surf, (80, 200, 255, 80), (aura_r+2, aura_r+2), aura_r, 2)
-            surf.blit(aura_surf, (x - aura_r - 2, y - aura_r - 2))
+            surf.blit(_enemy_sprite(("aura", (80, 200, 255), aura_r, _pulse_step(pulse_a), 80)),
+                      (x - aura_r - 2, y - aura_r - 2))
             # Показываем персональный щит
-            if hasattr(self, 'personal_shield') and self.personal_shield > 0:
+            if self.personal_shield > 0:
                 shield_ratio = self.personal_shield / max(1, self.max_personal_shield)
-                sh_r = self.size + 8
-                sh_surf = pygame.Surface((sh_r*2+4, sh_r*2+4), pygame.SRCALPHA)
-                pygame.draw.circle(sh_surf, (80, 200, 255, int(80 * shield_ratio)), 
-                                 (sh_r+2, sh_r+2), sh_r)
-                pygame.draw.circle(sh_surf, (80, 200, 255, 180), (sh_r+2, sh_r+2), sh_r, 3)
-                surf.blit(sh_surf, (x - sh_r - 2, y - sh_r - 2))
+                sh_r = size + 8
+                step = int(shield_ratio * 10)
+                surf.blit(_enemy_sprite(("shield", sh_r, step)), (x - sh_r - 2, y - sh_r - 2))
         
         # Аура Хилера (зелёная)
-        if self.type == "healer":
-            heal_r = getattr(self, 'heal_radius', 200)
-            h_surf = pygame.Surface((heal_r*2+4, heal_r*2+4), pygame.SRCALPHA)
+        if flags & Behaviour.HEALER:
             pulse_a = int(20 + 15 * abs(math.sin(time_ms / 500)))
-            pygame.draw.circle(h_surf, (50, 220, 100, pulse_a), (heal_r+2, heal_r+2), heal_r)
-            pygame.draw.circle(h_surf, (50, 220, 100, 70), (heal_r+2, heal_r+2), heal_r, 2)
-            surf.blit(h_surf, (x - heal_r - 2, y - heal_r - 2))
+            surf.blit(_enemy_sprite(("aura", (50, 220, 100), aura_r, _pulse_step(pulse_a), 70)),
+                      (x - aura_r - 2, y - aura_r - 2))
         
         # Аура Усилителя (жёлтая)
-        if self.type == "buffer":
-            buff_r = getattr(self, 'buff_radius', 180)
-            b_surf = pygame.Surface((buff_r*2+4, buff_r*2+4), pygame.SRCALPHA)
+        if flags & Behaviour.BUFFER:
             pulse_a = int(20 + 15 * abs(math.sin(time_ms / 400)))
-            pygame.draw.circle(b_surf, (220, 200, 50, pulse_a), (buff_r+2, buff_r+2), buff_r)
-            pygame.draw.circle(b_surf, (220, 200, 50, 70), (buff_r+2, buff_r+2), buff_r, 2)
-            surf.blit(b_surf, (x - buff_r - 2, y - buff_r - 2))
-        
-        # Рисуем в зависимости от формы
-        if self.shape == EnemyShape.CIRCLE:
-            pygame.draw.circle(surf, color, (x, y), self.size)
-        
-        elif self.shape == EnemyShape.SQUARE:
-            rect = pygame.Rect(x - self.size, y - self.size, self.size * 2, self.size * 2)
-            pygame.draw.rect(surf, color, rect)
+            surf.blit(_enemy_sprite(("aura", (220, 200, 50), aura_r, _pulse_step(pulse_a), 70)),
+                      (x - aura_r - 2, y - aura_r - 2))
         
-        elif self.shape == EnemyShape.TRIANGLE:
-            pts = [
-                (x, y - self.size),
-                (x - self.size, y + self.size),
-                (x + self.size, y + self.size)
-            ]
-            pygame.draw.polygon(surf, color, pts)
-        
-        elif self.shape == EnemyShape.HEXAGON:
-            pts = []
-            for i in range(6):
-                angle = math.radians(60 * i + self.rotation)
-                px = x + self.size * math.cos(angle)
-                py = y + self.size * math.sin(angle)
-                pts.append((px, py))
-            pygame.draw.polygon(surf, color, pts)
-        
-        elif self.shape == EnemyShape.DIAMOND:
-            pts = [
-                (x, y - self.size),
-                (x + self.size, y),
-                (x, y + self.size),
-                (x - self.size, y)
-            ]
-            pygame.draw.polygon(surf, color, pts)
+        # Тело: готовый спрайт формы (шестиугольник — по ступеням поворота)
+        rot_step = int(self.rotation % 60) // _HEX_ROT_STEP if self.shape == EnemyShape.HEXAGON else 0
+        half = size + 1
+        surf.blit(_enemy_sprite(("body", self.shape, size, color, rot_step)), (x - half, y - half))
         
         # HP бар для всех врагов
         hp_ratio = max(0.0, self.hp / self.max_hp)
-        show_bar = (hp_ratio < 1.0) or self.type in ("tank", "boss", "sentinel", "bruiser") or getattr(self, 'is_miniboss', False)
+        show_bar = (hp_ratio < 1.0) or flags & Behaviour.HP_BAR or self.is_miniboss
         if show_bar:
-            bar_w = max(self.size * 2, 28)
-            bar_h = 5 if not getattr(self, 'is_miniboss', False) else 7
+            bar_w = max(size * 2, 28)
+            bar_h = 5 if not self.is_miniboss else 7
             bar_x = x - bar_w // 2
-            bar_y = y - self.size - 10
+            bar_y = y - size - 10
             # Background
             pygame.draw.rect(surf, (25, 25, 25), (bar_x - 1, bar_y - 1, bar_w + 2, bar_h + 2), border_radius=2)
             pygame.draw.rect(surf, (60, 20, 20), (bar_x, bar_y, bar_w, bar_h), border_radius=2)
@@ -887,36 +1114,804 @@ class Enemy(GameObject):
             g = int(min(255, 510 * hp_ratio))
             pygame.draw.rect(surf, (r, g, 30), (bar_x, bar_y, hp_w, bar_h), border_radius=2)
             # Miniboss: gold border + name label
-            if getattr(self, 'is_miniboss', False):
+            if self.is_miniboss:
                 pygame.draw.rect(surf, (255, 215, 0), (bar_x - 1, bar_y - 1, bar_w + 2, bar_h + 2), 1, border_radius=2)
-                try:
-                    _nf = pygame.font.Font(None, 17)
-                    _nt = _nf.render(f"[МИНИ-БОСС] {getattr(self, 'display_name', '')}", True, (255, 215, 0))
-                    surf.blit(_nt, (x - _nt.get_width() // 2, bar_y - 15))
-                except:
-                    pass
+                _nt = render_text(get_font(None, 17), f"[МИНИ-БОСС] {self.display_name}",
+                                  True, (255, 215, 0))
+                surf.blit(_nt, (x - _nt.get_width() // 2, bar_y - 15))
+
+
+_HEX_ROT_STEP = 3        # градусов на ступень поворота шестиугольника
+_LIGHTNING_STEPS = 16    # кадров анимации разряда молнии
+
+
+def _pulse_step(alpha: int) -> int:
+    """Пульсация ауры квантуется ступенями по 3 единицы прозрачности"""
+    return alpha // 3 * 3
+
+
+def _enemy_sprite(key: tuple) -> pygame.Surface:
+    sprite = sprite_cache.get(key)
+    if sprite is None:
+        sprite = sprite_cache.put(key, _render_enemy_sprite(key))
+    return sprite
+
+
+def _render_enemy_sprite(key: tuple) -> pygame.Surface:
+    """Рисует спрайт врага или эффекта по ключу кэша"""
+    kind = key[0]
+    if kind == "body":
+        _, shape, size, color, rot_step = key
+        c = size + 1
+        sprite = pygame.Surface((c * 2 + 1, c * 2 + 1), pygame.SRCALPHA)
+        if shape == EnemyShape.CIRCLE:
+            pygame.draw.circle(sprite, color, (c, c), size)
+        elif shape == EnemyShape.SQUARE:
+            pygame.draw.rect(sprite, color, pygame.Rect(c - size, c - size, size * 2, size * 2))
+        elif shape == EnemyShape.TRIANGLE:
+            pygame.draw.polygon(sprite, color, [(c, c - size), (c - size, c + size), (c + size, c + size)])
+        elif shape == EnemyShape.HEXAGON:
+            rotation = rot_step * _HEX_ROT_STEP
+            pts = []
+            for i in range(6):
+                angle = math.radians(60 * i + rotation)
+                pts.append((c + size * math.cos(angle), c + size * math.sin(angle)))
+            pygame.draw.polygon(sprite, color, pts)
+        elif shape == EnemyShape.DIAMOND:
+            pygame.draw.polygon(sprite, color, [(c, c - size), (c + size, c), (c, c + size), (c - size, c)])
+        return sprite
+    
+    if kind in ("ghost", "poison", "explode"):
+        size = key[1]
+        sprite = pygame.Surface((size * 3, size * 3), pygame.SRCALPHA)
+        if kind == "ghost":
+            pygame.draw.circle(sprite, (*key[2], 60), (size * 1.5, size * 1.5), size)
+        elif kind == "poison":
+            pygame.draw.circle(sprite, (50, 255, 50, 60), (size * 1.5, size * 1.5), size + 5)
+        else:
+            pygame.draw.circle(sprite, (255, 0, 0, key[2] * 10), (size * 1.5, size * 1.5), size + 8)
+        return sprite
+    
+    if kind == "freeze":
+        size = key[1]
+        c = size + 16
+        sprite = pygame.Surface((c * 2, c * 2), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (100, 200, 255, 80), (c, c), size + 6)
+        # Кристаллы льда
+        for i in range(4):
+            angle = i * 1.57  # 90 градусов
+            ice_x = c + int(math.cos(angle) * (size + 10))
+            ice_y = c + int(math.sin(angle) * (size + 10))
+            pygame.draw.polygon(sprite, (150, 220, 255),
+                                [(ice_x, ice_y - 5), (ice_x - 3, ice_y + 3), (ice_x + 3, ice_y + 3)])
+        return sprite
+    
+    if kind == "lightning":
+        _, size, step = key
+        c = size + 16
+        sprite = pygame.Surface((c * 2, c * 2), pygame.SRCALPHA)
+        # Искры: фиксированный набор на каждую ступень — мерцание сохраняется
+        rng = random.Random(step)
+        for i in range(5):
+            angle = rng.uniform(0, 6.28)
+            dist = rng.uniform(size, size + 15)
+            pygame.draw.circle(sprite, (255, 255, 0),
+                               (c + int(math.cos(angle) * dist), c + int(math.sin(angle) * dist)), 2)
+        # Линии молнии от центра
+        base = step / _LIGHTNING_STEPS * 6.28
+        for i in range(3):
+            angle = base + i * 2.1
+            end = (c + int(math.cos(angle) * (size + 12)), c + int(math.sin(angle) * (size + 12)))
+            pygame.draw.line(sprite, (255, 255, 100), (c, c), end, 2)
+        return sprite
+    
+    if kind == "aura":
+        _, rgb, radius, pulse_a, ring_a = key
+        sprite = pygame.Surface((radius * 2 + 4, radius * 2 + 4), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (*rgb, pulse_a), (radius + 2, radius + 2), radius)
+        pygame.draw.circle(sprite, (*rgb, ring_a), (radius + 2, radius + 2), radius, 2)
+        return sprite
+    
+    if kind == "shield":
+        _, sh_r, step = key
+        sprite = pygame.Surface((sh_r * 2 + 4, sh_r * 2 + 4), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (80, 200, 255, step * 8), (sh_r + 2, sh_r + 2), sh_r)
+        pygame.draw.circle(sprite, (80, 200, 255, 180), (sh_r + 2, sh_r + 2), sh_r, 3)
+        return sprite
+    
+    raise KeyError(key)
+
+# Сколько колец ячеек индекса просматривает nearest_ally до полного прохода
+_NEAREST_ALLY_RINGS = 8
+_HANDLE_BITS = 32
+_HANDLE_MASK = (1 << _HANDLE_BITS) - 1
+
+_by_distance = itemgetter(0)
+
+
+class EnemyStore:
+    """Хранилище врагов в виде структуры массивов (NumPy-колонки).
+
+    Снаружи ведёт себя как список Enemy: append/remove/in/len/итерация/[:].
+    Enemy — тонкое представление строки: горячие поля читаются и пишутся
+    прямо в колонки, остальные атрибуты остаются на объекте. Удаление —
+    O(1) перестановкой последней строки на место удалённой, поэтому
+    порядок врагов после удаления меняется.
+
+    Убитые за тик враги не удаляются сразу: kill помечает врага dying и
+    ставит в очередь, запросы и обновление его уже не видят, а flush
+    снимает всю очередь разом. Для ссылок, живущих дольше тика, есть
+    handle — номер ячейки с поколением: get(handle) вернёт None, как
+    только враг снят, даже если ячейку занял новый.
+    """
+
+    COLUMNS = {
+        "hp": np.int64,
+        "speed": np.float64,
+        "size": np.int64,
+        "slow_factor": np.float64,
+        "frozen_duration": np.float64,
+        "slow_duration": np.float64,
+        "poison_duration": np.float64,
+        "poison_damage": np.float64,
+        "poison_accum": np.float64,
+        "hit_flash": np.float64,
+        "rotation": np.float64,
+        "chain_lightning_timer": np.float64,
+        "chain_lightning_target": np.bool_,
+        "speed_buff_timer": np.float64,
+    }
+
+    def __init__(self, capacity: int = 256):
+        self.count = 0
+        self.views: List[Enemy] = []
+        self._lod_phase = 0
+        self._dying: List[Enemy] = []
+        # Таблица меток: ячейка -> (поколение, строка); освободившиеся
+        # ячейки переиспользуются со следующим поколением
+        self._gen: List[int] = []
+        self._row: List[int] = []
+        self._free: List[int] = []
+        self._alloc(capacity)
+        # Общий пространственный индекс врагов (reindex раз за тик): пули,
+        # ауры поддержки, поиск ближайшего союзника
+        self.grid = SpatialHash(ENEMY_GRID_CELL)
+        self.flow = FlowField(FLOW_CELL, FLOW_RADIUS, FLOW_NEAR)
+
+    def _alloc(self, capacity: int):
+        """(Пере)выделяет колонки, сохраняя живые строки"""
+        n = self.count
+        old_arrays = getattr(self, "_arrays", None)
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.prev_pos = np.zeros((capacity, 2), dtype=np.float64)  # для интерполяции
+        self.chaser = np.zeros(capacity, dtype=np.bool_)
+        self.special = np.zeros(capacity, dtype=np.bool_)
+        self.reach = np.zeros(capacity, dtype=np.float64)  # радиус рисунка (для отсечения)
+        self.type_id = np.zeros(capacity, dtype=np.int16)   # EnemyArchetype.type_id
+        self.lod_dt = np.zeros(capacity, dtype=np.float64)  # dt, накопленный дальним врагом
+        self.handle = np.zeros(capacity, dtype=np.int64)    # ячейка таблицы меток
+        self.columns = {name: np.zeros(capacity, dtype=dtype)
+                        for name, dtype in self.COLUMNS.items()}
+        for name, col in self.columns.items():
+            setattr(self, name, col)
+        self._arrays = [self.pos, self.prev_pos, self.chaser, self.special, self.reach, self.type_id, self.lod_dt,
+                        self.handle, *self.columns.values()]
+        if old_arrays is not None:
+            for new, old in zip(self._arrays, old_arrays):
+                new[:n] = old[:n]
+
+    # --- Интерфейс списка ---
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __iter__(self):
+        # Снимок: безопасно удалять врагов во время обхода
+        return iter(self.views[:])
+
+    def __getitem__(self, index):
+        return self.views[index]
+
+    def __contains__(self, enemy) -> bool:
+        return getattr(enemy, "_store", None) is self
+
+    def append(self, enemy: Enemy):
+        if enemy._store is not None:
+            raise ValueError("враг уже находится в хранилище")
+        if self.count == self.capacity:
+            self._alloc(self.capacity * 2)
+        i = self.count
+        self.reach[i] = enemy.draw_reach()
+        d = enemy.__dict__
+        self.pos[i] = (d["pos"].x, d["pos"].y)
+        self.prev_pos[i] = self.pos[i]
+        for name, col in self.columns.items():
+            col[i] = d.pop(name)
+        del d["pos"]
+        flags = enemy.arch.flags
+        self.chaser[i] = not flags & (Behaviour.RANGED | Behaviour.SUPPORT)
+        self.special[i] = bool(flags & Behaviour.SPECIAL)
+        self.type_id[i] = enemy.type_id
+        self.lod_dt[i] = 0.0
+        if self._free:
+            h = self._free.pop()
+        else:
+            h = len(self._gen)
+            self._gen.append(0)
+            self._row.append(0)
+        self._row[h] = i
+        self.handle[i] = h
+        enemy.handle = self._gen[h] << _HANDLE_BITS | h
+        enemy._store = self
+        enemy._slot = i
+        self.views.append(enemy)
+        self.count += 1
+
+    def remove(self, enemy: Enemy):
+        if enemy._store is not self:
+            raise ValueError("враг не находится в хранилище")
+        i = enemy._slot
+        last = self.count - 1
+        # Отвязываем представление: значения возвращаются на объект
+        d = enemy.__dict__
+        d["pos"] = pygame.Vector2(self.pos.item(i, 0), self.pos.item(i, 1))
+        for name, col in self.columns.items():
+            d[name] = col.item(i)
+        enemy._store = None
+        enemy._slot = -1
+        enemy.dying = False
+        h = self.handle.item(i)
+        self._gen[h] += 1
+        self._free.append(h)
+        if i != last:
+            for arr in self._arrays:
+                arr[i] = arr[last]
+            self._row[self.handle.item(i)] = i
+            moved = self.views[last]
+            moved._slot = i
+            self.views[i] = moved
+        self.views.pop()
+        self.count = last
+
+    def get(self, handle: int) -> Optional[Enemy]:
+        """Враг по метке или None, если он уже снят"""
+        h = handle & _HANDLE_MASK
+        if h < len(self._gen) and self._gen[h] == handle >> _HANDLE_BITS:
+            return self.views[self._row[h]]
+        return None
+
+    # --- Отложенное удаление ---
+    def kill(self, enemy: Enemy) -> bool:
+        """Ставит врага в очередь на снятие. False — если он уже в очереди
+        или не в хранилище (награду за такого давать не нужно)"""
+        if enemy._store is not self or enemy.dying:
+            return False
+        enemy.dying = True
+        self._dying.append(enemy)
+        return True
+
+    def flush(self) -> List[Enemy]:
+        """Снимает всех убитых за тик (в порядке kill) и возвращает их"""
+        dying = self._dying
+        if not dying:
+            return dying
+        self._dying = []
+        for enemy in dying:
+            self.remove(enemy)
+        return dying
+
+    def _live_mask(self) -> np.ndarray:
+        """Маска строк, не стоящих в очереди на снятие"""
+        live = np.ones(self.count, dtype=np.bool_)
+        if self._dying:
+            live[[enemy._slot for enemy in self._dying]] = False
+        return live
+
+    # --- Пакетные операции ---
+    def update(self, dt: float, target_pos: pygame.Vector2) -> List[Enemy]:
+        """Один векторный шаг для всех врагов.
+
+        Яд, заморозка, замедление, таймеры и движение преследователей
+        считаются колонками; особые типы получают вызов Enemy.update
+        (дальние от экрана — реже, с накопленным dt).
+        Возвращает врагов с hp <= 0 (убитых ядом), кроме уже стоящих в очереди.
+        """
+        n = self.count
+        if n == 0:
+            return []
+        ms = dt * 1000
+        hp = self.hp[:n]
+        live = self._live_mask()  # Убитые в этом тике (до flush) не обновляются
+        
+        # Яд
+        poison_duration = self.poison_duration[:n]
+        poisoned = live & (poison_duration > 0)
+        if poisoned.any():
+            poison_duration[poisoned] -= ms
+            accum = self.poison_accum[:n][poisoned] + self.poison_damage[:n][poisoned] * dt
+            whole = np.where(accum >= 1.0, np.floor(accum), 0.0)
+            hp[poisoned] -= whole.astype(np.int64)
+            self.poison_accum[:n][poisoned] = accum - whole
+            alive = live & ~(poisoned & (hp <= 0))  # Умершие от яда дальше не обновляются
+        else:
+            alive = live
+        
+        # Заморозка: замороженные не двигаются и не тикают замедление/бафф
+        frozen_duration = self.frozen_duration[:n]
+        frozen = alive & (frozen_duration > 0)
+        frozen_duration[frozen] -= ms
+        moving = alive & ~frozen
+        
+        # Замедление
+        slow_duration = self.slow_duration[:n]
+        slowed = moving & (slow_duration > 0)
+        slow_duration[slowed] -= ms
+        expired = slowed & (slow_duration <= 0)
+        slow_duration[expired] = 0
+        self.slow_factor[:n][expired] = 1.0
+        
+        # Бафф скорости от усилителя
+        speed_buff_timer = self.speed_buff_timer[:n]
+        speed_buff_timer[moving & (speed_buff_timer > 0)] -= ms
+        
+        # Преследователи: шаг по полю направлений за speed * slow_factor
+        # пикселей, затем расталкивание толпы
+        if target_pos is not None:
+            idx = np.flatnonzero(moving & self.chaser[:n])
+            if idx.size:
+                direction = self.flow.sample(self.pos[idx], target_pos.x, target_pos.y)
+                step = self.speed[idx] * self.slow_factor[idx] * (dt * BASE_HZ)
+                self.pos[idx] += direction * step[:, None]
+                self._separate(idx, step)
+        
+        # Особое поведение (дальнобойные, поддержка, берсерк, призрак).
+        # Ближние к экрану и замороженные — каждый тик; дальние — раз в
+        # UPDATE_LOD_TICKS тиков (вразнобой по слотам) с накопленным dt,
+        # так что таймеры и пройденный путь не теряются
+        special = alive & self.special[:n]
+        lod_dt = self.lod_dt[:n]
+        lod_dt[special] += dt
+        due = special
+        if target_pos is not None:
+            d = self.pos[:n] - (target_pos.x, target_pos.y)
+            far = ((np.abs(d[:, 0]) > WIDTH / 2 + UPDATE_LOD_MARGIN) |
+                   (np.abs(d[:, 1]) > HEIGHT / 2 + UPDATE_LOD_MARGIN))
+            self._lod_phase = (self._lod_phase + 1) % UPDATE_LOD_TICKS
+            skip = far & moving & ((np.arange(n) + self._lod_phase) % UPDATE_LOD_TICKS != 0)
+            due = special & ~skip
+        views = self.views
+        run = np.flatnonzero(due)
+        for i, step in zip(run.tolist(), lod_dt[run].tolist()):
+            views[i].update(step, target_pos, self, bool(moving[i]))
+        lod_dt[run] = 0.0
+        
+        # Молния
+        chain_timer = self.chain_lightning_timer[:n]
+        charged = alive & (chain_timer > 0)
+        chain_timer[charged] -= ms
+        self.chain_lightning_target[:n][charged & (chain_timer <= 0)] = False
+        
+        self.rotation[:n][alive] += dt * 50  # Вращение для некоторых форм
+        
+        hit_flash = self.hit_flash[:n]
+        hit_flash[alive & (hit_flash > 0)] -= ms
+        
+        return [views[i] for i in np.flatnonzero(live & (hp <= 0)).tolist()]
+
+    def _separate(self, idx: np.ndarray, steps: np.ndarray):
+        """Расталкивает пересекающихся преследователей idx.
+
+        Пары ищутся по сетке (своя и соседние клетки); каждая пара
+        расходится вдоль линии центров на SEPARATION_RELAX долю перекрытия
+        поровну. Итоговый сдвиг врага не больше его шага погони steps,
+        поэтому толпа не дрожит и не обгоняет собственное движение.
+        """
+        m = len(idx)
+        if m < 2:
+            return
+        pos = self.pos[idx]
+        size = self.size[idx].astype(np.float64)
+        cs = max(SEPARATION_CELL, 2.0 * size.max())
+        cells = np.floor_divide(pos, cs).astype(np.int64)
+        keys = cells[:, 0] * (1 << 32) + cells[:, 1]
+        # Дальше всё в порядке клеток: соседи по клетке лежат подряд
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        cells = cells[order]
+        x = pos[order, 0]
+        y = pos[order, 1]
+        size = size[order]
+        rows = np.arange(m)
+        firsts, seconds = [], []
+        # Половина окрестности: каждая пара соседних клеток — один раз
+        for ox, oy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            near = (cells[:, 0] + ox) * (1 << 32) + (cells[:, 1] + oy)
+            lo = np.searchsorted(keys, near, "left")
+            cnt = np.searchsorted(keys, near, "right") - lo
+            if ox == 0 and oy == 0:
+                # В своей клетке — только те, что лежат дальше по порядку
+                cnt = cnt - (rows - lo) - 1
+                lo = rows + 1
+            total = int(cnt.sum())
+            if total == 0:
+                continue
+            firsts.append(np.repeat(rows, cnt))
+            seconds.append(np.repeat(lo - (np.cumsum(cnt) - cnt), cnt) + np.arange(total))
+        if not firsts:
+            return
+        a = np.concatenate(firsts)
+        b = np.concatenate(seconds)
+        # Узкая фаза по квадрату расстояния, корень — только у пересёкшихся
+        dx = x.take(b) - x.take(a)
+        dy = y.take(b) - y.take(a)
+        reach = size.take(a) + size.take(b)
+        dist_sq = dx * dx + dy * dy
+        hit = np.flatnonzero(dist_sq < reach * reach)
+        if hit.size == 0:
+            return
+        a, b, dx, dy, reach = a[hit], b[hit], dx[hit], dy[hit], reach[hit]
+        dist = np.sqrt(dist_sq[hit])
+        # Совпавшие центры расходятся в направлении, зависящем от номера пары
+        same = dist == 0
+        if same.any():
+            angle = a[same] * 2.399963
+            dx[same] = np.cos(angle)
+            dy[same] = np.sin(angle)
+            dist[same] = 1.0
+        k = 0.5 * SEPARATION_RELAX * (reach - dist) / dist
+        sx = k * dx
+        sy = k * dy
+        push_x = np.bincount(b, sx, m) - np.bincount(a, sx, m)
+        push_y = np.bincount(b, sy, m) - np.bincount(a, sy, m)
+        length = np.hypot(push_x, push_y)
+        limit = steps[order]
+        scale = np.minimum(1.0, np.divide(limit, length, out=np.ones_like(length), where=length > 0))
+        rows = idx[order]
+        self.pos[rows, 0] += push_x * scale
+        self.pos[rows, 1] += push_y * scale
+
+    def snapshot(self):
+        """Запоминает позиции перед тиком логики"""
+        self.prev_pos[:self.count] = self.pos[:self.count]
+
+    def visible(self, cam: pygame.Vector2, alpha: float, width: int, height: int,
+                lod_center: Optional[pygame.Vector2] = None, lod_distance: float = 0.0):
+        """Отсечение по экрану для отрисовки.
+
+        Возвращает индексы врагов, чей рисунок задевает экран, сдвиги от
+        текущей позиции к интерполированной (alpha) и маску упрощённых —
+        дальше lod_distance от lod_center (если он задан).
+        """
+        n = self.count
+        shifts = (self.prev_pos[:n] - self.pos[:n]) * (1.0 - alpha)
+        sx = self.pos[:n, 0] + shifts[:, 0] + cam.x
+        sy = self.pos[:n, 1] + shifts[:, 1] + cam.y
+        reach = self.reach[:n]
+        idx = np.flatnonzero((sx > -reach) & (sx < width + reach) &
+                             (sy > -reach) & (sy < height + reach))
+        if lod_center is None:
+            simple = np.zeros(len(idx), dtype=np.bool_)
+        else:
+            d = self.pos[idx] - (lod_center.x, lod_center.y)
+            simple = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1] > lod_distance * lod_distance
+        return idx, shifts[idx], simple
+
+    def reindex(self) -> SpatialHash:
+        """Перестраивает общий индекс по текущим позициям (без убитых)"""
+        n = self.count
+        if self._dying:
+            rows = np.flatnonzero(self._live_mask())
+            views = self.views
+            self.grid.rebuild([views[i] for i in rows.tolist()], self.pos[rows], self.size[rows])
+        else:
+            self.grid.rebuild(self.views, self.pos[:n], self.size[:n])
+        return self.grid
+
+    def nearest_ally(self, enemy: Enemy) -> Optional[Enemy]:
+        """Ближайший к enemy другой враг (или None, если он один).
+
+        Поиск идёт по индексу кольцами ячеек вокруг врага, позиции союзников —
+        на момент последнего reindex (раз за тик): отстают не больше чем на
+        тик, а появившиеся позже враги до перестройки не находятся. Если в
+        ближних кольцах никого нет — полный проход по колонкам.
+        """
+        n = self.count
+        if n < 2:
+            return None
+        pos = self.pos
+        x = pos.item(enemy._slot, 0)
+        y = pos.item(enemy._slot, 1)
+        grid = self.grid
+        cs = grid.cell_size
+        best = None
+        best_d = math.inf
+        for k in range(_NEAREST_ALLY_RINGS):
+            for _, ally, ax, ay in grid.ring(x, y, k):
+                dx = ax - x
+                dy = ay - y
+                d = dx * dx + dy * dy
+                if d < best_d and ally is not enemy and ally._store is self and not ally.dying:
+                    best_d = d
+                    best = ally
+            if best is not None and best_d <= (k * cs) ** 2:
+                return best
+        d = pos[:n] - pos[enemy._slot]
+        dist_sq = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+        dist_sq[enemy._slot] = np.inf
+        dist_sq[~self._live_mask()] = np.inf
+        best = int(np.argmin(dist_sq))
+        return self.views[best] if dist_sq[best] < np.inf else None
+
+    def _within(self, pos, radius: float, exclude: Optional[Enemy]) -> List[tuple]:
+        """Пары (квадрат расстояния, враг) для центров ближе radius к pos"""
+        x = pos[0]
+        y = pos[1]
+        r_sq = radius * radius
+        found = []
+        for _, enemy, ex, ey in self.grid.entries(x, y, radius):
+            dx = ex - x
+            dy = ey - y
+            d = dx * dx + dy * dy
+            if d < r_sq and enemy is not exclude and enemy._store is self and not enemy.dying:
+                found.append((d, enemy))
+        return found
+
+    def enemies_within(self, pos, radius: float, exclude: Optional[Enemy] = None) -> List[Enemy]:
+        """Враги, чьи центры ближе radius к pos, от ближнего к дальнему.
+
+        Запросы идут по индексу последнего reindex (позиции на тот момент),
+        удалённые и убитые с тех пор враги отбрасываются.
+        """
+        found = self._within(pos, radius, exclude)
+        found.sort(key=_by_distance)
+        return [enemy for _, enemy in found]
+
+    def k_nearest(self, pos, k: int, radius: float, exclude: Optional[Enemy] = None) -> List[Enemy]:
+        """До k ближайших к pos врагов в радиусе radius, от ближнего к дальнему"""
+        if k <= 0:
+            return []
+        found = heapq.nsmallest(k, self._within(pos, radius, exclude), key=_by_distance)
+        return [enemy for _, enemy in found]
+
+    def allies_within(self, enemy: Enemy, radius: float) -> List[Enemy]:
+        """Другие враги ближе radius к enemy"""
+        slot = enemy._slot
+        return self.enemies_within((self.pos.item(slot, 0), self.pos.item(slot, 1)), radius, enemy)
+
+    def slow_all(self, duration: float, factor: float):
+        """Замедляет всех врагов сразу (не слабее уже действующего замедления)"""
+        n = self.count
+        np.maximum(self.slow_duration[:n], duration, out=self.slow_duration[:n])
+        np.minimum(self.slow_factor[:n], factor, out=self.slow_factor[:n])
+
+    def with_behaviour(self, flags: int) -> List[Enemy]:
+        """Враги, у чьих архетипов есть хоть один из флагов, в порядке хранения"""
+        n = self.count
+        hits = np.flatnonzero((_ARCHETYPE_FLAGS[self.type_id[:n]] & flags != 0) & self._live_mask())
+        views = self.views
+        return [views[i] for i in hits.tolist()]
+
+    def touching(self, pos: pygame.Vector2, radius: float) -> List[Enemy]:
+        """Живые враги, чей круг пересекается с кругом (pos, radius), в порядке хранения"""
+        n = self.count
+        if n == 0:
+            return []
+        dx = self.pos[:n, 0] - pos.x
+        dy = self.pos[:n, 1] - pos.y
+        reach = self.size[:n] + radius
+        hits = np.flatnonzero((dx * dx + dy * dy < reach * reach) & self._live_mask())
+        views = self.views
+        return [views[i] for i in hits.tolist()]
+
+class Pool:
+    """Пул переиспользуемых объектов с плотным живым префиксом.
+
+    Живые объекты — items[:count]. release_at(i) меняет i-й объект местами
+    с последним живым (O(1)), а освобождённый остаётся в хвосте списка и
+    достаётся следующим spawn() вместо создания нового. Удалять на ходу
+    можно при обходе индексов с конца: на место i встаёт уже пройденный.
+    """
+
+    def __init__(self, factory: Callable[[], object], reset: Callable):
+        self.factory = factory
+        self.reset = reset  # reset(obj, ...) заполняет объект заново
+        self.items: list = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __iter__(self):
+        return islice(self.items, self.count)
+
+    def __getitem__(self, i: int):
+        return self.items[i]
+
+    def spawn(self, *args, **kwargs):
+        items = self.items
+        if self.count == len(items):
+            items.append(self.factory())
+        obj = items[self.count]
+        self.count += 1
+        self.reset(obj, *args, **kwargs)
+        return obj
+
+    def release_at(self, i: int):
+        items = self.items
+        last = self.count - 1
+        items[i], items[last] = items[last], items[i]
+        self.count = last
+
+    def clear(self):
+        self.count = 0
+
 
 class Bullet(GameObject):
-    def __init__(self, pos: pygame.Vector2, angle: float, speed: float, dmg: int, 
-                 piercing: int, size: float, lifetime: float, is_crit: bool = False):
-        super().__init__(pygame.Vector2(pos))
-        self.velocity = pygame.Vector2(
-            math.cos(math.radians(angle)) * speed,
-            math.sin(math.radians(angle)) * speed
-        )
+    def __init__(self, pos=(0, 0), angle: float = 0.0, speed: float = 0.0, dmg: int = 0,
+                 piercing: int = 0, size: float = 1.0, lifetime: float = 0.0, is_crit: bool = False):
+        super().__init__(pygame.Vector2())
+        self.prev_pos = pygame.Vector2()  # Позиция на прошлом тике (для интерполяции)
+        self.velocity = pygame.Vector2()
+        self.reset(pos, angle, speed, dmg, piercing, size, lifetime, is_crit)
+
+    def reset(self, pos, angle: float, speed: float, dmg: int,
+              piercing: int, size: float, lifetime: float, is_crit: bool = False):
+        """Заполняет пулю заново (пули берутся из Pool, а не создаются)"""
+        self.pos.update(pos)
+        self.prev_pos.update(pos)
+        rad = math.radians(angle)
+        self.velocity.update(math.cos(rad) * speed, math.sin(rad) * speed)
         self.dmg = dmg
         self.piercing = piercing
         self.size = size
         self.lifetime = lifetime
-        self.birth_time = pygame.time.get_ticks()
+        self.age = 0.0  # мс симуляции с момента выстрела
         self.is_crit = is_crit
-    
+
     def update(self, dt: float) -> bool:
-        self.pos += self.velocity
-        return pygame.time.get_ticks() - self.birth_time > self.lifetime
+        k = dt * BASE_HZ
+        pos = self.pos
+        self.prev_pos.update(pos)
+        pos.x += self.velocity.x * k
+        pos.y += self.velocity.y * k
+        self.age += dt * 1000
+        return self.age > self.lifetime
     
     def draw(self, surf: pygame.Surface, offset: pygame.Vector2):
         color = (255, 255, 100) if self.is_crit else COLORS["bullet"]
         radius = int(6 * self.size) if self.is_crit else int(4 * self.size)
         pygame.draw.circle(surf, color, 
-                         (int(self.pos.x + offset.x), int(self.pos.y + offset.y)), radius)
\ No newline at end of file
+                         (int(self.pos.x + offset.x), int(self.pos.y + offset.y)), radius)
+
+class EnemyProjectiles:
+    """Снаряды врагов в NumPy-колонках.
+
+    Живые снаряды — непрерывный блок [0, count) в порядке выстрелов.
+    update сдвигает все снаряды, находит истёкшие и попавшие в игрока
+    векторно и возвращает их записи для поштучной обработки (взрыв
+    мортиры, бронебойный выстрел снайпера); отработавшие снаряды
+    удаляются маской. lobbed — снаряд мортиры: летит сквозь игрока и
+    взрывается по таймеру в точке target.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.target = np.zeros((capacity, 2), dtype=np.float64)
+        self.dmg = np.zeros(capacity, dtype=np.int64)
+        self.birth = np.zeros(capacity, dtype=np.float64)
+        self.lifetime = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.int16)  # индекс в palette
+        self.lobbed = np.zeros(capacity, dtype=np.bool_)
+        self.armor_pierce = np.zeros(capacity, dtype=np.bool_)
+        self.palette: List[Tuple[int, int, int]] = []
+        self._palette_index: Dict[Tuple[int, int, int], int] = {}
+    
+    def _columns(self):
+        return (self.pos, self.vel, self.target, self.dmg, self.birth, self.lifetime, self.size,
+                self.color, self.lobbed, self.armor_pierce)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __bool__(self) -> bool:
+        return self.count > 0
+    
+    def spawn(self, pos, vel, dmg: int, birth: float, lifetime: float, color, size: int,
+              target=None, armor_pierce: bool = False):
+        if self.count == self.capacity:
+            self.capacity *= 2
+            for name in ("pos", "vel", "target"):
+                setattr(self, name, np.resize(getattr(self, name), (self.capacity, 2)))
+            for name in ("dmg", "birth", "lifetime", "size", "color", "lobbed", "armor_pierce"):
+                setattr(self, name, np.resize(getattr(self, name), self.capacity))
+        color = tuple(color[:3])
+        color_idx = self._palette_index.get(color)
+        if color_idx is None:
+            color_idx = self._palette_index[color] = len(self.palette)
+            self.palette.append(color)
+        i = self.count
+        self.pos[i] = (pos[0], pos[1])
+        self.vel[i] = (vel[0], vel[1])
+        self.target[i] = (target[0], target[1]) if target is not None else (pos[0], pos[1])
+        self.dmg[i] = dmg
+        self.birth[i] = birth
+        self.lifetime[i] = lifetime
+        self.size[i] = size
+        self.color[i] = color_idx
+        self.lobbed[i] = target is not None
+        self.armor_pierce[i] = armor_pierce
+        self.count += 1
+    
+    def clear(self):
+        self.count = 0
+    
+    def _keep(self, sel):
+        n = self.count
+        kept = n
+        for arr in self._columns():
+            rows = arr[:n][sel]
+            kept = len(rows)
+            arr[:kept] = rows
+        self.count = kept
+    
+    def update(self, dt: float, now: float, player_pos: pygame.Vector2, player_size: float):
+        """Тик снарядов.
+
+        Возвращает (detonations, hits): взрывы мортир — (x, y, урон) точки
+        взрыва — и попадания в игрока — (урон, бронебойный, цвет), в
+        порядке выстрелов. И те и другие снаряды удаляются.
+        """
+        n = self.count
+        if n == 0:
+            return [], []
+        pos = self.pos[:n]
+        pos += self.vel[:n] * (dt * BASE_HZ)
+        expired = now - self.birth[:n] > self.lifetime[:n]
+        d = pos - (player_pos.x, player_pos.y)
+        reach = self.size[:n] + player_size
+        hit = (~expired & ~self.lobbed[:n] &
+               (np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]) < reach))
+        done = expired | hit
+        if not done.any():
+            return [], []
+        detonated = np.flatnonzero(expired & self.lobbed[:n])
+        detonations = list(zip(self.target[detonated, 0].tolist(), self.target[detonated, 1].tolist(),
+                               self.dmg[detonated].tolist()))
+        hit = np.flatnonzero(hit)
+        palette = self.palette
+        hits = [(dmg, pierce, palette[c]) for dmg, pierce, c in
+                zip(self.dmg[hit].tolist(), self.armor_pierce[hit].tolist(), self.color[hit].tolist())]
+        self._keep(~done)
+        return detonations, hits
+    
+    def draw(self, surf: pygame.Surface, offset: pygame.Vector2) -> int:
+        """Рисует снаряды в пределах surf; возвращает число отсечённых"""
+        n = self.count
+        if n == 0:
+            return 0
+        x = (self.pos[:n, 0] + offset[0]).astype(np.int64)
+        y = (self.pos[:n, 1] + offset[1]).astype(np.int64)
+        size = self.size[:n]
+        width, height = surf.get_size()
+        idx = np.flatnonzero((x >= -size) & (x <= width + size) & (y >= -size) & (y <= height + size))
+        palette = self.palette
+        # Мортира мигает
+        pulse = int(180 + 75 * abs(math.sin(pygame.time.get_ticks() / 150)))
+        for ex, ey, r, c, lobbed in zip(x[idx].tolist(), y[idx].tolist(), size[idx].tolist(),
+                                        self.color[idx].tolist(), self.lobbed[idx].tolist()):
+            if lobbed:
+                pygame.draw.circle(surf, (pulse, 120, 20), (ex, ey), r)
+                pygame.draw.circle(surf, (255, 200, 0), (ex, ey), r, 2)
+            else:
+                pygame.draw.circle(surf, palette[c], (ex, ey), r)
+        return n - len(idx)
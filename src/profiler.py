@@ -0,0 +1,117 @@
+import json
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+import pygame
+
+
+class FrameProfiler:
+    """Скользящие замеры времени по фазам кадра.
+
+    Фазы отмечаются «кругами»: mark(name) добавляет к фазе время с
+    предыдущей отметки, поэтому несколько тиков логики за кадр
+    складываются в одну запись. Выключенный профайлер почти ничего не
+    стоит — mark сразу возвращается.
+    """
+
+    def __init__(self, window: int = 300):
+        self.enabled = False
+        self.overlay = False
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+        self.counts: Dict[str, int] = {}
+        self.frame = 0
+        self._current: Dict[str, float] = {}
+        self._frame_start = 0.0
+        self._last = 0.0
+        self._log = None
+        self._stats_cache: Optional[dict] = None
+
+    # --- Запись ---
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._current = {}
+        self._frame_start = self._last = time.perf_counter()
+
+    def restart_lap(self):
+        """Начало участка: время до этого момента никуда не пишется"""
+        if self.enabled:
+            self._last = time.perf_counter()
+
+    def mark(self, phase: str):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._current[phase] = self._current.get(phase, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self, counts: Dict[str, int]):
+        if not self.enabled:
+            return
+        self._current["frame"] = (time.perf_counter() - self._frame_start) * 1000
+        for phase, ms in self._current.items():
+            samples = self.samples.get(phase)
+            if samples is None:
+                samples = self.samples[phase] = deque(maxlen=self.window)
+            samples.append(ms)
+        self.counts = dict(counts)
+        self.frame += 1
+        self._stats_cache = None
+        if self._log is not None:
+            self._log.write(json.dumps({
+                "frame": self.frame,
+                "ms": {k: round(v, 4) for k, v in self._current.items()},
+                "counts": self.counts,
+            }) + "\n")
+
+    # --- Результаты ---
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """mean/p95/p99 (мс) по каждой фазе за последние window кадров"""
+        if self._stats_cache is None:
+            result = {}
+            for phase, samples in self.samples.items():
+                arr = np.fromiter(samples, dtype=np.float64, count=len(samples))
+                p95, p99 = np.percentile(arr, (95, 99))
+                result[phase] = {"mean": float(arr.mean()), "p95": float(p95), "p99": float(p99)}
+            self._stats_cache = result
+        return self._stats_cache
+
+    def reset(self):
+        self.samples.clear()
+        self.counts = {}
+        self.frame = 0
+        self._stats_cache = None
+
+    def start_export(self, path: str):
+        """Построчный JSON (JSON Lines): одна запись на кадр"""
+        self.stop_export()
+        self._log = open(path, "w", encoding="utf-8")
+
+    def stop_export(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def write_summary(self, path: str, **meta):
+        """Дописывает в JSONL-файл итоговую строку со статистикой прогона"""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"summary": self.stats(), "frames": self.frame,
+                                "counts": self.counts, **meta}) + "\n")
+
+    # --- Оверлей ---
+    def draw(self, surf: pygame.Surface, font: pygame.font.Font, x: int, y: int):
+        stats = self.stats()
+        lines = [f"{'фаза':<14}{'сред':>7}{'p95':>7}{'p99':>7}"]
+        for phase, s in stats.items():
+            lines.append(f"{phase:<14}{s['mean']:>7.2f}{s['p95']:>7.2f}{s['p99']:>7.2f}")
+        lines.append("  ".join(f"{k}:{v}" for k, v in self.counts.items()))
+        line_h = font.get_linesize()
+        width = max(font.size(line)[0] for line in lines) + 16
+        panel = pygame.Surface((width, line_h * len(lines) + 12), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        surf.blit(panel, (x - width, y))
+        for i, line in enumerate(lines):
+            surf.blit(font.render(line, True, (180, 255, 200)), (x - width + 8, y + 6 + i * line_h))
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import pygame
+
+
+class LRUCache:
+    """Кэш готовых поверхностей с вытеснением давно не использованных.
+
+    Ключ — всё, от чего зависит картинка (форма, размер, цвет, ступень
+    поворота/прозрачности), поэтому запись никогда не устаревает, а только
+    вытесняется при переполнении.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[pygame.Surface]:
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: pygame.Surface) -> pygame.Surface:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Спрайты сущностей: тела врагов и игрока, статусы, ауры
+sprite_cache = LRUCache(2048)
+
+# Готовые надписи: HUD и меню перерисовывают одни и те же строки каждый кадр
+text_cache = LRUCache(1024)
+
+_fonts: Dict[Tuple[Optional[str], int], pygame.font.Font] = {}
+
+
+def get_font(name: Optional[str], size: int) -> pygame.font.Font:
+    """Шрифт создаётся один раз на (файл, размер)"""
+    font = _fonts.get((name, size))
+    if font is None:
+        font = _fonts[(name, size)] = pygame.font.Font(name, size)
+    return font
+
+
+def render_text(font: pygame.font.Font, text: str, antialias: bool, color,
+                background=None) -> pygame.Surface:
+    """Как font.render, но повторная строка берётся из text_cache.
+
+    Поверхность общая для всех вызовов — рисовать на ней или менять её
+    прозрачность нельзя.
+    """
+    key = (font, text, antialias, color, background)
+    surf = text_cache.get(key)
+    if surf is None:
+        surf = text_cache.put(key, font.render(text, antialias, color, background))
+    return surf
+
+
+def render_glow_text(font: pygame.font.Font, text: str, glow_color, layers: int,
+                     alpha: int, alpha_step: int, offset_step: int, pad: int) -> pygame.Surface:
+    """Свечение заголовка: layers копий текста со сдвигом и убывающей
+    прозрачностью на прозрачной подложке с полями pad. Рисуется под
+    заголовком со сдвигом (-pad, -pad)."""
+    key = ("glow", font, text, glow_color, layers, alpha, alpha_step, offset_step, pad)
+    surf = text_cache.get(key)
+    if surf is None:
+        w, h = font.size(text)
+        surf = pygame.Surface((w + pad * 2, h + pad * 2), pygame.SRCALPHA)
+        for i in range(layers):
+            layer = font.render(text, True, (*glow_color, alpha - i * alpha_step))
+            surf.blit(layer, (pad + i * offset_step, pad + i * offset_step))
+        text_cache.put(key, surf)
+    return surf
@@ -0,0 +1,173 @@
+import json
+import math
+import os
+import struct
+import sys
+import zlib
+from typing import Optional
+
+import pygame
+
+from controls import InputState
+
+# Формат файла записи (.csr):
+#   MAGIC, заголовок _HEAD (версия, длина JSON, число тиков, число перков),
+#   JSON с параметрами забега (сид, режим, dt, нужная часть сейва),
+#   zlib( тики по _TICK.size байт + индексы выбранных перков по байту ).
+MAGIC = b"CSRP"
+VERSION = 1
+_HEAD = struct.Struct("<BIII")
+_TICK = struct.Struct("<bbHB")  # move.x, move.y (×127), угол прицела (1/65536 оборота), флаги
+
+_FIRE, _DASH, _ABILITY, _AIM = 1, 2, 4, 8
+_ANGLE_STEPS = 65536
+
+
+def _axis(v: float) -> int:
+    return max(-127, min(127, round(v * 127)))
+
+
+def encode_input(inp: InputState) -> bytes:
+    flags = (_FIRE if inp.fire else 0) | (_DASH if inp.dash else 0) | (_ABILITY if inp.ability else 0)
+    angle = 0
+    if inp.aim.length_squared() > 0:
+        flags |= _AIM
+        angle = round(math.atan2(inp.aim.y, inp.aim.x) / math.tau * _ANGLE_STEPS) % _ANGLE_STEPS
+    return _TICK.pack(_axis(inp.move.x), _axis(inp.move.y), angle, flags)
+
+
+def decode_input(raw, offset: int = 0) -> InputState:
+    mx, my, angle, flags = _TICK.unpack_from(raw, offset)
+    aim = pygame.Vector2()
+    if flags & _AIM:
+        a = angle / _ANGLE_STEPS * math.tau
+        aim.update(math.cos(a), math.sin(a))
+    return InputState(pygame.Vector2(mx / 127, my / 127), aim,
+                      bool(flags & _FIRE), bool(flags & _DASH), bool(flags & _ABILITY))
+
+
+class InputRecorder:
+    """Запись ввода одного забега: 5 байт на тик плюс выбранные перки.
+
+    record() возвращает ввод, прошедший через кодирование, — симуляция
+    работает с ним же, поэтому повтор совпадает с игрой бит в бит.
+    """
+
+    def __init__(self, header: dict):
+        self.header = header
+        self.ticks = bytearray()
+        self.perks = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.ticks) // _TICK.size
+
+    def record(self, inp: InputState) -> InputState:
+        raw = encode_input(inp)
+        self.ticks += raw
+        return decode_input(raw)
+
+    def record_perk(self, index: int):
+        self.perks.append(index)
+
+    def save(self, path: str):
+        header = json.dumps(self.header).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEAD.pack(VERSION, len(header), len(self), len(self.perks)))
+            f.write(header)
+            f.write(zlib.compress(bytes(self.ticks) + bytes(self.perks), 9))
+
+
+class Recording:
+    """Загруженная запись"""
+
+    def __init__(self, header: dict, ticks: bytes, perks: bytes):
+        self.header = header
+        self.ticks = ticks
+        self.perks = perks
+
+    def __len__(self) -> int:
+        return len(self.ticks) // _TICK.size
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path}: не запись забега")
+        version, header_len, tick_count, perk_count = _HEAD.unpack_from(data, 4)
+        if version != VERSION:
+            raise ValueError(f"{path}: версия записи {version}, ожидается {VERSION}")
+        start = 4 + _HEAD.size
+        header = json.loads(data[start:start + header_len].decode("utf-8"))
+        body = zlib.decompress(data[start + header_len:])
+        split = tick_count * _TICK.size
+        if len(body) != split + perk_count:
+            raise ValueError(f"{path}: запись повреждена")
+        return cls(header, body[:split], body[split:])
+
+
+class ReplayInput:
+    """Провайдер ввода, воспроизводящий запись тик за тиком"""
+
+    def __init__(self, recording: Recording):
+        self.recording = recording
+        self.tick = 0
+        self.perk = 0
+
+    @property
+    def ticks_left(self) -> int:
+        return len(self.recording) - self.tick
+
+    @property
+    def perks_left(self) -> int:
+        return len(self.recording.perks) - self.perk
+
+    def poll(self, engine) -> InputState:
+        if self.tick >= len(self.recording):
+            return InputState()
+        state = decode_input(self.recording.ticks, self.tick * _TICK.size)
+        self.tick += 1
+        return state
+
+    def pick_perk(self, perks: list, engine) -> Optional[int]:
+        if self.perk >= len(self.recording.perks):
+            return None
+        choice = self.recording.perks[self.perk]
+        self.perk += 1
+        return choice
+
+
+def run_replay(path: str, engine=None) -> dict:
+    """Проигрывает запись без окна и возвращает итоговое состояние забега.
+
+    Тики прогоняются, пока не кончится записанный ввод (или не наступит
+    GAME_OVER); выбор перка после последнего тика тоже применяется.
+    """
+    from engine import Engine, GameState
+
+    recording = Recording.load(path)
+    replay = ReplayInput(recording)
+    if engine is None:
+        engine = Engine(headless=True, input_provider=replay)
+    else:
+        engine.input = replay
+    engine.apply_run_header(recording.header)
+    dt = recording.header["dt"]
+    while True:
+        state = engine.state
+        if state == GameState.LEVEL_UP:
+            if not replay.perks_left:
+                break
+        elif state not in (GameState.PLAY, GameState.WAVE_COMPLETE) or not replay.ticks_left:
+            break
+        engine.step(dt)
+    return engine.state_digest()
+
+
+if __name__ == "__main__":
+    # python src/replay.py run.csr — печатает итог забега (JSON)
+    if len(sys.argv) != 2:
+        sys.exit("usage: replay.py <запись.csr>")
+    os.environ.setdefault("CYBER_SURVIVOR_HEADLESS", "1")
+    print(json.dumps(run_replay(sys.argv[1]), ensure_ascii=False, indent=2))
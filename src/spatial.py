@@ -0,0 +1,150 @@
+from operator import itemgetter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_by_order = itemgetter(0)
+
+
+class SpatialHash:
+    """Равномерная сетка для широкой фазы столкновений.
+
+    Объект кладётся в ячейку по своему центру, а запрос по радиусу
+    расширяется на максимальный радиус вставленных объектов — так крупные
+    враги (боссы, мини-боссы) не теряются на границах ячеек.
+    """
+
+    def __init__(self, cell_size: int = 128):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], list] = {}
+        self.max_radius = 0.0
+        self._count = 0
+
+    def clear(self):
+        self.cells.clear()
+        self.max_radius = 0.0
+        self._count = 0
+
+    def insert(self, obj, x: float, y: float, radius: float = 0.0):
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        entry = (self._count, obj, x, y)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [entry]
+        else:
+            cell.append(entry)
+        self._count += 1
+        if radius > self.max_radius:
+            self.max_radius = radius
+
+    def rebuild(self, objects, coords=None, radii=None):
+        """Перестраивает сетку по объектам с полями pos и size.
+
+        coords/radii — готовые колонки (N×2 и N) из хранилища, чтобы не
+        читать позицию каждого объекта поштучно.
+        """
+        self.clear()
+        if coords is None:
+            for obj in objects:
+                pos = obj.pos
+                self.insert(obj, pos.x, pos.y, obj.size)
+            return
+        for obj, (x, y), r in zip(objects, coords.tolist(), radii.tolist()):
+            self.insert(obj, x, y, r)
+
+    def entries(self, x: float, y: float, radius: float) -> List[tuple]:
+        """Записи (порядок, объект, x, y) кандидатов для круга (x, y, radius),
+        без сортировки"""
+        reach = radius + self.max_radius
+        cs = self.cell_size
+        x0 = int((x - reach) // cs)
+        x1 = int((x + reach) // cs)
+        y0 = int((y - reach) // cs)
+        y1 = int((y + reach) // cs)
+        cells = self.cells
+        found = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.extend(cell)
+        return found
+
+    def query(self, x: float, y: float, radius: float) -> List:
+        """Кандидаты, чей круг может пересечь круг (x, y, radius).
+
+        Порядок совпадает с порядком вставки, чтобы пробитие и эффекты
+        срабатывали в той же очерёдности, что и при полном переборе.
+        """
+        found = self.entries(x, y, radius)
+        if len(found) > 1:
+            found.sort(key=_by_order)
+        return [entry[1] for entry in found]
+
+    def ring(self, x: float, y: float, k: int) -> List[tuple]:
+        """Записи (порядок, объект, x, y) из ячеек на расстоянии ровно k
+        ячеек (по Чебышёву) от ячейки точки (x, y), без сортировки. Всё, что
+        дальше кольца k, отстоит от точки не меньше чем на k * cell_size."""
+        cs = self.cell_size
+        cx = int(x // cs)
+        cy = int(y // cs)
+        cells = self.cells
+        found = []
+        if k == 0:
+            cell = cells.get((cx, cy))
+            if cell:
+                found.extend(cell)
+        else:
+            for i in range(-k, k + 1):
+                for key in ((cx + i, cy - k), (cx + i, cy + k)):
+                    cell = cells.get(key)
+                    if cell:
+                        found.extend(cell)
+            for j in range(-k + 1, k):
+                for key in ((cx - k, cy + j), (cx + k, cy + j)):
+                    cell = cells.get(key)
+                    if cell:
+                        found.extend(cell)
+        return found
+
+
+class FlowField:
+    """Поле направлений к цели на сетке вокруг неё.
+
+    В каждой ячейке — единичный вектор от её центра к центру ячейки цели.
+    Арена открытая, поэтому поле зависит только от сдвига в ячейках и
+    строится один раз; при переходе цели в другую ячейку меняется лишь
+    начало отсчёта. Выборка для тысяч врагов — одно индексирование
+    массива. Ближе near ячеек к цели и за краем поля (radius) направление
+    считается точно, чтобы враги доходили до самой цели.
+    """
+
+    def __init__(self, cell_size: int, radius: int, near: int):
+        self.cell_size = cell_size
+        self.radius = radius
+        self.near = near
+        k = np.arange(-radius, radius + 1, dtype=np.float64)
+        dx, dy = np.meshgrid(k, k, indexing="ij")
+        dist = np.hypot(dx, dy)
+        dist[radius, radius] = 1.0
+        self.dirs = np.stack((-dx / dist, -dy / dist), axis=-1)
+        self.flat = self.dirs.reshape(-1, 2)
+
+    def sample(self, points: np.ndarray, x: float, y: float) -> np.ndarray:
+        """Единичные направления (N×2) из точек points к цели (x, y);
+        для точки, совпавшей с целью, — нулевой вектор"""
+        cs = self.cell_size
+        r = self.radius
+        ix = (points[:, 0] // cs).astype(np.int64) - int(x // cs)
+        iy = (points[:, 1] // cs).astype(np.int64) - int(y // cs)
+        cheb = np.maximum(np.abs(ix), np.abs(iy))
+        np.clip(ix, -r, r, out=ix)
+        np.clip(iy, -r, r, out=iy)
+        out = self.flat[(ix + r) * (2 * r + 1) + (iy + r)]
+        exact = np.flatnonzero((cheb < self.near) | (cheb > r))
+        if exact.size:
+            d = np.array((x, y)) - points[exact]
+            dist = np.hypot(d[:, 0], d[:, 1])
+            dist[dist == 0] = np.inf
+            out[exact] = d / dist[:, None]
+        return out
@@ -4,9 +4,40 @@ import random
 import os
 from entities import *
 import json
+import atexit
+from bisect import bisect_right
+from itertools import accumulate
+import sys
+import threading
+import time
 
 class SaveSystem:
-    def __init__(self):
+    """Сейв игры в data/save.json.
+
+    save() ничего не пишет сам: снимает копию данных и помечает её к
+    записи. Фоновый поток пишет не чаще раза в SAVE_DELAY секунд (частые
+    сохранения сливаются в одно) через временный файл + fsync + rename,
+    поэтому оборванная запись не портит сейв. flush() дописывает всё
+    синхронно — он вызывается при выходе (и через atexit).
+    """
+
+    SAVE_DELAY = 0.5
+
+    def __init__(self, persist: bool = True):
+        # persist=False: данные только в памяти (headless-прогоны не трогают сейв)
+        self.persist = persist
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._pending = None   # (номер, JSON) последнего снимка, ещё не записанного
+        self._due = 0.0
+        self._seq = 0
+        self._written_seq = 0
+        self._thread = None
+        if not persist:
+            self.save_file = None
+            self.data = self.default_data()
+            return
+        
         # Сохранение в папку data/
         script_dir = os.path.dirname(os.path.abspath(__file__))
         data_dir = os.path.join(script_dir, "../data")
@@ -17,6 +48,7 @@ class SaveSystem:
         
         self.save_file = os.path.join(data_dir, "save.json")
         self.data = self.load()
+        atexit.register(self.flush)
     
     def load(self) -> dict:
         default = self.default_data()
@@ -107,8 +139,76 @@ class SaveSystem:
         }
     
     def save(self):
-        with open(self.save_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        if not self.persist:
+            return
+        # Снимок делается здесь: поток записи не должен читать self.data,
+        # пока игра его меняет
+        text = json.dumps(self.data, indent=2, ensure_ascii=False)
+        with self._cond:
+            self._seq += 1
+            if self._pending is None:
+                self._due = time.monotonic() + self.SAVE_DELAY
+            self._pending = (self._seq, text)
+            self._cond.notify_all()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name="save-writer", daemon=True)
+            self._thread.start()
+    
+    def flush(self) -> bool:
+        """Синхронно записывает последний снимок. Если снимок уже забрал
+        поток записи, ждёт, пока тот допишет его. False (с сообщением в
+        stderr) — если записать не удалось"""
+        with self._cond:
+            target = self._seq
+        while True:
+            with self._cond:
+                # Снимок в руках потока записи: ждём записи или возврата в очередь
+                while self._written_seq < target and self._pending is None:
+                    self._cond.wait()
+                if self._written_seq >= target:
+                    return True
+                pending, self._pending = self._pending, None
+            error = self._write(*pending)
+            if error is not None:
+                print(f"Не удалось записать сохранение: {error}", file=sys.stderr)
+                return False
+    
+    def _writer(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                delay = self._due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                pending, self._pending = self._pending, None
+            self._write(*pending)
+    
+    def _write(self, seq: int, text: str) -> Optional[OSError]:
+        """Пишет снимок; возвращает ошибку, если диск его не принял"""
+        with self._io_lock:
+            if seq <= self._written_seq:
+                return None  # flush уже записал снимок новее
+            tmp_file = self.save_file + ".tmp"
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.save_file)
+            except OSError as error:
+                # Диск недоступен: вернём снимок в очередь, если новее нет
+                with self._cond:
+                    if self._pending is None:
+                        self._pending = (seq, text)
+                        self._due = time.monotonic() + self.SAVE_DELAY
+                    self._cond.notify_all()
+                return error
+            with self._cond:
+                self._written_seq = seq
+                self._cond.notify_all()
+            return None
     
     def update_stats(self, kills, playtime, score, level, wave, count_stats=True):
         if count_stats:  # Только для режима волн
@@ -126,13 +226,41 @@ class SaveSystem:
         self.save()
         return earned
 
+# Числовые характеристики, от которых зависят пороговые достижения
+ACHIEVEMENT_STATS = {
+    "kills": lambda engine: engine.kills,
+    "time_survived": lambda engine: engine.time_survived,
+    "wave": lambda engine: engine.wave_system.current_wave,
+    "level": lambda engine: engine.player.level,
+    "score": lambda engine: engine.score,
+    "currency": lambda engine: engine.save_system.data["currency"],
+    "modules_spent": lambda engine: sum(engine.save_system.data["modules"].values()),
+    "games_played": lambda engine: engine.save_system.data["stats"]["games_played"],
+    "dashes": lambda engine: getattr(engine, 'dash_count', 0),
+    "speed_upgrades": lambda engine: engine.player.upgrades.get("speed", 0),
+    "max_hp": lambda engine: engine.player.max_hp,
+    "max_shield": lambda engine: engine.player.max_shield,
+    "multishot": lambda engine: engine.player.multishot,
+    "lifesteal": lambda engine: engine.player.lifesteal,
+    "crit_chance": lambda engine: engine.player.crit_chance,
+}
+
+
 @dataclass
 class Achievement:
     id: str
     name: str
     description: str
-    check: callable
+    check: Optional[callable] = None
     reward: int = 50  # Валюта за выполнение
+    # Пороговое достижение: ACHIEVEMENT_STATS[stat](engine) >= threshold
+    stat: Optional[str] = None
+    threshold: float = 0
+    
+    def __post_init__(self):
+        if self.check is None:
+            getter, threshold = ACHIEVEMENT_STATS[self.stat], self.threshold
+            self.check = lambda engine: getter(engine) >= threshold
     
     def get_progress(self, engine) -> float:
         """Возвращает прогресс от 0.0 до 1.0"""
@@ -175,127 +303,127 @@ class AchievementSystem:
         # === УБИЙСТВА (многоуровневые) ===
         "first_blood": Achievement(
             "first_blood", "Первая кровь", "Убейте первого врага",
-            lambda engine: engine.kills >= 1, 25
+            reward=25, stat="kills", threshold=1
         ),
         "killer_10": Achievement(
             "killer_10", "Охотник I", "Убейте 10 врагов за игру",
-            lambda engine: engine.kills >= 10, 30
+            reward=30, stat="kills", threshold=10
         ),
         "killer_50": Achievement(
             "killer_50", "Охотник II", "Убейте 50 врагов за игру",
-            lambda engine: engine.kills >= 50, 60
+            reward=60, stat="kills", threshold=50
         ),
         "killer_100": Achievement(
             "killer_100", "Убийца I", "Убейте 100 врагов за игру",
-            lambda engine: engine.kills >= 100, 100
+            reward=100, stat="kills", threshold=100
         ),
         "killer_250": Achievement(
             "killer_250", "Убийца II", "Убейте 250 врагов за игру",
-            lambda engine: engine.kills >= 250, 175
+            reward=175, stat="kills", threshold=250
         ),
         "killer_500": Achievement(
             "killer_500", "Серийный убийца", "Убейте 500 врагов за игру",
-            lambda engine: engine.kills >= 500, 250
+            reward=250, stat="kills", threshold=500
         ),
         "killer_1000": Achievement(
             "killer_1000", "Геноцид", "Убейте 1000 врагов за игру",
-            lambda engine: engine.kills >= 1000, 500
+            reward=500, stat="kills", threshold=1000
         ),
         "killer_2000": Achievement(
             "killer_2000", "Истребитель", "Убейте 2000 врагов за игру",
-            lambda engine: engine.kills >= 2000, 800
+            reward=800, stat="kills", threshold=2000
         ),
         
         # === ВЫЖИВАНИЕ (многоуровневые) ===
         "survivor_1": Achievement(
             "survivor_1", "Первые минуты", "Продержитесь 1 минуту",
-            lambda engine: engine.time_survived >= 60, 25
+            reward=25, stat="time_survived", threshold=60
         ),
         "survivor_5": Achievement(
             "survivor_5", "Бывалый", "Продержитесь 5 минут",
-            lambda engine: engine.time_survived >= 300, 75
+            reward=75, stat="time_survived", threshold=300
         ),
         "survivor_10": Achievement(
             "survivor_10", "Выживший I", "Продержитесь 10 минут",
-            lambda engine: engine.time_survived >= 600, 100
+            reward=100, stat="time_survived", threshold=600
         ),
         "survivor_20": Achievement(
             "survivor_20", "Выживший II", "Продержитесь 20 минут",
-            lambda engine: engine.time_survived >= 1200, 200
+            reward=200, stat="time_survived", threshold=1200
         ),
         "survivor_30": Achievement(
             "survivor_30", "Выживший III", "Продержитесь 30 минут",
-            lambda engine: engine.time_survived >= 1800, 350
+            reward=350, stat="time_survived", threshold=1800
         ),
         "survivor_60": Achievement(
             "survivor_60", "Мастер выживания", "Продержитесь 60 минут",
-            lambda engine: engine.time_survived >= 3600, 700
+            reward=700, stat="time_survived", threshold=3600
         ),
         
         # === ВОЛНЫ (многоуровневые) ===
         "wave_master_3": Achievement(
             "wave_master_3", "Новобранец", "Пройдите 3 волны",
-            lambda engine: engine.wave_system.current_wave >= 4, 50
+            reward=50, stat="wave", threshold=4
         ),
         "wave_master_5": Achievement(
             "wave_master_5", "Воин волн I", "Пройдите 5 волн",
-            lambda engine: engine.wave_system.current_wave >= 6, 100
+            reward=100, stat="wave", threshold=6
         ),
         "wave_master_10": Achievement(
             "wave_master_10", "Воин волн II", "Пройдите 10 волн",
-            lambda engine: engine.wave_system.current_wave >= 11, 200
+            reward=200, stat="wave", threshold=11
         ),
         "wave_master_15": Achievement(
             "wave_master_15", "Мастер волн I", "Пройдите 15 волн",
-            lambda engine: engine.wave_system.current_wave >= 16, 300
+            reward=300, stat="wave", threshold=16
         ),
         "wave_master_20": Achievement(
             "wave_master_20", "Мастер волн II", "Пройдите 20 волн",
-            lambda engine: engine.wave_system.current_wave >= 21, 500
+            reward=500, stat="wave", threshold=21
         ),
         "wave_master_30": Achievement(
             "wave_master_30", "Легенда волн", "Пройдите 30 волн",
-            lambda engine: engine.wave_system.current_wave >= 31, 800
+            reward=800, stat="wave", threshold=31
         ),
         
         # === УРОВНИ ИГРОКА (многоуровневые) ===
         "level_expert_5": Achievement(
             "level_expert_5", "Ученик", "Достигните 5 уровня",
-            lambda engine: engine.player.level >= 5, 75
+            reward=75, stat="level", threshold=5
         ),
         "level_expert_10": Achievement(
             "level_expert_10", "Эксперт I", "Достигните 10 уровня",
-            lambda engine: engine.player.level >= 10, 150
+            reward=150, stat="level", threshold=10
         ),
         "level_expert_20": Achievement(
             "level_expert_20", "Эксперт II", "Достигните 20 уровня",
-            lambda engine: engine.player.level >= 20, 300
+            reward=300, stat="level", threshold=20
         ),
         "level_expert_30": Achievement(
             "level_expert_30", "Легенда уровней", "Достигните 30 уровня",
-            lambda engine: engine.player.level >= 30, 500
+            reward=500, stat="level", threshold=30
         ),
         
         # === ЭКОНОМИКА ===
         "collector_1000": Achievement(
             "collector_1000", "Коллекционер I", "Накопите 1000 валюты",
-            lambda engine: engine.save_system.data["currency"] >= 1000, 200
+            reward=200, stat="currency", threshold=1000
         ),
         "collector_5000": Achievement(
             "collector_5000", "Коллекционер II", "Накопите 5000 валюты",
-            lambda engine: engine.save_system.data["currency"] >= 5000, 400
+            reward=400, stat="currency", threshold=5000
         ),
         "collector_10000": Achievement(
             "collector_10000", "Магнат", "Накопите 10000 валюты",
-            lambda engine: engine.save_system.data["currency"] >= 10000, 700
+            reward=700, stat="currency", threshold=10000
         ),
         "spender": Achievement(
             "spender", "Транжира I", "Вложите 10+ уровней модулей",
-            lambda engine: sum(engine.save_system.data["modules"].values()) >= 10, 150
+            reward=150, stat="modules_spent", threshold=10
         ),
         "spender_25": Achievement(
             "spender_25", "Транжира II", "Вложите 25+ уровней модулей",
-            lambda engine: sum(engine.save_system.data["modules"].values()) >= 25, 300
+            reward=300, stat="modules_spent", threshold=25
         ),
         
         # === БОЕВЫЕ СТИЛИ ===
@@ -305,19 +433,19 @@ class AchievementSystem:
         ),
         "speed_demon": Achievement(
             "speed_demon", "Демон скорости I", "Наберите 5+ к скорости",
-            lambda engine: engine.player.upgrades.get("speed", 0) >= 5, 150
+            reward=150, stat="speed_upgrades", threshold=5
         ),
         "speed_demon_max": Achievement(
             "speed_demon_max", "Демон скорости II", "Наберите 10+ к скорости",
-            lambda engine: engine.player.upgrades.get("speed", 0) >= 10, 250
+            reward=250, stat="speed_upgrades", threshold=10
         ),
         "tank": Achievement(
             "tank", "Танк I", "Наберите 200+ HP",
-            lambda engine: engine.player.max_hp >= 200, 150
+            reward=150, stat="max_hp", threshold=200
         ),
         "tank_2": Achievement(
             "tank_2", "Танк II", "Наберите 500+ HP",
-            lambda engine: engine.player.max_hp >= 500, 300
+            reward=300, stat="max_hp", threshold=500
         ),
         "glass_cannon": Achievement(
             "glass_cannon", "Стеклянная пушка", "50+ урона при <100 HP",
@@ -325,33 +453,33 @@ class AchievementSystem:
         ),
         "shielder_ach": Achievement(
             "shielder_ach", "Щитоносец I", "Наберите 200+ щита",
-            lambda engine: engine.player.max_shield >= 200, 150
+            reward=150, stat="max_shield", threshold=200
         ),
         "shielder_2": Achievement(
             "shielder_2", "Щитоносец II", "Наберите 500+ щита",
-            lambda engine: engine.player.max_shield >= 500, 300
+            reward=300, stat="max_shield", threshold=500
         ),
         
         # === УМЕНИЯ ===
         "dasher": Achievement(
             "dasher", "Мастер рывка I", "Используйте рывок 25 раз",
-            lambda engine: getattr(engine, 'dash_count', 0) >= 25, 75
+            reward=75, stat="dashes", threshold=25
         ),
         "dasher_50": Achievement(
             "dasher_50", "Мастер рывка II", "Используйте рывок 50 раз",
-            lambda engine: getattr(engine, 'dash_count', 0) >= 50, 150
+            reward=150, stat="dashes", threshold=50
         ),
         "dasher_200": Achievement(
             "dasher_200", "Мастер рывка III", "Используйте рывок 200 раз",
-            lambda engine: getattr(engine, 'dash_count', 0) >= 200, 300
+            reward=300, stat="dashes", threshold=200
         ),
         "multigunner": Achievement(
             "multigunner", "Многозарядный I", "Иметь 3+ пули одновременно",
-            lambda engine: engine.player.multishot >= 3, 150
+            reward=150, stat="multishot", threshold=3
         ),
         "multigunner_max": Achievement(
             "multigunner_max", "Многозарядный II", "Иметь 6 пуль одновременно",
-            lambda engine: engine.player.multishot >= 6, 300
+            reward=300, stat="multishot", threshold=6
         ),
         
         # === СПЕЦИАЛЬНЫЕ ПЕРКИ ===
@@ -383,60 +511,207 @@ class AchievementSystem:
         # === ОСОБЫЕ ДОСТИЖЕНИЯ ===
         "vampire": Achievement(
             "vampire", "Вампир", "Набрать 50%+ вампиризма",
-            lambda engine: engine.player.lifesteal >= 0.5, 200
+            reward=200, stat="lifesteal", threshold=0.5
         ),
         "sniper_ach": Achievement(
             "sniper_ach", "Снайпер", "Иметь 50%+ крит шанс",
-            lambda engine: engine.player.crit_chance >= 0.5, 200
+            reward=200, stat="crit_chance", threshold=0.5
         ),
         "games_10": Achievement(
             "games_10", "Ветеран I", "Сыграйте 10 игр",
-            lambda engine: engine.save_system.data["stats"]["games_played"] >= 10, 100
+            reward=100, stat="games_played", threshold=10
         ),
         "games_50": Achievement(
             "games_50", "Ветеран II", "Сыграйте 50 игр",
-            lambda engine: engine.save_system.data["stats"]["games_played"] >= 50, 300
+            reward=300, stat="games_played", threshold=50
         ),
         "games_100": Achievement(
             "games_100", "Ветеран III", "Сыграйте 100 игр",
-            lambda engine: engine.save_system.data["stats"]["games_played"] >= 100, 600
+            reward=600, stat="games_played", threshold=100
         ),
         "score_1000": Achievement(
             "score_1000", "Счётовод I", "Набрать 1000 очков за игру",
-            lambda engine: engine.score >= 1000, 75
+            reward=75, stat="score", threshold=1000
         ),
         "score_5000": Achievement(
             "score_5000", "Счётовод II", "Набрать 5000 очков за игру",
-            lambda engine: engine.score >= 5000, 150
+            reward=150, stat="score", threshold=5000
         ),
         "score_20000": Achievement(
             "score_20000", "Счётовод III", "Набрать 20000 очков за игру",
-            lambda engine: engine.score >= 20000, 400
+            reward=400, stat="score", threshold=20000
         ),
     }
     
+    @staticmethod
+    def _tracker(engine) -> "AchievementTracker":
+        tracker = getattr(engine, 'achievement_tracker', None)
+        if tracker is None:
+            tracker = engine.achievement_tracker = AchievementTracker(AchievementSystem.ACHIEVEMENTS)
+        return tracker
+    
     @staticmethod
     def check_achievements(engine, save_system):
-        """Проверяет и разблокирует достижения"""
+        """Полная проверка: все характеристики и прочие условия (начало
+        забега, выбор перка, конец забега)"""
+        tracker = AchievementSystem._tracker(engine)
+        newly_unlocked = tracker.poll(engine, save_system.data["achievements"])
+        return AchievementSystem._unlock(save_system, newly_unlocked)
+    
+    @staticmethod
+    def stat_changed(engine, save_system, *stats):
+        """Событие «изменились характеристики stats»: сдвигает только их
+        указатели, без опроса остальных"""
+        tracker = AchievementSystem._tracker(engine)
+        unlocked = save_system.data["achievements"]
         newly_unlocked = []
+        for stat in stats:
+            if stat in tracker.ladders:
+                newly_unlocked.extend(tracker.advance(stat, ACHIEVEMENT_STATS[stat](engine), unlocked))
+        return AchievementSystem._unlock(save_system, newly_unlocked)
+    
+    @staticmethod
+    def _unlock(save_system, newly_unlocked):
         total_reward = 0
-        
-        for ach_id, achievement in AchievementSystem.ACHIEVEMENTS.items():
-            if not save_system.data["achievements"].get(ach_id, False):
-                try:
-                    if achievement.check(engine):
-                        save_system.data["achievements"][ach_id] = True
-                        save_system.data["currency"] += achievement.reward
-                        total_reward += achievement.reward
-                        newly_unlocked.append(achievement)
-                except:
-                    pass
+        for achievement in newly_unlocked:
+            save_system.data["achievements"][achievement.id] = True
+            save_system.data["currency"] += achievement.reward
+            total_reward += achievement.reward
         
         if newly_unlocked:
             save_system.save()
         
         return newly_unlocked, total_reward
 
+class AchievementTracker:
+    """Проверка достижений без опроса каждого условия.
+
+    Пороговые достижения разложены по характеристикам (Achievement.stat) в
+    списки, отсортированные по порогу; для каждой характеристики хранится
+    указатель на ближайший непройденный порог. Пока значение его не
+    достигло, проверка характеристики — одно сравнение, поэтому цена
+    опроса зависит от числа характеристик, а не достижений. Движок сообщает
+    об изменении характеристики (AchievementSystem.stat_changed), и
+    сдвигается только её указатель; полный poll — при старте забега,
+    выборе перка и в конце забега. Остальные условия (флаги перков и
+    т.п.) проверяются в poll.
+    """
+
+    def __init__(self, achievements: Dict[str, Achievement]):
+        ladders: Dict[str, List[Achievement]] = {}
+        self.predicates: List[Achievement] = []
+        for achievement in achievements.values():
+            if achievement.stat is None:
+                self.predicates.append(achievement)
+            else:
+                ladders.setdefault(achievement.stat, []).append(achievement)
+        self.ladders = {stat: sorted(ladder, key=lambda a: a.threshold)
+                        for stat, ladder in ladders.items()}
+        self.thresholds = {stat: [a.threshold for a in ladder]
+                           for stat, ladder in self.ladders.items()}
+        self.next = dict.fromkeys(self.ladders, 0)
+    
+    def reset(self):
+        self.next = dict.fromkeys(self.ladders, 0)
+    
+    def advance(self, stat: str, value, unlocked: dict) -> List[Achievement]:
+        """Событие «характеристика стала равна value»: пройденные пороги,
+        ещё не разблокированные в unlocked"""
+        i = self.next[stat]
+        thresholds = self.thresholds[stat]
+        if i == len(thresholds) or value < thresholds[i]:
+            return []
+        j = bisect_right(thresholds, value, i)
+        self.next[stat] = j
+        return [a for a in self.ladders[stat][i:j] if not unlocked.get(a.id, False)]
+    
+    def poll(self, engine, unlocked: dict) -> List[Achievement]:
+        """Текущие значения всех характеристик + прочие условия"""
+        passed = []
+        for stat in self.ladders:
+            try:
+                value = ACHIEVEMENT_STATS[stat](engine)
+            except Exception:
+                continue
+            passed.extend(self.advance(stat, value, unlocked))
+        for achievement in self.predicates:
+            if not unlocked.get(achievement.id, False):
+                try:
+                    if achievement.check(engine):
+                        passed.append(achievement)
+                except Exception:
+                    pass
+        return passed
+
+class SpawnTable:
+    """Взвешенный выбор типа врага по заранее посчитанным кумулятивным весам.
+
+    Один rng.random() и bisect на выбор — ровно как rng.choices(types,
+    weights), поэтому при том же генераторе выбор совпадает. Таблица из
+    одного типа генератор не трогает.
+    """
+
+    def __init__(self, weights: Dict[str, float]):
+        self.types = tuple(weights)
+        self.cum_weights = list(accumulate(weights.values()))
+        self.total = self.cum_weights[-1]
+    
+    def sample(self, rng: random.Random) -> str:
+        types = self.types
+        if len(types) == 1:
+            return types[0]
+        return types[bisect_right(self.cum_weights, rng.random() * self.total, 0, len(types) - 1)]
+    
+    def sample_many(self, rng: random.Random, count: int) -> List[str]:
+        types = self.types
+        if len(types) == 1:
+            return [types[0]] * count
+        cum_weights, total, hi = self.cum_weights, self.total, len(types) - 1
+        return [types[bisect_right(cum_weights, rng.random() * total, 0, hi)] for _ in range(count)]
+
+
+class SpawnSchedule:
+    """Таблицы спавна по отрезкам времени (или номера волны).
+
+    brackets — пары (граница, веса) по возрастанию границы; таблица
+    отрезка действует, пока ключ строго меньше его границы.
+    """
+
+    def __init__(self, brackets: List[Tuple[float, Dict[str, float]]]):
+        self.bounds = [bound for bound, _ in brackets]
+        self.tables = [SpawnTable(weights) for _, weights in brackets]
+    
+    def table(self, key: float) -> SpawnTable:
+        return self.tables[min(bisect_right(self.bounds, key), len(self.tables) - 1)]
+
+
+# Бесконечный режим: по времени забега (с)
+ENDLESS_SPAWN_SCHEDULE = SpawnSchedule([
+    (60, {"basic": 1}),  # Первая минута
+    (120, {"basic": 55, "fast": 30, "swarm": 15}),  # 1-2 минуты
+    (180, {"basic": 25, "fast": 25, "tank": 15, "swarm": 15, "sniper": 8, "ranger": 7, "lancer": 5}),  # 2-3 минуты
+    (300, {"basic": 20, "fast": 22, "tank": 18, "swarm": 12, "sniper": 10, "ghost": 8, "ranger": 6,
+           "healer": 4}),  # 3-5 минут
+    (480, {"basic": 12, "fast": 18, "tank": 18, "swarm": 12, "sniper": 10, "ghost": 10, "bruiser": 10,
+           "lancer": 6, "buffer": 4}),  # 5-8 минут
+    (math.inf, {"basic": 6, "fast": 9, "tank": 10, "sniper": 7, "ghost": 7, "bruiser": 9, "leech": 5,
+                "bomber": 5, "sentinel": 5, "boss": 6, "ranger": 5, "mortar": 4, "shielder": 6,
+                "lancer": 5, "healer": 4, "buffer": 7}),  # После 8 минут
+])
+
+# Режим волн: по номеру волны
+WAVE_SPAWN_SCHEDULE = SpawnSchedule([
+    (3, {"basic": 80, "swarm": 20}),  # 1-2
+    (5, {"basic": 55, "fast": 30, "swarm": 15}),  # 3-4
+    (8, {"basic": 25, "fast": 25, "tank": 15, "swarm": 15, "sniper": 8, "ranger": 7, "lancer": 5}),  # 5-7
+    (13, {"basic": 15, "fast": 20, "tank": 15, "sniper": 10, "ghost": 10, "swarm": 8, "ranger": 8,
+          "mortar": 5, "lancer": 5, "healer": 4}),  # 8-12
+    (math.inf, {"basic": 6, "fast": 9, "tank": 10, "sniper": 7, "ghost": 7, "bruiser": 9, "leech": 5,
+                "bomber": 5, "sentinel": 5, "boss": 7, "ranger": 5, "mortar": 4, "shielder": 7,
+                "lancer": 5, "healer": 4, "buffer": 5}),  # 13+
+])
+
+
 class WaveSystem:
     def __init__(self, break_duration: int = 10, endless_mode: bool = False):
         self.current_wave = 1
@@ -519,7 +794,7 @@ class PerkManager:
     }
     
     @staticmethod
-    def get_available_perks(player: 'Player' = None) -> List[PerkOption]:
+    def get_available_perks(player: 'Player' = None, rng: random.Random = random) -> List[PerkOption]:
         all_perks = [
             # ===== БАЗОВЫЕ ХАРАКТЕРИСТИКИ =====
             PerkOption("hp", "+25 MAX HP", "Увеличивает максимальное здоровье на 25", "[+]", "common"),
@@ -613,7 +888,7 @@ class PerkManager:
                 filtered.append(p)
             all_perks = filtered
 
-        return random.sample(all_perks, min(3, len(all_perks)))
+        return rng.sample(all_perks, min(3, len(all_perks)))
     
     @staticmethod
     def apply_perk(player: Player, perk_id: str):
@@ -761,7 +1036,10 @@ class PerkManager:
             player.thorns_damage += 10
 
 class SoundManager:
-    def __init__(self):
+    def __init__(self, enabled: bool = True):
+        if not enabled:
+            self.enabled = False
+            return
         try:
             pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
             self.enabled = True
@@ -0,0 +1,38 @@
+"""Достижения открываются по событиям изменения характеристик, без опроса"""
+import os
+import sys
+
+os.environ.setdefault("CYBER_SURVIVOR_HEADLESS", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from controls import ScriptedInput
+from engine import Engine, GameState
+
+
+def make_engine():
+    engine = Engine(headless=True, input_provider=ScriptedInput())
+    engine.reset_game(seed=1)
+    engine.state = GameState.PLAY
+    return engine
+
+
+def test_kills_event_unlocks_without_poll():
+    engine = make_engine()
+    unlocked = engine.save_system.data["achievements"]
+    engine.kills = 10
+    assert not unlocked["killer_10"]
+    engine.stat_changed("kills")
+    assert unlocked["first_blood"] and unlocked["killer_10"]
+    assert not unlocked["killer_50"]
+
+
+def test_perk_choice_checks_perk_conditions():
+    engine = make_engine()
+    engine.state = GameState.LEVEL_UP
+
+    class Perk:
+        id = "poison"
+
+    engine.current_perks = [Perk()]
+    engine.choose_perk("poison")
+    assert engine.save_system.data["achievements"]["poison_master"]
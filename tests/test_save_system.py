@@ -0,0 +1,62 @@
+"""SaveSystem.flush: последний снимок не теряется при выходе"""
+import json
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("CYBER_SURVIVOR_HEADLESS", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from systems import SaveSystem
+
+
+def make_save(path, delay=0.0):
+    save = SaveSystem(persist=False)
+    save.persist = True
+    save.save_file = str(path)
+    save.SAVE_DELAY = delay
+    return save
+
+
+def wait_until(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "не дождались"
+        time.sleep(0.001)
+
+
+def test_flush_waits_for_snapshot_taken_by_writer(tmp_path):
+    path = tmp_path / "save.json"
+    save = make_save(path)
+    save._io_lock.acquire()  # поток записи застрянет между передачей и записью
+    try:
+        save.data["currency"] = 42
+        save.save()
+        wait_until(lambda: save._pending is None)  # снимок забрал поток записи
+        result = []
+        flusher = threading.Thread(target=lambda: result.append(save.flush()))
+        flusher.start()
+        time.sleep(0.05)
+        assert flusher.is_alive(), "flush вернулся, не дождавшись записи"
+    finally:
+        save._io_lock.release()
+    flusher.join(5)
+    assert result == [True]
+    assert json.loads(path.read_text(encoding="utf-8"))["currency"] == 42
+
+
+def test_flush_writes_latest_snapshot(tmp_path):
+    path = tmp_path / "save.json"
+    save = make_save(path, delay=60)  # поток записи сам не успеет
+    for currency in (1, 2, 3):
+        save.data["currency"] = currency
+        save.save()
+    assert save.flush() is True
+    assert json.loads(path.read_text(encoding="utf-8"))["currency"] == 3
+
+
+def test_flush_reports_failed_write(tmp_path):
+    save = make_save(tmp_path / "missing" / "save.json", delay=60)
+    save.save()
+    assert save.flush() is False
@@ -0,0 +1,54 @@
+"""Расталкивание преследователей: толпа вокруг игрока не сливается и не дрожит"""
+import math
+import os
+import random
+import sys
+
+os.environ.setdefault("CYBER_SURVIVOR_HEADLESS", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np
+import pygame
+
+from entities import Enemy, EnemyStore
+
+PLAYER_SIZE = 20
+TICKS = 500
+
+
+def run_horde(n=300, seed=3):
+    """n обычных врагов бегут к неподвижному игроку в (0, 0); возвращает
+    хранилище и сдвиги за каждый из последних 200 тиков"""
+    store = EnemyStore()
+    rng = random.Random(seed)
+    for _ in range(n):
+        a = rng.uniform(0, math.tau)
+        d = rng.uniform(200, 900)
+        store.append(Enemy(pygame.Vector2(math.cos(a) * d, math.sin(a) * d), "basic", 1.0))
+    target = pygame.Vector2(0, 0)
+    steps = []
+    prev = store.pos[:n].copy()
+    for tick in range(TICKS):
+        store.update(1 / 60, target)
+        pos = store.pos[:n]
+        if tick >= TICKS - 200:
+            steps.append(pos - prev)
+        prev = pos.copy()
+    return store, np.array(steps)
+
+
+def test_crowd_does_not_collapse_onto_player():
+    store, _ = run_horde()
+    n = store.count
+    pos = store.pos[:n]
+    touching = np.hypot(pos[:, 0], pos[:, 1]) < store.size[:n] + PLAYER_SIZE
+    # Без расталкивания к игроку прилипают все 300
+    assert touching.sum() < n // 5
+
+
+def test_settled_crowd_does_not_jitter():
+    store, steps = run_horde()
+    chase_step = store.speed[0] * 1.0  # px за тик 60 Гц
+    moved = np.hypot(steps[..., 0], steps[..., 1])
+    assert moved.max() <= chase_step * 2 + 1e-6
+    assert moved.mean() < chase_step * 0.25